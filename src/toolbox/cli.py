@@ -1,18 +1,22 @@
 import click
 import difflib
+import os
 import platform
 import subprocess
 import sys
+import time
 import urllib.request
 import yaml
 import logging
 from pathlib import Path
+from typing import Dict, Tuple
 from rich.console import Console
 from rich.table import Table
 
 from toolbox.core.config import config_manager
 from toolbox.core.plugin import plugin_manager
-from toolbox.core.engine import engine_registry
+from toolbox.core.engine import engine_registry, console as engine_console
+from toolbox.core.events import JsonLinesSink, RichSink, SocketSink, event_bus
 from toolbox.core.workflow import WorkflowRunner
 from toolbox.core.logging import setup_logging, logger
 from toolbox import __version__
@@ -32,16 +36,96 @@ class FuzzyGroup(click.Group):
             ctx.fail(f"'{cmd_name}' is not a toolbox command. Did you mean '{matches[0]}'?")
         return None
 
-@click.group(cls=FuzzyGroup)
+class LazyPluginGroup(FuzzyGroup):
+    """Fuzzy group that imports a plugin module only when one of its commands is invoked."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # command name -> (plugin module, help text) for commands not imported yet
+        self.lazy_commands: Dict[str, Tuple[str, str]] = {}
+
+    def load_plugin_commands(self, package_name: str = "toolbox.plugins"):
+        """Populate the command tree from the cached manifest, rebuilding it on a miss."""
+        manifest = None
+        if not os.environ.get("TOOLBOX_EAGER_PLUGINS"):
+            manifest = plugin_manager.load_manifest(package_name)
+
+        if manifest is None:
+            # Cold start: import everything once and record what each module registers
+            modules = {
+                module_name: plugin_manager.register_module(module_name, self)
+                for module_name in plugin_manager.discover(package_name)
+            }
+            plugin_manager.save_manifest(modules, package_name)
+            return
+
+        for module_name, commands in manifest["modules"].items():
+            for name, help_text in commands.items():
+                if name not in self.commands:
+                    self.lazy_commands[name] = (module_name, help_text)
+
+        # Modules that failed last time (e.g. a missing dependency) are retried eagerly
+        for module_name in manifest.get("failed", []):
+            plugin_manager.register_module(module_name, self)
+
+    def _import_lazy(self, cmd_name: str):
+        module_name = self.lazy_commands[cmd_name][0]
+        for name in [n for n, (m, _) in self.lazy_commands.items() if m == module_name]:
+            del self.lazy_commands[name]
+        plugin_manager.register_module(module_name, self)
+
+    def load_all_commands(self):
+        """Import every pending plugin so that `self.commands` is complete."""
+        while self.lazy_commands:
+            self._import_lazy(next(iter(self.lazy_commands)))
+
+    def list_commands(self, ctx):
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            self._import_lazy(cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        """Like click.Group.format_commands, but uses manifest help for unloaded plugins."""
+        rows = []
+        for name in self.list_commands(ctx):
+            if name in self.lazy_commands:
+                rows.append((name, self.lazy_commands[name][1]))
+                continue
+            cmd = self.commands.get(name)
+            if cmd is None or cmd.hidden:
+                continue
+            rows.append((name, cmd))
+
+        if rows:
+            limit = formatter.width - 6 - max(len(name) for name, _ in rows)
+            with formatter.section("Commands"):
+                formatter.write_dl([
+                    (name, click.utils.make_default_short_help(entry, limit) if isinstance(entry, str)
+                     else entry.get_short_help_str(limit))
+                    for name, entry in rows
+                ])
+
+@click.group(cls=LazyPluginGroup)
 @click.version_option(version=__version__)
 @click.option("--verbose", is_flag=True, help="Enable verbose output for engines")
 @click.option("--gpu", is_flag=True, help="Enable GPU acceleration for AI tasks")
 @click.option("--log-file", type=click.Path(), help="Path to log file")
 @click.option("--json-log", is_flag=True, help="Output logs in JSON format for machine reading")
-def cli(verbose, gpu, log_file, json_log):
+@click.option("--progress-socket", envvar="TOOLBOX_PROGRESS_SOCKET",
+              help="Also send progress events as JSON lines to this Unix socket or host:port")
+def cli(verbose, gpu, log_file, json_log, progress_socket):
     """ToolBox: A universal offline CLI utility suite."""
     log_level = logging.DEBUG if verbose else logging.INFO
     setup_logging(level=log_level, log_file=Path(log_file) if log_file else None, json_format=json_log)
+
+    # JSON logs replace the progress bars with machine-readable progress lines on the same stream
+    # Plugins print through the engine console, so bars and messages share one display
+    sinks = [JsonLinesSink(sys.stdout) if json_log else RichSink(engine_console)]
+    if progress_socket:
+        sinks.append(SocketSink(progress_socket))
+    event_bus.configure(sinks)
     
     if verbose:
         logger.debug("Verbose mode enabled")
@@ -78,7 +162,6 @@ def config_list():
 def config_set(key, value):
     """Update a setting (key value). Use dots for nested keys (e.g. engine_paths.ffmpeg)."""
     # Simple type conversion
-    val: Any
     if value.lower() == "true":
         val = True
     elif value.lower() == "false":
@@ -95,11 +178,11 @@ def config_set(key, value):
             main_key = parts[0]
             sub_key = parts[1]
             
-            # Currently only engine_paths is a dict
-            if main_key == "engine_paths":
-                current_paths = config_manager.settings.engine_paths.copy()
-                current_paths[sub_key] = val
-                config_manager.update(engine_paths=current_paths)
+            # engine_paths and engine_limits are the dict settings
+            if main_key in ("engine_paths", "engine_limits"):
+                current = getattr(config_manager.settings, main_key).copy()
+                current[sub_key] = val
+                config_manager.update(**{main_key: current})
             else:
                 console.print(f"[yellow]Nested update for '{main_key}' not fully supported yet.[/yellow]")
                 return
@@ -122,6 +205,7 @@ cli.add_command(plugin_group, name="plugins")
 @plugin_group.command(name="list")
 def plugin_list():
     """List all installed plugins."""
+    plugin_manager.load_plugins()
     table = Table(title="Installed Plugins")
     table.add_column("Plugin", style="cyan")
     table.add_column("Version", style="green")
@@ -238,6 +322,7 @@ def status(show_paths):
     console.print(engine_table)
 
     # Plugins status
+    plugin_manager.load_plugins()
     plugin_table = Table(title="Installed Plugins")
     plugin_table.add_column("Plugin", style="magenta")
     plugin_table.add_column("Commands", style="yellow")
@@ -249,7 +334,8 @@ def status(show_paths):
     console.print(plugin_table)
 
 @cli.command(name="check")
-def check_system():
+@click.option("--refresh", is_flag=True, help="Re-probe engine versions instead of using the engine cache")
+def check_system(refresh):
     """Thoroughly check system readiness and environment."""
     console.print("[bold cyan]System Intelligence Check[/bold cyan]\n")
     
@@ -282,23 +368,213 @@ def check_system():
         console.print("- Internet: [red]Offline/Blocked[/red]")
 
     console.print("\n[bold]Engine Validation:[/bold]")
+    if refresh:
+        engine_registry.refresh()
     for name, available, hint in engine_registry.check_all():
         if available:
-            engine = engine_registry.get(name)
-            try:
-                # Try a simple version check or help command for the engine
-                if name == "ffmpeg":
-                    engine.run(["-version"], check=True)
-                elif name == "tesseract":
-                    engine.run(["--version"], check=True)
-                elif name == "libreoffice":
-                    engine.run(["--version"], check=True)
-                console.print(f"- {name}: [green]Functional[/green]")
-            except Exception as e:
-                console.print(f"- {name}: [yellow]Available but potentially broken ({str(e)})[/yellow]")
+            # Versions come from the engine cache; binaries are only spawned on a cache miss
+            info = engine_registry.get(name).probe()
+            if info.get("version"):
+                console.print(f"- {name}: [green]Functional[/green] [dim]({info['version']})[/dim]")
+            else:
+                console.print(f"- {name}: [yellow]Available but potentially broken (no version reported)[/yellow]")
         else:
             console.print(f"- {name}: [red]Not found[/red]")
 
+@cli.command(name="serve-local")
+@click.option("--socket", "socket_path", type=click.Path(), help="Unix socket path (default: ~/.toolbox/server.sock or $TOOLBOX_SOCKET)")
+def serve_local(socket_path):
+    """Keep a warm ToolBox process for fast dispatch via `toolboxc`."""
+    from toolbox.core.server import LocalServer, ServerError
+
+    try:
+        server = LocalServer(cli, Path(socket_path) if socket_path else None)
+        server.warm_up()
+        console.print(f"[bold green]ToolBox server listening on {server.socket_path}[/bold green]")
+        console.print("[dim]Run commands with `toolboxc <command>`. Press Ctrl+C to stop.[/dim]")
+        server.serve_forever()
+    except ServerError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise click.Abort()
+    except KeyboardInterrupt:
+        console.print("\n[bold red]Server stopped.[/bold red]")
+
+@cli.group(name="perf")
+def perf_group():
+    """Inspect engine performance metrics."""
+    pass
+
+def _format_seconds(value):
+    if value is None:
+        return "-"
+    return f"{value * 1000:.0f} ms" if value < 1 else f"{value:.2f} s"
+
+@perf_group.command(name="report")
+@click.option("--engine", help="Only include this engine (e.g. ffmpeg)")
+@click.option("--since", type=float, help="Only include samples from the last N hours")
+def perf_report(engine, since):
+    """Show p50/p95/p99 engine durations per engine, command and input size."""
+    from toolbox.core.metrics import metrics_store, size_bucket, summarize
+
+    cutoff = time.time() - since * 3600 if since else None
+    entries = metrics_store.load(since=cutoff)
+    if engine:
+        entries = [e for e in entries if e.get("engine") == engine.lower()]
+
+    if not entries:
+        console.print("[yellow]No engine metrics recorded yet.[/yellow]")
+        return
+
+    views = [
+        ("By Engine", ["Engine"], lambda e: e.get("engine")),
+        ("By Command", ["Command", "Engine"], lambda e: (e.get("command") or "-", e.get("engine"))),
+        ("By Input Size", ["Engine", "Input Size"], lambda e: (e.get("engine"), size_bucket(e.get("input_bytes")))),
+    ]
+    for title, columns, key in views:
+        table = Table(title=title)
+        for column in columns:
+            table.add_column(column, style="cyan")
+        table.add_column("Runs", justify="right")
+        table.add_column("Errors", justify="right", style="red")
+        for column in ("p50", "p95", "p99"):
+            table.add_column(column, justify="right", style="green")
+
+        for row in summarize(entries, key):
+            keys = row["key"] if isinstance(row["key"], tuple) else (row["key"],)
+            table.add_row(
+                *[str(k) for k in keys],
+                str(row["count"]),
+                str(row["errors"]),
+                *[_format_seconds(row[p]) for p in ("p50", "p95", "p99")],
+            )
+        console.print(table)
+
+@perf_group.command(name="compact")
+def perf_compact():
+    """Merge finished per-process metric logs into the compacted store."""
+    from toolbox.core.metrics import metrics_store
+
+    merged = metrics_store.compact()
+    console.print(f"[green]✓ Compacted {merged} metric log(s) into {metrics_store.compacted_path}[/green]")
+
+@cli.group(name="cache")
+def cache_group():
+    """Inspect and trim the batch result cache."""
+    pass
+
+def _format_bytes(value):
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+@cache_group.command(name="stats")
+def cache_stats():
+    """Show result cache size, hit rate and usage per command."""
+    from toolbox.core.cache import result_cache
+    from toolbox.core.media import media_cache
+    from toolbox.core.ocr import ocr_cache
+
+    stats = result_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+    console.print(f"Location: [cyan]{result_cache.directory}[/cyan]")
+    console.print(f"Entries: [green]{stats['entries']}[/green]  "
+                  f"Size: [green]{_format_bytes(stats['size'])}[/green] / {_format_bytes(stats['max_size'])}  "
+                  f"Hit rate: [green]{hit_rate}[/green] ({stats['hits']} hits, {stats['misses']} misses)")
+    media_counts = media_cache.counts()
+    console.print(f"Media probes: [green]{media_counts['probes']}[/green]  "
+                  f"Measurements: [green]{media_counts['measurements']}[/green]")
+    ocr = ocr_cache.stats()
+    ocr_lookups = ocr["hits"] + ocr["misses"]
+    ocr_hit_rate = f"{ocr['hits'] / ocr_lookups:.0%}" if ocr_lookups else "-"
+    console.print(f"OCR texts: [green]{ocr['entries']}[/green]  "
+                  f"Size: [green]{_format_bytes(ocr['size'])}[/green] / {_format_bytes(ocr['max_size'])}  "
+                  f"Hit rate: [green]{ocr_hit_rate}[/green] ({ocr['hits']} hits, {ocr['misses']} misses)")
+
+    if stats["commands"]:
+        table = Table(title="By Command")
+        table.add_column("Command", style="cyan")
+        table.add_column("Entries", justify="right")
+        table.add_column("Size", justify="right")
+        table.add_column("Hits", justify="right", style="green")
+        for row in stats["commands"]:
+            table.add_row(row["command"] or "-", str(row["entries"]), _format_bytes(row["size"]), str(row["hits"]))
+        console.print(table)
+
+@cache_group.command(name="prune")
+@click.option("--max-size", type=int, help="Trim least-recently-used results until the cache fits in this many MB (default: result_cache_max_mb)")
+@click.option("--older-than", type=float, help="Remove results not used in the last N days")
+@click.option("--all", "clear_all", is_flag=True, help="Remove every cached result")
+def cache_prune(max_size, older_than, clear_all):
+    """Remove cached results, least recently used first."""
+    from toolbox.core.cache import result_cache
+    from toolbox.core.media import media_cache
+    from toolbox.core.ocr import ocr_cache
+
+    if clear_all:
+        result_cache.clear()
+        media_cache.clear()
+        ocr_cache.clear()
+        console.print("[green]✓ Result cache cleared.[/green]")
+        return
+
+    stale = media_cache.prune()
+    if stale:
+        console.print(f"[green]✓ Forgot {stale} media probe(s) of changed or deleted files.[/green]")
+
+    max_bytes = max_size * 1024 * 1024 if max_size is not None else result_cache.max_bytes
+    removed, freed = result_cache.prune(max_bytes, older_than * 86400 if older_than is not None else None)
+    console.print(f"[green]✓ Removed {removed} cached result(s), freed {_format_bytes(freed)}.[/green]")
+
+    # OCR text has its own, smaller budget (ocr_cache_max_mb)
+    removed, freed = ocr_cache.prune(ocr_cache.max_bytes, older_than * 86400 if older_than is not None else None)
+    if removed:
+        console.print(f"[green]✓ Removed {removed} cached OCR text(s), freed {_format_bytes(freed)}.[/green]")
+
+@cli.group(name="batch")
+def batch_group():
+    """Inspect journals of --glob batch runs."""
+    pass
+
+@batch_group.command(name="report")
+@click.argument("journal_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--errors", type=int, default=10, help="Number of distinct errors to show")
+def batch_report(journal_file, errors):
+    """Show throughput, timings and failures recorded in a batch journal."""
+    from toolbox.core.journal import BatchJournal
+
+    journal = BatchJournal(journal_file)
+    try:
+        report = journal.report(errors=errors)
+    finally:
+        journal.close()
+
+    states = report["states"]
+    console.print(f"[bold cyan]{report['command'] or 'Batch'}[/bold cyan] [dim]({len(report['runs'])} run(s))[/dim]")
+    console.print(f"Done: [green]{states['done']}[/green] ({report['cached']} from cache)  "
+                  f"Failed: [red]{states['failed']}[/red]  Pending: [yellow]{states['pending']}[/yellow]")
+    if report["throughput"] is not None:
+        console.print(f"Throughput: [green]{report['throughput']:.1f} files/s[/green] over {_format_seconds(report['elapsed'])}  "
+                      f"p50: {_format_seconds(report['p50'])}  p95: {_format_seconds(report['p95'])}")
+
+    if report["slowest"]:
+        table = Table(title="Slowest Files")
+        table.add_column("File", style="cyan")
+        table.add_column("Duration", justify="right", style="green")
+        for path, duration in report["slowest"]:
+            table.add_row(path, _format_seconds(duration))
+        console.print(table)
+
+    if report["errors"]:
+        table = Table(title="Failures")
+        table.add_column("Error", style="red")
+        table.add_column("Files", justify="right")
+        for error, count in report["errors"]:
+            table.add_row(error or "-", str(count))
+        console.print(table)
+        console.print(f"[dim]Retry failures with --journal {journal_file} --resume[/dim]")
+
 @cli.group(name="workflow")
 def workflow_group():
     """Manage and run automated workflows."""
@@ -434,10 +710,8 @@ def schedule_workflow(workflow_file, interval, immediate):
     except KeyboardInterrupt:
         pass
 
-# Initialize plugins
-plugin_manager.load_plugins()
-for plugin in plugin_manager.plugins.values():
-    plugin.register_commands(cli)
+# Initialize plugins (imported on first use, see LazyPluginGroup)
+cli.load_plugin_commands()
 
 def main():
     cli()
@@ -0,0 +1,79 @@
+"""
+Thin client for `toolbox serve-local`.
+
+Deliberately stdlib-only and import-light: it forwards argv, cwd, the
+environment and its own stdin/stdout/stderr file descriptors to the resident
+server over a Unix socket and exits with the command's exit code. When no
+server is running it falls back to running the command in-process.
+
+Wire format: a 4-byte big-endian payload length (sent together with the three
+file descriptors), then the payload: NUL-separated cwd, argc, argv items and
+KEY=VALUE environment entries. The server answers with a 4-byte signed exit
+code. The client sends a single INTERRUPT byte to cancel the running command.
+"""
+import os
+import socket
+import struct
+import sys
+# No `typing` import: every millisecond of client startup counts
+
+HEADER = struct.Struct("!I")
+EXIT_CODE = struct.Struct("!i")
+INTERRUPT = b"\x03"
+
+def default_socket_path() -> str:
+    return os.environ.get("TOOLBOX_SOCKET") or os.path.join(os.path.expanduser("~"), ".toolbox", "server.sock")
+
+def encode_request(argv: list[str], cwd: str, env: dict[str, str]) -> bytes:
+    fields = [cwd, str(len(argv)), *argv, *(f"{k}={v}" for k, v in env.items())]
+    return b"\0".join(os.fsencode(f) for f in fields)
+
+def decode_request(payload: bytes) -> tuple[list[str], str, dict[str, str]]:
+    fields = [os.fsdecode(f) for f in payload.split(b"\0")]
+    cwd, argc = fields[0], int(fields[1])
+    argv = fields[2:2 + argc]
+    env = dict(entry.split("=", 1) for entry in fields[2 + argc:] if "=" in entry)
+    return argv, cwd, env
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("ToolBox server closed the connection")
+        data += chunk
+    return data
+
+def forward(argv: list[str], socket_path: str | None = None) -> int:
+    """Run a command on the resident server and return its exit code."""
+    payload = encode_request(argv, os.getcwd(), dict(os.environ))
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path or default_socket_path()))
+        socket.send_fds(sock, [HEADER.pack(len(payload))], [0, 1, 2])
+        sock.sendall(payload)
+        try:
+            return EXIT_CODE.unpack(recv_exact(sock, EXIT_CODE.size))[0]
+        except KeyboardInterrupt:
+            # Let the server interrupt the command, then report its exit code
+            sock.sendall(INTERRUPT)
+            return EXIT_CODE.unpack(recv_exact(sock, EXIT_CODE.size))[0]
+
+def main():
+    argv = sys.argv[1:]
+    if hasattr(socket, "send_fds"):
+        try:
+            sys.exit(forward(argv))
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+        except ConnectionError as e:
+            print(f"toolbox: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    # No server running: behave exactly like the regular `toolbox` entry point
+    from toolbox.cli import main as cli_main
+    sys.argv = ["toolbox", *argv]
+    cli_main()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import functools
+import importlib
+import importlib.metadata
+import itertools
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import click
+from pydantic import BaseModel
+
+from toolbox import __version__
+from toolbox.core.cache import make_key, result_cache
+from toolbox.core.engine import console, engine_registry
+from toolbox.core.events import ProgressTask, event_bus
+from toolbox.core.io import iter_glob
+from toolbox.core.journal import BatchJournal, JournalError
+from toolbox.core.plugin import plugin_manager
+
+EXECUTORS = ["thread", "process", "auto"]
+
+# Parameters that only choose where results go; they do not change the result itself
+LOCATION_PARAMS = {"input_file", "output", "output_file", "output_dir"}
+
+class BatchTask(BaseModel):
+    """Picklable description of one batch command, shipped to process workers."""
+    root: str
+    command_path: List[str]
+    kwargs: Dict[str, Any]
+    engine_flags: Dict[str, Tuple[bool, bool]] = {}
+    use_cache: bool = False
+
+class BatchResult(BaseModel):
+    input_file: str
+    ok: bool
+    cached: bool = False
+    error: Optional[str] = None
+    duration: float = 0.0
+
+def command_path(ctx: click.Context) -> List[str]:
+    """Names of the commands from the root group down to `ctx`, e.g. ['image', 'resize']."""
+    names = []
+    while ctx.parent is not None:
+        names.append(ctx.info_name)
+        ctx = ctx.parent
+    return names[::-1]
+
+def _root_ref(root: click.Command) -> Optional[str]:
+    """'module:attribute' under which the root group can be re-imported in a worker."""
+    if root.callback is None:
+        return None
+    module = importlib.import_module(root.callback.__module__)
+    for name, value in vars(module).items():
+        if value is root:
+            return f"{module.__name__}:{name}"
+    return None
+
+def choose_executor(executor: str, path: List[str], file_count: int, workers: int, engines: Sequence[str] = ()) -> str:
+    """Resolve 'auto' to a concrete executor for this command and batch size."""
+    if executor != "auto":
+        return executor
+    if workers <= 1 or file_count < 2:
+        return "thread"
+    plugin = plugin_manager.plugins.get(path[0]) if path else None
+    engines = list(engines) + (plugin.metadata.engine.lower().split("/") if plugin else [])
+    # Commands that shell out to an external engine spend their time outside the GIL
+    if any(name in engine_registry.engines for name in engines):
+        return "thread"
+    return "process"
+
+@functools.lru_cache(maxsize=None)
+def tool_versions(path: Tuple[str, ...], engines: Tuple[str, ...] = ()) -> Dict[str, Optional[str]]:
+    """Versions of ToolBox, the command's plugin and every engine or library it relies on."""
+    versions: Dict[str, Optional[str]] = {"toolbox": __version__}
+    names = list(engines)
+    plugin = plugin_manager.plugins.get(path[0]) if path else None
+    if plugin:
+        versions[f"plugin:{plugin.metadata.name}"] = plugin.metadata.version
+        names += plugin.metadata.engine.lower().split("/")
+    for name in names:
+        if name in engine_registry.engines:
+            # Served from the engine cache, so this rarely spawns anything
+            versions[name] = engine_registry.engines[name].version
+        else:
+            try:
+                versions[name] = importlib.metadata.version(name)
+            except importlib.metadata.PackageNotFoundError:
+                pass
+    return versions
+
+def _signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def run_cached(ctx: click.Context, func: Callable, kwargs: Dict[str, Any], outputs: Callable,
+               engines: Sequence[str] = ()) -> bool:
+    """
+    Invoke `func` for one input, or restore its outputs from the result cache.
+
+    `outputs(kwargs)` names the files the command writes for these arguments.
+    Returns True when the work was skipped because of a cache hit.
+    """
+    input_file = kwargs.get("input_file")
+    targets = [str(p) for p in outputs(kwargs) if p]
+    if kwargs.get("dry_run") or not targets or not input_file or not os.path.isfile(input_file):
+        ctx.invoke(func, **kwargs)
+        return False
+
+    path = command_path(ctx)
+    try:
+        key = make_key(
+            command=path,
+            params={k: v for k, v in kwargs.items() if k not in LOCATION_PARAMS},
+            input=result_cache.file_digest(input_file),
+            # The output format can depend on the file name alone (e.g. image convert)
+            formats=[os.path.splitext(t)[1].lower() for t in targets],
+            versions=tool_versions(tuple(path), tuple(engines)),
+        )
+        blobs = result_cache.lookup(key)
+        if blobs is not None:
+            result_cache.materialize(blobs, targets)
+            console.print(f"[dim]✓ {input_file} unchanged, restored {', '.join(targets)} from cache[/dim]")
+            return True
+    except (OSError, sqlite3.Error) as e:
+        console.print(f"[yellow]Result cache unavailable: {e}[/yellow]")
+        ctx.invoke(func, **kwargs)
+        return False
+
+    for target in targets:
+        # Never write through a hardlink into the cache's copy of an earlier result
+        try:
+            if os.stat(target).st_nlink > 1:
+                os.unlink(target)
+        except OSError:
+            pass
+    before = {t: _signature(t) for t in targets}
+    ctx.invoke(func, **kwargs)
+
+    # Only cache runs that actually (re)wrote every declared output
+    if all(_signature(t) is not None and _signature(t) != before[t] for t in targets):
+        try:
+            result_cache.store(key, targets, command=" ".join(path))
+        except (OSError, sqlite3.Error) as e:
+            console.print(f"[yellow]Could not store result in cache: {e}[/yellow]")
+    return False
+
+def invoke_file(ctx: click.Context, callback: Callable, kwargs: Dict[str, Any], use_cache: bool = False) -> bool:
+    """Run a batch_process command's function for one input. Returns True on a cache hit."""
+    if use_cache and callback.batch_outputs:
+        return run_cached(ctx, callback.batch_func, kwargs, callback.batch_outputs, callback.batch_engines)
+    ctx.invoke(callback.batch_func, **kwargs)
+    return False
+
+# Per-worker state, populated once by _init_worker
+_worker: Dict[str, Any] = {}
+
+def _init_worker(task: BatchTask):
+    """Import the root group and resolve the command once per worker process."""
+    module_name, attr = task.root.split(":", 1)
+    root = getattr(importlib.import_module(module_name), attr)
+
+    ctx = click.Context(root, info_name="toolbox")
+    command = root
+    for name in task.command_path:
+        command = command.get_command(ctx, name)
+        if command is None:
+            raise click.ClickException(f"Unknown command: {' '.join(task.command_path)}")
+        ctx = click.Context(command, info_name=name, parent=ctx)
+
+    for name, (verbose, use_gpu) in task.engine_flags.items():
+        if name in engine_registry.engines:
+            engine_registry.engines[name].verbose = verbose
+            engine_registry.engines[name].use_gpu = use_gpu
+
+    # Forked workers inherit the parent's sinks; only the parent renders progress
+    event_bus.configure([], close=False)
+    _worker["ctx"] = ctx
+    _worker["task"] = task
+
+def _run_one(file_path: str) -> BatchResult:
+    ctx, task = _worker["ctx"], _worker["task"]
+    kwargs = dict(task.kwargs, input_file=file_path)
+    start = time.perf_counter()
+    try:
+        with ctx:
+            cached = invoke_file(ctx, ctx.command.callback, kwargs, task.use_cache)
+        return BatchResult(input_file=file_path, ok=True, cached=cached, duration=time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(input_file=file_path, ok=False, error=str(e) or type(e).__name__,
+                           duration=time.perf_counter() - start)
+
+def _run_chunk(files: List[str]) -> List[BatchResult]:
+    return [_run_one(f) for f in files]
+
+def _chunks(files: Iterable[str], workers: int) -> Iterator[List[str]]:
+    """
+    Group files into chunks for the process pool. Chunks start at one file so
+    short batches still spread across every worker, and grow (up to 32) as
+    more files are seen to amortise the per-task overhead on long ones.
+    """
+    it = iter(files)
+    seen = 0
+    while True:
+        chunk = list(itertools.islice(it, max(1, min(32, seen // (workers * 4)))))
+        if not chunk:
+            return
+        seen += len(chunk)
+        yield chunk
+
+def _windowed(submit: Callable[[Any], Future], items: Iterable[Any], window: int) -> Iterator[Tuple[Any, Future]]:
+    """Submit `items` with at most `window` in flight, yielding (item, future) as each completes."""
+    in_flight: Dict[Future, Any] = {}
+
+    def drain(block_until_empty: bool):
+        while in_flight and (block_until_empty or len(in_flight) >= window):
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future
+
+    for item in items:
+        in_flight[submit(item)] = item
+        yield from drain(block_until_empty=False)
+    yield from drain(block_until_empty=True)
+
+def make_task(ctx: click.Context, kwargs: Dict[str, Any], use_cache: bool = False) -> Optional[BatchTask]:
+    """Build the process-pool task for this invocation, or None if it cannot be shipped."""
+    root = _root_ref(ctx.find_root().command)
+    if root is None:
+        return None
+    task = BatchTask(
+        root=root,
+        command_path=command_path(ctx),
+        kwargs={k: v for k, v in kwargs.items() if k != "input_file"},
+        engine_flags={name: (e.verbose, e.use_gpu) for name, e in engine_registry.engines.items()},
+        use_cache=use_cache,
+    )
+    try:
+        pickle.dumps(task)
+    except Exception:
+        return None
+    return task
+
+def run_in_processes(task: BatchTask, files: Iterable[str], workers: int) -> Iterator[BatchResult]:
+    """Run the command over `files` in a process pool, yielding results as chunks finish."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(task,)) as executor:
+        # Two chunks per worker keeps everyone busy without reading far ahead
+        for chunk, future in _windowed(lambda c: executor.submit(_run_chunk, c), _chunks(files, workers), workers * 2):
+            try:
+                yield from future.result()
+            except Exception as e:
+                # The worker itself died (e.g. failed to initialise or was killed)
+                for file_path in chunk:
+                    yield BatchResult(input_file=file_path, ok=False, error=str(e) or type(e).__name__)
+
+def run_file(invoke: Callable[[str], bool], file_path: str) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        cached = invoke(file_path)
+        return BatchResult(input_file=file_path, ok=True, cached=cached, duration=time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(input_file=file_path, ok=False, error=str(e) or type(e).__name__,
+                           duration=time.perf_counter() - start)
+
+def run_sequential(invoke: Callable[[str], bool], files: Iterable[str]) -> Iterator[BatchResult]:
+    for file_path in files:
+        yield run_file(invoke, file_path)
+
+def run_in_threads(invoke: Callable[[str], bool], files: Iterable[str], workers: int) -> Iterator[BatchResult]:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _, future in _windowed(lambda f: executor.submit(run_file, invoke, f), files, workers * 4):
+            yield future.result()
+
+class _Discovery:
+    """Counts files as the enumerator yields them and queues them for the journal."""
+
+    def __init__(self, task: ProgressTask, journal: Optional[BatchJournal]):
+        self.task = task
+        self.journal = journal
+        self.found = 0
+        self.skipped = 0
+
+    def track(self, files: Iterable[str], done: Set[str]) -> Iterator[str]:
+        unsaved: List[str] = []
+        for file_path in files:
+            if done and os.path.abspath(file_path) in done:
+                self.skipped += 1
+                continue
+            self.found += 1
+            self.task.update(label=f"Discovering ({self.found} found)")
+            if self.journal:
+                unsaved.append(file_path)
+                if len(unsaved) >= 500:
+                    self.journal.add(unsaved)
+                    unsaved = []
+            yield file_path
+        if self.journal and unsaved:
+            self.journal.add(unsaved)
+        # Enumeration finished: the bar can now show real progress
+        self.task.update(total=self.found, label="Processing")
+
+def run_glob(ctx: click.Context, callback: Callable, kwargs: Dict[str, Any], pattern: str, parallel: bool = False,
+             workers: int = 1, executor: str = "auto", use_cache: bool = False,
+             journal_path: Optional[str] = None, resume: bool = False):
+    """
+    Run a batch_process command over every file matching `pattern`.
+
+    Files are enumerated lazily and fed to the executor through a bounded
+    window, so work starts as soon as the first file is found and memory does
+    not grow with the size of the tree.
+    """
+    def invoke(file_path: str) -> bool:
+        return invoke_file(ctx, callback, {**kwargs, "input_file": file_path}, use_cache)
+
+    files = iter_glob(pattern)
+    head = list(itertools.islice(files, 2))
+    if not head:
+        console.print(f"[yellow]No files matched pattern: {pattern}[/yellow]")
+        return
+    files = itertools.chain(head, files)
+
+    journal = None
+    done: Set[str] = set()
+    if journal_path:
+        try:
+            journal = BatchJournal(journal_path)
+            journal.begin(" ".join(command_path(ctx)), pattern)
+        except (JournalError, sqlite3.Error) as e:
+            raise click.ClickException(f"Cannot use journal: {e}")
+        if resume:
+            done = journal.completed()
+
+    task = None
+    if parallel:
+        executor = choose_executor(executor, command_path(ctx), len(head), workers,
+                                   getattr(callback, "batch_engines", ()))
+        task = make_task(ctx, kwargs, use_cache) if executor == "process" else None
+        if executor == "process" and task is None:
+            console.print("[yellow]Arguments cannot be sent to worker processes; using threads.[/yellow]")
+            executor = "thread"
+        console.print(f"[cyan]Batch processing {pattern} (Parallel: {parallel}, executor: {executor})...[/cyan]")
+    else:
+        console.print(f"[cyan]Batch processing {pattern} (Parallel: {parallel})...[/cyan]")
+
+    success_count = cached_count = processed = 0
+    try:
+        with event_bus.task("Discovering", unit="files") as progress:
+            discovery = _Discovery(progress, journal)
+            queued = discovery.track(files, done)
+            if not parallel:
+                results = run_sequential(invoke, queued)
+            elif executor == "process":
+                results = run_in_processes(task, queued, workers)
+            else:
+                # We use ctx.invoke but in a thread-safe-ish way for basic operations
+                results = run_in_threads(invoke, queued, workers)
+
+            for result in results:
+                processed += 1
+                if journal:
+                    journal.record(result.input_file, result.ok, result.duration, result.cached, result.error)
+                if result.ok:
+                    success_count += 1
+                    cached_count += result.cached
+                else:
+                    console.print(f"[red]Error processing {result.input_file}: {result.error}[/red]")
+                progress.item(result.input_file, ok=result.ok, cached=result.cached,
+                              duration=result.duration, error=result.error)
+    finally:
+        if journal:
+            journal.finish()
+            journal.close()
+
+    if discovery.skipped:
+        console.print(f"[cyan]Resumed: {discovery.skipped} files were already done.[/cyan]")
+    cached_note = f" ({cached_count} from cache)" if use_cache else ""
+    console.print(f"[green]✓ Batch processing complete: {success_count}/{processed} successful{cached_note}.[/green]")
+    if journal:
+        console.print(f"[dim]Journal: {journal_path} (see `toolbox batch report {journal_path}`)[/dim]")
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from toolbox.core.config import config_manager
+
+CACHE_DIR = Path.home() / ".toolbox" / "cache"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    command TEXT,
+    blobs TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+CREATE TABLE IF NOT EXISTS digests (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_key(**parts: Any) -> str:
+    """Stable key for a JSON-serialisable description of a unit of work."""
+    blob = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    Content-addressed store of command outputs.
+
+    Entries map a key (input content hash, normalized parameters and tool
+    versions) to the output files a command produced. Output files are kept
+    once per content hash under `blobs/` and materialized by hardlink, or by
+    copy across filesystems. The SQLite index tracks sizes and last use so
+    the store can be trimmed least-recently-used first, and memoizes input
+    hashes by (size, mtime, inode) so unchanged inputs are not re-read.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or CACHE_DIR
+        self._max_bytes = max_bytes
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return config_manager.settings.result_cache_max_mb * 1024 * 1024
+
+    @property
+    def db_path(self) -> Path:
+        return self.directory / "index.db"
+
+    @property
+    def blob_dir(self) -> Path:
+        return self.directory / "blobs"
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Process-pool workers share the index, so wait for their locks
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, amount: int = 1):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def file_digest(self, path: str) -> str:
+        """SHA-256 of a file, reusing the stored digest while size, mtime and inode are unchanged."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._db() as conn:
+            row = conn.execute(
+                "SELECT digest FROM digests WHERE path = ? AND size = ? AND mtime_ns = ? AND ino = ?",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino),
+            ).fetchone()
+        if row:
+            return row[0]
+
+        digest = hash_file(path)
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO digests (path, size, mtime_ns, ino, digest) VALUES (?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, digest),
+            )
+        return digest
+
+    def lookup(self, key: str) -> Optional[List[Path]]:
+        """Blob paths stored under `key`, or None on a miss or if a blob was modified."""
+        with self._db() as conn:
+            row = conn.execute("SELECT blobs FROM entries WHERE key = ?", (key,)).fetchone()
+            blobs = [] if row else None
+            for digest, size, mtime_ns in json.loads(row[0]) if row else []:
+                path = self._blob_path(digest)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    st = None
+                # A hardlinked output edited in place also changes the blob
+                if st is None or (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    if st is not None:
+                        path.unlink()
+                    blobs = None
+                    break
+                blobs.append(path)
+
+            if blobs is None:
+                self._bump(conn, "misses")
+                return None
+            conn.execute("UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+            self._bump(conn, "hits")
+            return blobs
+
+    def store(self, key: str, outputs: Sequence[str], command: Optional[str] = None):
+        """Record `outputs` (in order) as the result for `key`, then trim the store to its size limit."""
+        blobs = []
+        for output in outputs:
+            digest = hash_file(output)
+            blob = self._blob_path(digest)
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                self._link_or_copy(Path(output), blob)
+            st = os.stat(blob)
+            blobs.append([digest, st.st_size, st.st_mtime_ns])
+
+        now = time.time()
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, command, blobs, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, command, json.dumps(blobs), sum(size for _, size, _ in blobs), now, now),
+            )
+        self.prune(self.max_bytes)
+
+    @staticmethod
+    def _link_or_copy(src: Path, dest: Path):
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.link(src, tmp)
+        except OSError:
+            # Different filesystem, or links unsupported
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+
+    def materialize(self, blobs: Sequence[Path], outputs: Sequence[str]):
+        for blob, output in zip(blobs, outputs):
+            dest = Path(output)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            self._link_or_copy(blob, dest)
+
+    def prune(self, max_bytes: Optional[int] = None, older_than: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Drop entries unused for `older_than` seconds, then least-recently-used
+        entries until the store fits in `max_bytes`. Returns (entries, bytes) removed.
+        """
+        removed, freed = 0, 0
+        with self._db() as conn:
+            if older_than is not None:
+                cutoff = time.time() - older_than
+                row = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE last_used < ?", (cutoff,)).fetchone()
+                conn.execute("DELETE FROM entries WHERE last_used < ?", (cutoff,))
+                removed, freed = removed + row[0], freed + row[1]
+
+            if max_bytes is not None:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > max_bytes:
+                    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+                        if total <= max_bytes:
+                            break
+                        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        total -= size
+                        removed, freed = removed + 1, freed + size
+
+            live = set()
+            if removed:
+                for (blobs,) in conn.execute("SELECT blobs FROM entries"):
+                    live.update(digest for digest, _, _ in json.loads(blobs))
+
+        if removed:
+            self._collect_blobs(live)
+        return removed, freed
+
+    def _collect_blobs(self, live: set):
+        """Delete blobs no entry refers to any more."""
+        if not self.blob_dir.exists():
+            return
+        for blob in self.blob_dir.glob("*/*"):
+            if blob.name not in live and not blob.name.startswith("."):
+                try:
+                    blob.unlink()
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._db() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM digests")
+            conn.execute("DELETE FROM counters")
+        shutil.rmtree(self.blob_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._db() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            commands = conn.execute(
+                "SELECT command, COUNT(*), SUM(size), SUM(hits) FROM entries GROUP BY command ORDER BY command"
+            ).fetchall()
+        return {
+            "entries": entries,
+            "size": size,
+            "max_size": self.max_bytes,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "commands": [
+                {"command": command, "entries": count, "size": total, "hits": hits}
+                for command, count, total, hits in commands
+            ],
+        }
+
+result_cache = ResultCache()
@@ -1,7 +1,7 @@
 import os
 import yaml
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 class ToolBoxConfig(BaseModel):
@@ -15,6 +15,16 @@ class ToolBoxConfig(BaseModel):
     plugins_dir: Optional[str] = Field(default=None)
     global_bin_path: Optional[str] = Field(default=None)
     engine_paths: Dict[str, str] = Field(default_factory=dict)
+    result_cache: bool = Field(default=False)
+    result_cache_max_mb: int = Field(default=2048)
+    ocr_cache: bool = Field(default=True)
+    ocr_cache_max_mb: int = Field(default=256)
+    ocr_use_tesserocr: bool = Field(default=True)
+    engine_limits: Dict[str, int] = Field(default_factory=dict)
+    engine_limits_scope: Literal["process", "machine"] = Field(default="process")
+    admission_min_free_mb: int = Field(default=512)
+    admission_max_load: float = Field(default=2.0)
+    server_preload: List[str] = Field(default_factory=list)
 
 class ConfigManager:
     def __init__(self, config_path: Optional[Path] = None):
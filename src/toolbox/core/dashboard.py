@@ -13,8 +13,6 @@ app = FastAPI(title="ToolBox Dashboard") if FastAPI is not None else None
 def _ensure_plugins_loaded() -> None:
     from toolbox.core.plugin import plugin_manager
 
-    if plugin_manager.plugins:
-        return
     plugin_manager.load_plugins()
 
 
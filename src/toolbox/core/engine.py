@@ -5,51 +5,39 @@ import os
 import re
 import time
 import functools
+import hashlib
 import json
+import threading
+import contextlib
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict, Any
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 from rich.console import Console
-from rich.progress import Progress, TextColumn, BarColumn, TaskProgressColumn, TimeRemainingColumn
 from toolbox.core.config import config_manager
+from toolbox.core.events import event_bus
+from toolbox.core.limits import EngineLimiter
+from toolbox.core.metrics import metrics_store
 
 console = Console()
 
-# Self-Optimizing JIT Metrics
-PERFORMANCE_LOG = Path("bin/performance_metrics.json")
-
 def profile_engine(func):
-    """Decorator to profile engine performance and store heuristics."""
+    """Decorator to record engine run durations in the append-only metrics store."""
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         start_time = time.perf_counter()
-        result = func(self, *args, **kwargs)
-        end_time = time.perf_counter()
-        duration = end_time - start_time
-        
-        # Store metric
-        metrics = {}
-        if PERFORMANCE_LOG.exists():
+        ok = False
+        try:
+            result = func(self, *args, **kwargs)
+            ok = True
+            return result
+        finally:
+            duration = time.perf_counter() - start_time
+            engine_args = args[0] if args else kwargs.get("args", [])
             try:
-                metrics = json.loads(PERFORMANCE_LOG.read_text())
-            except Exception: pass
-        
-        engine_name = self.name.lower()
-        if engine_name not in metrics:
-            metrics[engine_name] = []
-        
-        metrics[engine_name].append({
-            "timestamp": time.time(),
-            "duration": duration,
-            "args_count": len(args[0]) if args else 0
-        })
-        
-        # Keep only last 50 metrics per engine
-        metrics[engine_name] = metrics[engine_name][-50:]
-        
-        PERFORMANCE_LOG.parent.mkdir(parents=True, exist_ok=True)
-        PERFORMANCE_LOG.write_text(json.dumps(metrics))
-        
-        return result
+                metrics_store.record(self.name.lower(), duration, engine_args, ok=ok)
+            except Exception:
+                # Telemetry must never break the actual engine call
+                pass
     return wrapper
 
 def get_bundled_bin_path() -> Optional[Path]:
@@ -68,10 +56,334 @@ class EngineError(Exception):
     """Base class for engine related errors."""
     pass
 
+ENGINE_CACHE_PATH = Path.home() / ".toolbox" / "engine_cache.json"
+ENGINE_CACHE_VERSION = 2
+PROBE_TIMEOUT = 15
+
+class EngineCache:
+    """
+    Persistent record of resolved engine binaries in ~/.toolbox.
+
+    Each entry holds the resolved path (None when the engine was not found),
+    the binary's mtime and size, and any version and capability information
+    probed so far. The whole cache is dropped when the search environment
+    changes: PATH, the configured engine paths, or the contents of any
+    searched directory (a directory's mtime changes whenever a binary is
+    added to or removed from it). Single entries are dropped when their
+    binary's mtime or size changes.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self.cache_path = cache_path or ENGINE_CACHE_PATH
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._key: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def search_dirs() -> List[str]:
+        """Every directory engine discovery looks in, in search order."""
+        dirs = []
+        global_bin = config_manager.settings.global_bin_path
+        if global_bin:
+            dirs.append(global_bin)
+        bin_dir = get_bundled_bin_path()
+        if bin_dir:
+            dirs.append(str(bin_dir))
+        dirs.extend(d for d in os.environ.get("PATH", "").split(os.pathsep) if d)
+        return dirs
+
+    def environment_key(self) -> str:
+        digest = hashlib.sha256()
+        digest.update(os.environ.get("PATH", "").encode("utf-8", "surrogateescape"))
+        digest.update(json.dumps(config_manager.settings.engine_paths, sort_keys=True).encode())
+        for directory in self.search_dirs():
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime = None
+            digest.update(f"\0{directory}\0{mtime}".encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _stat(path: str) -> Optional[List[int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is not None:
+            return self._entries
+
+        self._key = self.environment_key()
+        self._entries = {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == ENGINE_CACHE_VERSION and data.get("key") == self._key:
+                self._entries = data.get("engines", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return self._entries
+
+    def _save(self):
+        data = {"version": ENGINE_CACHE_VERSION, "key": self._key, "engines": self._entries}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # The cache is an optimisation; a read-only home must not break engines
+            pass
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for an engine, or None if it is missing or stale."""
+        with self._lock:
+            entry = self._load().get(name)
+        if entry is None:
+            return None
+        if entry.get("path") is not None and self._stat(entry["path"]) != entry.get("stat"):
+            return None
+        return entry
+
+    def update(self, name: str, **fields) -> Dict[str, Any]:
+        """Merge `fields` into an engine's entry and persist the cache."""
+        with self._lock:
+            entries = self._load()
+            entry = dict(entries.get(name, {}))
+            path = fields.get("path", entry.get("path"))
+            stat = self._stat(path) if path else None
+            if path != entry.get("path") or stat != entry.get("stat"):
+                # A different or replaced binary: whatever was probed before no longer applies
+                entry = {}
+            entry.update(fields)
+            entry["stat"] = stat
+            entries[name] = entry
+            self._save()
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries = None
+            try:
+                self.cache_path.unlink()
+            except OSError:
+                pass
+
+engine_cache = EngineCache()
+
+STREAM_CHUNK_SIZE = 1 << 16
+STDERR_TAIL_LINES = 20
+
+class EngineProcess:
+    """
+    Handle to an engine started with `BaseEngine.stream`.
+
+    Data moves through the pipes in chunks of at most `chunk_size` bytes on
+    background threads, so memory stays bounded however much flows through.
+    Paths and real files are handed to the child directly and never pass
+    through Python. When stdout is not redirected it is read incrementally
+    with `read()` or `iter_chunks()`; it must be drained, or the engine
+    blocks once the pipe is full. `wait()` joins the pipe threads, releases
+    the engine's concurrency slot (if the handle took one) and raises
+    EngineError on failure.
+    """
+
+    def __init__(self, engine: "BaseEngine", command: List[str], stdin: Any = None, stdout: Any = None,
+                 stderr: Any = None, chunk_size: int = STREAM_CHUNK_SIZE, acquire: bool = True):
+        self.engine = engine
+        self.command = command
+        self.chunk_size = chunk_size
+        self.returncode: Optional[int] = None
+        self.stderr_tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        self._threads: List[threading.Thread] = []
+        self._errors: List[BaseException] = []
+        self._stack = contextlib.ExitStack()
+        self._started = time.perf_counter()
+
+        if acquire:
+            self._stack.enter_context(engine.slot())
+        try:
+            stdin_arg, feed = self._source(stdin)
+            stdout_arg, stdout_sink = self._target(stdout, subprocess.PIPE)
+            # Callables receive stderr as decoded lines (progress, diagnostics); files get the raw bytes
+            stderr_lines = stderr if callable(stderr) else None
+            stderr_sink = None if stderr is None or stderr_lines else self._target(stderr, None)[1]
+            self.process = subprocess.Popen(
+                command, stdin=stdin_arg, stdout=stdout_arg, stderr=subprocess.PIPE, bufsize=0,
+            )
+        except BaseException as e:
+            self._stack.close()
+            if isinstance(e, OSError):
+                raise EngineError(f"Failed to execute {engine.name}: {e}") from e
+            raise
+
+        if feed is not None:
+            self._spawn(self._feed, feed)
+        if stdout_arg is subprocess.PIPE and stdout_sink is not None:
+            self._spawn(self._pump, self.process.stdout, stdout_sink)
+        self._spawn(self._pump_stderr, stderr_sink, stderr_lines)
+
+    def _source(self, source: Any) -> Tuple[Any, Any]:
+        """Popen stdin argument plus the chunks to feed into the pipe, if any."""
+        if source is None:
+            return subprocess.DEVNULL, None
+        if isinstance(source, (str, os.PathLike)):
+            return self._stack.enter_context(open(source, "rb")), None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return subprocess.PIPE, [source]
+        if hasattr(source, "read"):
+            try:
+                source.fileno()
+                return source, None
+            except (OSError, ValueError, AttributeError):
+                return subprocess.PIPE, iter(lambda: source.read(self.chunk_size), b"")
+        # Any other iterable of bytes, e.g. a generator of raw frames
+        return subprocess.PIPE, source
+
+    def _target(self, target: Any, default: Any) -> Tuple[Any, Optional[Callable[[bytes], Any]]]:
+        """Popen argument for an output plus the callable that receives its chunks, if any."""
+        if target is None:
+            return default, None
+        if isinstance(target, (str, os.PathLike)):
+            f = self._stack.enter_context(open(target, "wb"))
+            return f, f.write
+        if callable(target):
+            return subprocess.PIPE, target
+        try:
+            target.fileno()
+            target.flush()
+            return target, target.write
+        except (OSError, ValueError, AttributeError):
+            return subprocess.PIPE, target.write
+
+    def _spawn(self, func: Callable, *args):
+        thread = threading.Thread(target=func, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _fail(self, error: BaseException):
+        # A sink or source that raises would otherwise leave the engine blocked on a pipe
+        self._errors.append(error)
+        self.kill()
+
+    def _feed(self, chunks: Iterable[bytes]):
+        try:
+            for chunk in chunks:
+                self.process.stdin.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # The engine stopped reading; its exit status tells the rest
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+
+    def _pump(self, stream, sink: Callable[[bytes], Any]):
+        try:
+            for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                sink(chunk)
+        except BaseException as e:
+            self._fail(e)
+
+    def _pump_stderr(self, sink: Optional[Callable[[bytes], Any]], lines: Optional[Callable[[str], Any]]):
+        try:
+            for raw in iter(lambda: self.process.stderr.readline(self.chunk_size), b""):
+                line = raw.decode("utf-8", errors="replace")
+                self.stderr_tail.append(line)
+                if sink is not None:
+                    sink(raw)
+                if lines is not None:
+                    lines(line)
+        except BaseException as e:
+            self._fail(e)
+
+    @property
+    def stdout(self):
+        """The engine's stdout pipe, or None when stdout was redirected."""
+        return self.process.stdout
+
+    def read(self, size: int = -1) -> bytes:
+        if self.process.stdout is None:
+            raise EngineError("stdout was redirected and cannot be read from the handle")
+        if size < 0:
+            return self.process.stdout.read()
+        return self.process.stdout.read(size)
+
+    def iter_chunks(self, size: Optional[int] = None) -> Iterator[bytes]:
+        size = size or self.chunk_size
+        return iter(lambda: self.read(size), b"")
+
+    def poll(self) -> Optional[int]:
+        return self.process.poll()
+
+    def kill(self):
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+
+    def wait(self, timeout: Optional[float] = None, check: bool = True) -> int:
+        """Wait for the engine to exit and return its exit code."""
+        if self.returncode is None:
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                raise EngineError(f"{self.engine.name} did not finish within {timeout}s") from None
+            for thread in self._threads:
+                thread.join()
+            for pipe in (self.process.stdout, self.process.stderr):
+                if pipe is not None:
+                    pipe.close()
+            self._stack.close()
+            self.returncode = self.process.returncode
+            try:
+                metrics_store.record(self.engine.name.lower(), time.perf_counter() - self._started,
+                                     self.command[1:], ok=self.returncode == 0 and not self._errors)
+            except Exception:
+                # Telemetry must never break the actual engine call
+                pass
+
+        if self._errors:
+            raise self._errors[0]
+        if check and self.returncode != 0:
+            error_msg = "".join(self.stderr_tail)
+            raise EngineError(f"{self.engine.name} failed with exit code {self.returncode}\n{error_msg}")
+        return self.returncode
+
+    def __enter__(self) -> "EngineProcess":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.kill()
+            try:
+                self.wait(check=False)
+            except Exception:
+                # Keep the original exception
+                pass
+        else:
+            self.wait()
+
 class BaseEngine:
-    def __init__(self, name: str, binary_name: str):
+    # Binary names tried after `binary_name`, in order
+    alt_binaries: List[str] = []
+    # Install locations checked last on Windows, where installers rarely touch PATH
+    common_paths: List[str] = []
+    # Arguments that make the binary print its version and exit
+    version_args: List[str] = ["--version"]
+
+    def __init__(self, name: str, binary_name: str, cache: Optional[EngineCache] = None):
         self.name = name
         self.binary_name = binary_name
+        self.cache = cache or engine_cache
+        self.limiter: Optional[EngineLimiter] = None
         self._path: Optional[str] = None
         self.verbose = False
         self.use_gpu = False
@@ -84,9 +396,13 @@ class BaseEngine:
     def is_available(self) -> bool:
         return self.path is not None
 
+    @property
+    def binary_names(self) -> List[str]:
+        return [self.binary_name, *self.alt_binaries]
+
     @property
     def path(self) -> Optional[str]:
-        """Find the path to the engine binary by checking config, bundle, and system PATH."""
+        """Find the path to the engine binary, consulting the engine cache before searching."""
         if self._path is not None:
             return self._path
 
@@ -96,35 +412,136 @@ class BaseEngine:
             self._path = config_path
             return self._path
 
-        # 2. Check global bin path from config
+        # 2. Reuse the result of a previous search while the environment is unchanged
+        entry = self.cache.get(self.name.lower())
+        if entry is not None:
+            self._path = entry.get("path")
+            return self._path
+
+        self._path = self._discover()
+        self.cache.update(self.name.lower(), path=self._path)
+        return self._path
+
+    def _discover(self) -> Optional[str]:
+        """Search the global bin, the bundled bin, the system PATH and common install locations."""
+        # 1. Check global bin path from config
         global_bin = config_manager.settings.global_bin_path
         if global_bin and os.path.exists(global_bin):
             found_path = self._search_in_directory(Path(global_bin))
             if found_path:
-                self._path = str(found_path)
-                return self._path
+                return str(found_path)
 
-        # 3. Check bundled binaries
+        # 2. Check bundled binaries
         bin_dir = get_bundled_bin_path()
         if bin_dir:
             found_path = self._search_in_directory(bin_dir)
             if found_path:
-                self._path = str(found_path)
-                return self._path
-        
-        # 4. Check system PATH
-        self._path = shutil.which(self.binary_name)
-        return self._path
+                return str(found_path)
+
+        # 3. Check system PATH
+        for binary in self.binary_names:
+            found = shutil.which(binary)
+            if found:
+                return found
+
+        # 4. Check common installation paths
+        if os.name == "nt":
+            for candidate in self.common_paths:
+                if os.path.exists(candidate):
+                    return candidate
+        return None
 
     def _search_in_directory(self, directory: Path) -> Optional[Path]:
         """Search for the binary in a specific directory with platform-specific extensions."""
         exts = [".exe", ""] if os.name == "nt" else [""]
-        for ext in exts:
-            binary_path = directory / f"{self.binary_name}{ext}"
-            if binary_path.exists():
-                return binary_path
+        for binary in self.binary_names:
+            for ext in exts:
+                binary_path = directory / f"{binary}{ext}"
+                if binary_path.exists():
+                    return binary_path
         return None
 
+    def probe(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Version and capabilities of the resolved binary.
+
+        Served from the engine cache; the binary is only spawned when nothing
+        has been probed for this exact binary yet, or when `refresh` is set.
+        """
+        if not self.is_available:
+            return {}
+        entry = self.cache.get(self.name.lower())
+        if not refresh and entry is not None and entry.get("path") == self.path and "version" in entry:
+            return entry
+        return self.cache.update(
+            self.name.lower(),
+            path=self.path,
+            version=self._probe_version(),
+            capabilities=self._probe_capabilities(),
+        )
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.probe().get("version")
+
+    def has_capability(self, kind: str, name: str) -> bool:
+        """Check a probed capability, e.g. `has_capability("encoders", "libx264")`."""
+        return name in self.probe().get("capabilities", {}).get(kind, [])
+
+    def _probe_output(self, args: List[str]) -> str:
+        try:
+            result = subprocess.run(
+                [self.path] + args, capture_output=True, text=True,
+                errors="replace", timeout=PROBE_TIMEOUT,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return ""
+        # Some tools (pdftotext, old tesseract) print this information to stderr
+        return result.stdout or result.stderr
+
+    def _probe_version(self) -> Optional[str]:
+        for line in self._probe_output(self.version_args).splitlines():
+            line = line.strip()
+            if line:
+                match = re.search(r"\d+(?:\.\d+)+\S*", line)
+                return match.group(0) if match else line
+        return None
+
+    def _probe_capabilities(self) -> Dict[str, List[str]]:
+        return {}
+
+    def slot(self):
+        """Concurrency slot for one run of this engine; a no-op outside a registry."""
+        if self.limiter is None:
+            return contextlib.nullcontext()
+        return self.limiter.slot(self.name.lower())
+
+    def stream(self, args: List[str], stdin: Any = None, stdout: Any = None, stderr: Any = None,
+               chunk_size: int = STREAM_CHUNK_SIZE, acquire: bool = True) -> EngineProcess:
+        """
+        Start the engine with binary pipes and return a handle without waiting.
+
+        `stdin` may be bytes, an iterable of byte chunks, a binary file object
+        or a path. `stdout` and `stderr` may be a path, a binary file object or
+        a callable; stdout callables receive byte chunks, stderr callables
+        decoded lines. Leave `stdout` unset to read it from the handle.
+
+        The handle holds one of the engine's concurrency slots until it is
+        waited for. Pipelines that connect several processes of the same
+        engine must hold a single `slot()` around all of them and pass
+        `acquire=False`: with a limit of 1, a second slot would wait for a
+        first process that is itself blocked on a full pipe.
+        """
+        if not self.is_available:
+            hint = self.get_install_hint()
+            raise EngineError(f"Engine '{self.name}' ({self.binary_name}) not found.\nHint: {hint}")
+
+        full_command = [self.path] + args
+        if self.verbose:
+            console.print(f"[dim]Streaming: {' '.join(full_command)}[/dim]")
+        return EngineProcess(self, full_command, stdin=stdin, stdout=stdout, stderr=stderr, chunk_size=chunk_size,
+                             acquire=acquire)
+
     @profile_engine
     def run(self, args: List[str], check: bool = True) -> subprocess.CompletedProcess:
         if not self.is_available:
@@ -139,7 +556,8 @@ class BaseEngine:
             # Use shell=True on Windows for better binary discovery if needed, 
             # but generally not recommended for security unless necessary.
             # Here we use the direct path found by shutil.which.
-            result = subprocess.run(full_command, capture_output=True, text=True, check=check)
+            with self.slot():
+                result = subprocess.run(full_command, capture_output=True, text=True, check=check)
             
             if self.verbose and result.stdout:
                 console.print(f"[dim]Output:\n{result.stdout}[/dim]")
@@ -154,175 +572,203 @@ class BaseEngine:
             raise EngineError(f"Failed to execute {self.name}") from e
 
 class FFmpegEngine(BaseEngine):
+    version_args = ["-version"]
+
     def __init__(self):
         super().__init__("FFmpeg", "ffmpeg")
 
     def get_install_hint(self) -> str:
         return "Download from ffmpeg.org and add to PATH, or place 'ffmpeg.exe' in 'bin/'."
 
+    def _probe_capabilities(self) -> Dict[str, List[str]]:
+        encoders = []
+        listing = False
+        for line in self._probe_output(["-hide_banner", "-encoders"]).splitlines():
+            # Codec rows follow the " ------" separator under the flag legend
+            if line.strip() == "------":
+                listing = True
+            elif listing and len(line.split()) >= 2:
+                encoders.append(line.split()[1])
+
+        filters = []
+        for line in self._probe_output(["-hide_banner", "-filters"]).splitlines():
+            parts = line.split()
+            # Filter rows look like " TSC scale  V->V  Scale the input video size..."
+            if len(parts) >= 3 and "->" in parts[2]:
+                filters.append(parts[1])
+
+        hwaccels = [
+            line.strip() for line in self._probe_output(["-hide_banner", "-hwaccels"]).splitlines()[1:]
+            if line.strip()
+        ]
+        # One bitstream filter per line under a "Bitstream filters:" heading
+        bsfs = [
+            line.strip() for line in self._probe_output(["-hide_banner", "-bsfs"]).splitlines()[1:]
+            if line.strip()
+        ]
+        return {"encoders": encoders, "filters": filters, "hwaccels": hwaccels, "bsfs": bsfs}
+
     def run_with_progress(self, args: List[str], label: str = "Processing") -> subprocess.CompletedProcess:
-        """Run FFmpeg with a progress bar."""
+        """
+        Run FFmpeg and publish its progress on the event bus.
+
+        Progress comes from FFmpeg's machine-readable `-progress pipe:1`
+        output (one key=value block per update) rather than from parsing every
+        stderr line; stderr is only scanned for the input duration. The
+        output therefore must not be written to stdout; use `stream` for that.
+        Unless `args` say otherwise, an existing output is replaced only when
+        the `auto_overwrite` setting is on.
+        """
         if not self.is_available:
             hint = self.get_install_hint()
             raise EngineError(f"Engine 'FFmpeg' not found.\nHint: {hint}")
 
-        # Add -progress - to get machine-readable output on stdout
-        # But we also need to keep the original args.
-        # It's better to parse stderr for 'time=' if we don't want to mess with stdout.
-        full_command = [self.path] + args
-        
-        if self.verbose:
-            console.print(f"[dim]Running with progress: {' '.join(full_command)}[/dim]")
-
-        duration = None
-        duration_re = re.compile(r"Duration: (\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-        time_re = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-
-        def to_seconds(h, m, s, ms):
-            return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 100
-
-        with Progress(
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            TimeRemainingColumn(),
-            console=console,
-        ) as progress:
-            task = progress.add_task(label, total=100)
-            
-            # Use Popen to read stderr line by line
-            process = subprocess.Popen(
-                full_command,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='replace'
-            )
+        duration_re = re.compile(r"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+        task = event_bus.task(label, total=self._input_duration(args), unit="s")
+        buffered = bytearray()
+        block: Dict[str, str] = {}
+        # stderr and stdout are pumped on separate threads
+        lock = threading.Lock()
+
+        def on_stderr(line: str):
+            if task.total is None and "Duration:" in line:
+                match = duration_re.search(line)
+                if match:
+                    h, m, sec = match.groups()
+                    # Progress may already have arrived on stdout; republish it against the total
+                    with lock:
+                        task.update(total=int(h) * 3600 + int(m) * 60 + float(sec), completed=task.completed)
+
+        def on_progress(chunk: bytes):
+            buffered.extend(chunk)
+            *lines, rest = buffered.split(b"\n")
+            buffered[:] = rest
+            for raw in lines:
+                key, _, value = raw.decode("ascii", errors="replace").strip().partition("=")
+                block[key] = value
+                if key != "progress":
+                    continue
+                # out_time_us is "N/A" until the first frame is written
+                out_us = block.get("out_time_us", "")
+                with lock:
+                    position = int(out_us) / 1_000_000 if out_us.lstrip("-").isdigit() else task.completed
+                    task.update(completed=max(0.0, position), speed=block.get("speed"), fps=block.get("fps"))
+                block.clear()
+
+        # stdin is not the terminal, so FFmpeg cannot ask before replacing an existing output
+        overwrite = [] if "-y" in args or "-n" in args else ["-y" if config_manager.settings.auto_overwrite else "-n"]
+        with task:
+            proc = self.stream([*overwrite, "-progress", "pipe:1", "-nostats", *args], stdout=on_progress, stderr=on_stderr)
+            proc.wait()
+            if task.total is not None:
+                task.update(completed=task.total)
+
+        return subprocess.CompletedProcess(
+            args=proc.command, returncode=proc.returncode, stdout="", stderr="".join(proc.stderr_tail),
+        )
+
+    @staticmethod
+    def _input_duration(args: List[str]) -> Optional[float]:
+        try:
+            source = args[args.index("-i") + 1]
+        except (ValueError, IndexError):
+            return None
+        if not os.path.isfile(source) or not engine_registry.get("ffprobe").is_available:
+            return None
+        from toolbox.core import media
+        try:
+            return media.probe(source).duration
+        except (EngineError, OSError):
+            return None
 
-            stdout_content = []
-            stderr_content = []
-
-            # FFmpeg writes progress info to stderr
-            while True:
-                line = process.stderr.readline()
-                if not line and process.poll() is not None:
-                    break
-                
-                if line:
-                    stderr_content.append(line)
-                    # Parse duration
-                    if duration is None:
-                        match = duration_re.search(line)
-                        if match:
-                            duration = to_seconds(*match.groups())
-                    
-                    # Parse current time
-                    match = time_re.search(line)
-                    if match and duration:
-                        current_time = to_seconds(*match.groups())
-                        percent = min(100, (current_time / duration) * 100)
-                        progress.update(task, completed=percent)
-
-            process.wait()
-            
-            if process.returncode != 0:
-                error_msg = "".join(stderr_content[-10:]) # last 10 lines
-                raise EngineError(f"FFmpeg failed with exit code {process.returncode}\n{error_msg}")
-
-            return subprocess.CompletedProcess(
-                args=full_command,
-                returncode=process.returncode,
-                stdout="".join(stdout_content),
-                stderr="".join(stderr_content)
-            )
+class FFprobeEngine(BaseEngine):
+    version_args = ["-version"]
+
+    def __init__(self):
+        super().__init__("FFprobe", "ffprobe")
+
+    def get_install_hint(self) -> str:
+        return "FFprobe ships with FFmpeg: download from ffmpeg.org and add to PATH, or place 'ffprobe.exe' in 'bin/'."
+
+    def _discover(self) -> Optional[str]:
+        found = super()._discover()
+        if found:
+            return found
+        # A configured FFmpeg build almost always has ffprobe next to it
+        ffmpeg_path = config_manager.settings.engine_paths.get("ffmpeg")
+        if ffmpeg_path:
+            sibling = self._search_in_directory(Path(ffmpeg_path).parent)
+            if sibling:
+                return str(sibling)
+        return None
 
 class ImageMagickEngine(BaseEngine):
+    # ImageMagick 7 ships 'magick'; older installs on Linux only have 'convert'
+    alt_binaries = ["convert"]
+    version_args = ["-version"]
+
     def __init__(self):
-        # On Windows it's often 'magick', on Linux 'convert' or 'magick'
-        binary = "magick" if shutil.which("magick") else "convert"
-        super().__init__("ImageMagick", binary)
+        super().__init__("ImageMagick", "magick")
 
     def get_install_hint(self) -> str:
         return "Install from imagemagick.org. Ensure 'magick' or 'convert' is in PATH."
 
 class PopplerEngine(BaseEngine):
+    # Common Windows installation paths (if extracted to C:\poppler or similar)
+    common_paths = [
+        r"C:\poppler\bin\pdftotext.exe",
+        r"C:\Program Files\poppler\bin\pdftotext.exe",
+        r"C:\Program Files (x86)\poppler\bin\pdftotext.exe",
+    ]
+    version_args = ["-v"]
+
     def __init__(self):
         super().__init__("Poppler", "pdftotext") # Using pdftotext as a probe
 
     def get_install_hint(self) -> str:
         return "Install Poppler (via conda, brew, or download for Windows) and add 'bin/' to PATH."
 
-    @property
-    def path(self) -> Optional[str]:
-        if self._path is None:
-            self._path = shutil.which(self.binary_name)
-            # Common Windows installation paths (if extracted to C:\poppler or similar)
-            if self._path is None and shutil.os.name == "nt":
-                common_paths = [
-                    r"C:\poppler\bin\pdftotext.exe",
-                    r"C:\Program Files\poppler\bin\pdftotext.exe",
-                    r"C:\Program Files (x86)\poppler\bin\pdftotext.exe"
-                ]
-                for p in common_paths:
-                    if shutil.os.path.exists(p):
-                        self._path = p
-                        break
-        return self._path
-
 class TesseractEngine(BaseEngine):
+    common_paths = [r"C:\Program Files\Tesseract-OCR\tesseract.exe"]
+
     def __init__(self):
         super().__init__("Tesseract", "tesseract")
 
     def get_install_hint(self) -> str:
         return "Install Tesseract-OCR from GitHub/UB-Mannheim and add to PATH."
 
-    @property
-    def path(self) -> Optional[str]:
-        if self._path is None:
-            self._path = shutil.which(self.binary_name)
-            # Common Windows installation path
-            if self._path is None and shutil.os.name == "nt":
-                common_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-                if shutil.os.path.exists(common_path):
-                    self._path = common_path
-        return self._path
+    def _probe_capabilities(self) -> Dict[str, List[str]]:
+        # First line is 'List of available languages in "<tessdata>" (N):'
+        lines = self._probe_output(["--list-langs"]).splitlines()
+        return {"languages": [line.strip() for line in lines if line.strip() and not line.startswith("List of")]}
 
 class LibreOfficeEngine(BaseEngine):
+    alt_binaries = ["libreoffice"]
+    # LibreOffice usually installs to C:\Program Files\LibreOffice\program\soffice.exe
+    common_paths = [
+        r"C:\Program Files\LibreOffice\program\soffice.exe",
+        r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+    ]
+
     def __init__(self):
-        # Common binary names: soffice, libreoffice
-        binary = "soffice" if shutil.which("soffice") else "libreoffice"
-        super().__init__("LibreOffice", binary)
+        super().__init__("LibreOffice", "soffice")
 
     def get_install_hint(self) -> str:
         return "Install LibreOffice and ensure 'soffice' or 'libreoffice' is in PATH."
 
-    @property
-    def path(self) -> Optional[str]:
-        if self._path is None:
-            self._path = shutil.which(self.binary_name)
-            # Common Windows installation path fallback
-            if self._path is None and shutil.os.name == "nt":
-                # LibreOffice usually installs to C:\Program Files\LibreOffice\program\soffice.exe
-                common_paths = [
-                    r"C:\Program Files\LibreOffice\program\soffice.exe",
-                    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe"
-                ]
-                for p in common_paths:
-                    if shutil.os.path.exists(p):
-                        self._path = p
-                        break
-        return self._path
-
 class EngineRegistry:
     def __init__(self):
         self.engines = {
             "ffmpeg": FFmpegEngine(),
+            "ffprobe": FFprobeEngine(),
             "imagemagick": ImageMagickEngine(),
             "poppler": PopplerEngine(),
             "tesseract": TesseractEngine(),
             "libreoffice": LibreOfficeEngine(),
         }
+        self.limiter = EngineLimiter()
+        for engine in self.engines.values():
+            engine.limiter = self.limiter
 
     def get(self, name: str) -> BaseEngine:
         engine = self.engines.get(name.lower())
@@ -330,6 +776,19 @@ class EngineRegistry:
             raise EngineError(f"Unknown engine: {name}")
         return engine
 
+    def slot(self, name: str):
+        """
+        Hold a concurrency slot for `name` around work that runs the engine
+        outside `BaseEngine.run`, e.g. through pytesseract or pdf2image.
+        """
+        return self.limiter.slot(name.lower())
+
+    def refresh(self):
+        """Forget cached discovery and probe results so engines are searched for again."""
+        engine_cache.clear()
+        for engine in self.engines.values():
+            engine._path = None
+
     def check_all(self) -> List[Tuple[str, bool, str]]:
         return [(name, eng.is_available, eng.get_install_hint()) for name, eng in self.engines.items()]
 
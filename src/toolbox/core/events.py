@@ -0,0 +1,301 @@
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, TextIO, Tuple
+
+from pydantic import BaseModel, Field
+
+START, PROGRESS, ITEM, END = "start", "progress", "item", "end"
+
+class ProgressEvent(BaseModel):
+    kind: str
+    task: int
+    label: str
+    unit: str = "items"
+    completed: float = 0
+    total: Optional[float] = None
+    elapsed: float = 0.0
+    rate: Optional[float] = None
+    eta: Optional[float] = None
+    ok: Optional[bool] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
+    ts: float = Field(default_factory=time.time)
+
+class ProgressSink(ABC):
+    """
+    Destination for progress events.
+
+    `interval` is the minimum time between two progress events of the same
+    task delivered to this sink; start and end events are always delivered.
+    Sinks with `items` set also receive one event per finished batch item.
+    """
+    interval: float = 0.0
+    items: bool = False
+
+    @abstractmethod
+    def emit(self, event: ProgressEvent):
+        pass
+
+    def close(self):
+        pass
+
+class RichSink(ProgressSink):
+    """Renders every active task as a bar on one shared rich display."""
+    interval = 0.1
+
+    def __init__(self, console):
+        self.console = console
+        self._progress = None
+        self._tasks: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def _display(self):
+        if self._progress is None:
+            from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+            self._progress = Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TextColumn("{task.fields[count]}"),
+                TimeElapsedColumn(),
+                TextColumn("[dim]{task.fields[eta]}[/dim]"),
+                console=self.console,
+                refresh_per_second=5,
+            )
+            self._progress.start()
+        return self._progress
+
+    @staticmethod
+    def _fields(event: ProgressEvent) -> Dict[str, Any]:
+        def amount(value: float) -> str:
+            return f"{value:.0f}" if event.unit != "s" else f"{value:.1f}"
+        count = amount(event.completed)
+        if event.total is not None:
+            count += f"/{amount(event.total)}"
+        eta = f"ETA {event.eta:.0f}s" if event.eta is not None and event.kind != END else ""
+        return {"count": f"{count} {event.unit}", "eta": eta}
+
+    def emit(self, event: ProgressEvent):
+        if event.kind == ITEM:
+            return
+        with self._lock:
+            progress = self._display()
+            if event.kind == START:
+                self._tasks[event.task] = progress.add_task(event.label, total=event.total, **self._fields(event))
+                return
+            task_id = self._tasks.get(event.task)
+            if task_id is None:
+                return
+            progress.update(task_id, description=event.label, completed=event.completed,
+                            total=event.total, **self._fields(event))
+            if event.kind == END:
+                del self._tasks[event.task]
+                if self._tasks:
+                    # Nested work (one file of a batch): drop its bar, keep the outer one
+                    progress.remove_task(task_id)
+                else:
+                    progress.stop()
+                    self._progress = None
+
+    def close(self):
+        with self._lock:
+            if self._progress is not None:
+                self._progress.stop()
+                self._progress = None
+            self._tasks.clear()
+
+class JsonLinesSink(ProgressSink):
+    """Writes each event as one JSON object per line, e.g. next to `--json-log` output."""
+    interval = 1.0
+    items = True
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event: ProgressEvent):
+        line = json.dumps({"event": "progress", **event.model_dump()}) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+class SocketSink(ProgressSink):
+    """
+    Streams JSON lines to a listener at a Unix socket path or `host:port`.
+
+    The connection is made on the first event. If the listener is missing or
+    goes away the sink stops sending, so monitoring never fails the job.
+    """
+    interval = 0.5
+    items = True
+
+    def __init__(self, address: str):
+        self.address = address
+        self._sock: Optional[socket.socket] = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        host, _, port = self.address.rpartition(":")
+        if host and port.isdigit() and not os.path.exists(self.address):
+            return socket.create_connection((host, int(port)), timeout=2)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(2)
+        sock.connect(self.address)
+        return sock
+
+    def emit(self, event: ProgressEvent):
+        with self._lock:
+            if self._failed:
+                return
+            try:
+                if self._sock is None:
+                    self._sock = self._connect()
+                self._sock.sendall((event.model_dump_json() + "\n").encode("utf-8"))
+            except (OSError, AttributeError):
+                # AttributeError: AF_UNIX is unavailable on this platform
+                self._failed = True
+                self.close()
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+class ProgressTask:
+    """
+    One unit of tracked work: an encode, a document's pages, a batch.
+
+    Use as a context manager; the end event reports failure if the block
+    raised. Rate is `completed` units per second since start, and the ETA
+    is derived from it once a total is known.
+    """
+
+    def __init__(self, bus: "EventBus", label: str, total: Optional[float] = None, unit: str = "items"):
+        self.bus = bus
+        self.id = next(bus._ids)
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.completed: float = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _event(self, kind: str, ok: Optional[bool] = None, data: Optional[Dict[str, Any]] = None) -> ProgressEvent:
+        elapsed = time.monotonic() - self.started
+        rate = self.completed / elapsed if elapsed > 0 and self.completed else None
+        eta = None
+        if rate and self.total is not None:
+            eta = max(0.0, (self.total - self.completed) / rate)
+        return ProgressEvent(
+            kind=kind, task=self.id, label=self.label, unit=self.unit, completed=self.completed,
+            total=self.total, elapsed=elapsed, rate=rate, eta=eta, ok=ok, data=data or {},
+        )
+
+    def start(self) -> "ProgressTask":
+        self.started = time.monotonic()
+        self.bus.publish(self, START)
+        return self
+
+    def update(self, completed: Optional[float] = None, total: Optional[float] = None,
+               label: Optional[str] = None, **data: Any):
+        with self._lock:
+            if completed is not None:
+                self.completed = completed
+            if total is not None:
+                self.total = total
+            if label is not None:
+                self.label = label
+        self.bus.publish(self, PROGRESS, data=data)
+
+    def advance(self, amount: float = 1, **data: Any):
+        with self._lock:
+            self.completed += amount
+        self.bus.publish(self, PROGRESS, data=data)
+
+    def item(self, name: str, ok: bool = True, **data: Any):
+        """Count one finished item (e.g. a batch file) and report it to sinks that want items."""
+        with self._lock:
+            self.completed += 1
+        self.bus.publish(self, ITEM, ok=ok, data={"item": name, **data})
+        self.bus.publish(self, PROGRESS)
+
+    def finish(self, ok: bool = True, **data: Any):
+        self.bus.publish(self, END, ok=ok, data=data)
+
+    def __enter__(self) -> "ProgressTask":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(ok=exc_type is None)
+
+class EventBus:
+    """
+    Fan-out of progress events from engines, plugins and batches to sinks.
+
+    With no sinks attached publishing returns immediately, and progress
+    events are dropped per sink and task when they arrive faster than the
+    sink's `interval`, so fine-grained reporting costs next to nothing.
+    """
+
+    def __init__(self):
+        self.sinks: List[ProgressSink] = []
+        self._ids = itertools.count(1)
+        self._last: Dict[Tuple[int, int], float] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, sinks: Sequence[ProgressSink], close: bool = True):
+        """Replace the attached sinks, closing the previous ones unless `close` is False."""
+        with self._lock:
+            old, self.sinks = self.sinks, list(sinks)
+            self._last.clear()
+        for sink in old if close else ():
+            sink.close()
+
+    def subscribe(self, sink: ProgressSink):
+        with self._lock:
+            self.sinks = [*self.sinks, sink]
+
+    def unsubscribe(self, sink: ProgressSink):
+        with self._lock:
+            self.sinks = [s for s in self.sinks if s is not sink]
+
+    def task(self, label: str, total: Optional[float] = None, unit: str = "items") -> ProgressTask:
+        return ProgressTask(self, label, total=total, unit=unit)
+
+    def publish(self, task: ProgressTask, kind: str, ok: Optional[bool] = None,
+                data: Optional[Dict[str, Any]] = None):
+        sinks = self.sinks
+        if not sinks:
+            return
+        now = time.monotonic()
+        event = None
+        for sink in sinks:
+            if kind == ITEM and not sink.items:
+                continue
+            if kind == PROGRESS and sink.interval:
+                key = (id(sink), task.id)
+                with self._lock:
+                    if now - self._last.get(key, 0.0) < sink.interval:
+                        continue
+                    self._last[key] = now
+            if event is None:
+                event = task._event(kind, ok=ok, data=data)
+            try:
+                sink.emit(event)
+            except Exception:
+                # A broken sink must never fail the work it reports on
+                pass
+        if kind == END:
+            with self._lock:
+                for sink in sinks:
+                    self._last.pop((id(sink), task.id), None)
+
+event_bus = EventBus()
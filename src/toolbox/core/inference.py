@@ -0,0 +1,155 @@
+import functools
+import math
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+from toolbox.core import resident
+
+DEFAULT_TILE = 256
+DEFAULT_OVERLAP = 16
+DEFAULT_BATCH = 4
+
+def physical_cores() -> int:
+    try:
+        import psutil
+        return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    except ImportError:
+        return os.cpu_count() or 1
+
+def get_session(model_path: str, gpu: bool = False):
+    """ONNX Runtime session for a model: the local server's resident one under `serve-local`, else this process's."""
+    host = resident.host()
+    if host is not None:
+        return host.session(model_path, gpu)
+    return load_session(model_path, gpu)
+
+@functools.lru_cache(maxsize=4)
+def load_session(model_path: str, gpu: bool = False):
+    """
+    ONNX Runtime session for a model, built once per process.
+
+    Operators run one at a time, each spread across the physical cores;
+    hyper-threads and parallel operators mostly add contention for the
+    convolution-heavy upscaling models.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = physical_cores()
+    options.inter_op_num_threads = 1
+    providers = ["CPUExecutionProvider"]
+    if gpu:
+        providers.insert(0, "CUDAExecutionProvider")
+    return ort.InferenceSession(model_path, sess_options=options, providers=providers)
+
+def _starts(length: int, tile: int, overlap: int) -> List[int]:
+    """Tile offsets covering `length`; the last tile is shifted back to end exactly at the edge."""
+    if length <= tile:
+        return [0]
+    step = tile - overlap
+    return list(range(0, length - tile, step)) + [length - tile]
+
+def _ramp(length: int, overlap: int):
+    """1-D blend weights that fade in and out over `overlap` pixels and never reach zero."""
+    import numpy as np
+
+    weights = np.ones(length, dtype=np.float32)
+    if overlap > 0:
+        fade = (np.arange(min(overlap, length), dtype=np.float32) + 0.5) / overlap
+        weights[:len(fade)] = np.minimum(weights[:len(fade)], fade)
+        weights[length - len(fade):] = np.minimum(weights[length - len(fade):], fade[::-1])
+    return weights
+
+def validate_tile(ctx, param, value: int) -> int:
+    """Click callback for --tile: 0 (whole images) or a tile comfortably larger than the blend overlap."""
+    import click
+
+    if value < 0 or 0 < value <= 2 * DEFAULT_OVERLAP:
+        raise click.BadParameter(f"must be 0 (whole image) or larger than {2 * DEFAULT_OVERLAP} pixels")
+    return value
+
+class TiledUpscaler:
+    """
+    Runs a super-resolution model over images in overlapping tiles.
+
+    Peak memory is set by `tile` and `batch_size` instead of the image size:
+    tiles (from one image or several) are stacked into batches of
+    `batch_size` per `session.run`, and overlapping tile outputs are
+    cross-faded so no seams show. `tile=0` feeds whole images. Models
+    exported with a fixed batch or input size are detected and respected.
+    """
+
+    def __init__(self, session: Any, scale: int, tile: int = DEFAULT_TILE, overlap: int = DEFAULT_OVERLAP,
+                 batch_size: int = DEFAULT_BATCH):
+        self.session = session
+        self.scale = scale
+        self.tile = tile
+        # A tile must advance by more than it overlaps, or tiling never reaches the edge
+        self.overlap = min(overlap, tile // 4) if tile else 0
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Dimensions are ints when fixed at export time, names or None when dynamic
+        batch_dim, _, height_dim, width_dim = (list(model_input.shape) + [None] * 4)[:4]
+        self.fixed_batch = isinstance(batch_dim, int) and batch_dim > 0
+        self.batch_size = batch_dim if self.fixed_batch else max(1, batch_size)
+        self.fixed_size = (height_dim, width_dim) if isinstance(height_dim, int) and isinstance(width_dim, int) else None
+        if self.fixed_size:
+            self.tile = min(self.fixed_size)
+            self.overlap = min(self.overlap or DEFAULT_OVERLAP, self.tile // 4)
+
+    def tile_shape(self, height: int, width: int) -> Tuple[int, int]:
+        if not self.tile:
+            return height, width
+        return min(self.tile, height), min(self.tile, width)
+
+    def tiles_per_image(self, height: int, width: int) -> int:
+        th, tw = self.tile_shape(height, width)
+        return len(_starts(height, th, self.overlap)) * len(_starts(width, tw, self.overlap))
+
+    def images_per_run(self, height: int, width: int) -> int:
+        """How many images of this size fill one batch; useful for grouping video frames."""
+        return max(1, math.ceil(self.batch_size / self.tiles_per_image(height, width)))
+
+    def _run(self, batch):
+        import numpy as np
+
+        n, _, h, w = batch.shape
+        fh, fw = self.fixed_size or (h, w)
+        # The last batch of a run and edge tiles are padded up to what a fixed-shape model expects
+        fill = self.batch_size - n if self.fixed_batch else 0
+        if fill or (h, w) != (fh, fw):
+            batch = np.pad(batch, ((0, fill), (0, 0), (0, fh - h), (0, fw - w)), mode="edge")
+        return self.session.run(None, {self.input_name: batch})[0][:n, :, :h * self.scale, :w * self.scale]
+
+    def upscale(self, images: Sequence[Any]) -> List[Any]:
+        """Upscale HxWx3 uint8 RGB arrays; returns uint8 RGB arrays `scale` times larger."""
+        import numpy as np
+
+        s = self.scale
+        sums = [np.zeros((img.shape[0] * s, img.shape[1] * s, 3), dtype=np.float32) for img in images]
+        weights = [np.zeros((img.shape[0] * s, img.shape[1] * s, 1), dtype=np.float32) for img in images]
+
+        # Tiles of the same shape can share a batch, whichever image they come from
+        groups: Dict[Tuple[int, int], List[Tuple[int, int, int]]] = {}
+        for index, img in enumerate(images):
+            height, width = img.shape[:2]
+            th, tw = self.tile_shape(height, width)
+            for y in _starts(height, th, self.overlap):
+                for x in _starts(width, tw, self.overlap):
+                    groups.setdefault((th, tw), []).append((index, y, x))
+
+        for (th, tw), tiles in groups.items():
+            blend = (_ramp(th * s, self.overlap * s)[:, None] * _ramp(tw * s, self.overlap * s)[None, :])[..., None]
+            for start in range(0, len(tiles), self.batch_size):
+                chunk = tiles[start:start + self.batch_size]
+                batch = np.stack([images[i][y:y + th, x:x + tw] for i, y, x in chunk])
+                batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+                result = np.clip(self._run(batch), 0, 1).transpose(0, 2, 3, 1)
+                for (i, y, x), out in zip(chunk, result):
+                    region = (slice(y * s, (y + th) * s), slice(x * s, (x + tw) * s))
+                    sums[i][region] += out * blend
+                    weights[i][region] += blend
+
+        return [(total / weight * 255.0 + 0.5).astype(np.uint8) for total, weight in zip(sums, weights)]
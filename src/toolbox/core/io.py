@@ -1,4 +1,6 @@
+import fnmatch
 import os
+import re
 import urllib.request
 import urllib.parse
 import tempfile
@@ -7,7 +9,7 @@ import time
 import socket
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Generator, Optional
+from typing import Generator, Iterator, List, Optional
 
 def is_safe_url(url: str) -> bool:
     """Basic SSRF protection - prevent access to private IP ranges."""
@@ -101,3 +103,76 @@ def get_input_path(input_source: str, show_progress: bool = True) -> Generator[s
                 os.remove(temp_file)
             except OSError:
                 pass
+
+_MAGIC = re.compile(r"[*?[]")
+
+def _join(directory: str, name: str) -> str:
+    return os.path.join(directory, name) if directory else name
+
+def _scan(directory: str) -> Iterator[os.DirEntry]:
+    try:
+        with os.scandir(directory or ".") as it:
+            yield from it
+    except OSError:
+        return
+
+def _visible(name: str, part: str) -> bool:
+    # Like glob: wildcards only match dot-files when the pattern itself starts with a dot
+    return not name.startswith(".") or part.startswith(".")
+
+def _match(directory: str, parts: List[str]) -> Iterator[str]:
+    part, rest = parts[0], parts[1:]
+    if part == "**":
+        yield from _match_recursive(directory, rest)
+    elif not _MAGIC.search(part):
+        path = _join(directory, part)
+        if rest:
+            yield from _match(path, rest)
+        elif os.path.isfile(path):
+            yield path
+    else:
+        for entry in _scan(directory):
+            if not _visible(entry.name, part) or not fnmatch.fnmatch(entry.name, part):
+                continue
+            if rest:
+                if entry.is_dir():
+                    yield from _match(_join(directory, entry.name), rest)
+            elif entry.is_file():
+                yield _join(directory, entry.name)
+
+def _match_recursive(directory: str, rest: List[str]) -> Iterator[str]:
+    """'**' matches zero or more directories; one scandir per directory covers both cases."""
+    head = rest[0] if rest else None
+    if head is not None and not _MAGIC.search(head):
+        # A literal next component is a direct lookup rather than a scan
+        yield from _match(directory, rest)
+        head = None
+
+    for entry in _scan(directory):
+        path = _join(directory, entry.name)
+        is_dir = entry.is_dir()
+        if head is not None and _visible(entry.name, head) and fnmatch.fnmatch(entry.name, head):
+            if len(rest) == 1:
+                if entry.is_file():
+                    yield path
+            elif is_dir:
+                yield from _match(path, rest[1:])
+        elif not rest and not is_dir and not entry.name.startswith(".") and entry.is_file():
+            yield path
+        if is_dir and not entry.name.startswith("."):
+            yield from _match_recursive(path, rest)
+
+def iter_glob(pattern: str) -> Iterator[str]:
+    """
+    Lazily yield the files matching a glob pattern, with recursive '**'.
+
+    Matches `glob.glob(pattern, recursive=True)` filtered to files, but walks
+    directories with os.scandir, uses each DirEntry's cached type instead of
+    stat-ing every path, and never builds the full list in memory.
+    """
+    drive, rest = os.path.splitdrive(pattern)
+    seps = "\\/" if os.name == "nt" else "/"
+    root = drive + (rest[0] if rest[:1] and rest[0] in seps else "")
+    parts = [p for p in re.split(f"[{re.escape(seps)}]", rest) if p]
+    if parts:
+        yield from _match(root, parts)
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from toolbox.core.metrics import percentile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    pattern TEXT,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+    input_file TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cached INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    finished REAL,
+    error TEXT,
+    run_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS items_state ON items(state);
+"""
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+class JournalError(Exception):
+    """Raised when a journal cannot be used for the requested batch."""
+    pass
+
+class BatchJournal:
+    """
+    SQLite record of per-file outcomes for one batch command.
+
+    Every input is tracked as pending, done or failed together with its
+    duration and error, so an interrupted batch can be resumed and a finished
+    one reported on. Outcomes are written in small transactions (at most
+    `flush_every` results or `flush_interval` seconds apart); a crash loses
+    at most that much progress, and those files are simply run again.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 200, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.run_id: Optional[int] = None
+        self._pending: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def command(self) -> Optional[str]:
+        row = self.conn.execute("SELECT command FROM runs ORDER BY id LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def begin(self, command: str, pattern: Optional[str] = None) -> int:
+        """Start a new run. A journal only ever records one command."""
+        existing = self.command()
+        if existing is not None and existing != command:
+            raise JournalError(f"Journal {self.path} belongs to '{existing}', not '{command}'.")
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (command, pattern, started) VALUES (?, ?, ?)", (command, pattern, time.time())
+            )
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def finish(self):
+        self.flush()
+        if self.run_id is not None:
+            with self.conn:
+                self.conn.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), self.run_id))
+
+    def add(self, files: Iterable[str]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (input_file, state) VALUES (?, ?)",
+                ((os.path.abspath(f), PENDING) for f in files),
+            )
+
+    def completed(self) -> Set[str]:
+        """Absolute paths of inputs that finished successfully in any run."""
+        return {row[0] for row in self.conn.execute("SELECT input_file FROM items WHERE state = ?", (DONE,))}
+
+    def record(self, input_file: str, ok: bool, duration: float = 0.0, cached: bool = False,
+               error: Optional[str] = None):
+        self._pending.append((DONE if ok else FAILED, int(cached), duration, time.time(), error, self.run_id,
+                              os.path.abspath(input_file)))
+        if len(self._pending) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO items (state, cached, duration, finished, error, run_id, input_file, attempts) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, 1) "
+                    "ON CONFLICT(input_file) DO UPDATE SET state = excluded.state, cached = excluded.cached, "
+                    "duration = excluded.duration, finished = excluded.finished, error = excluded.error, "
+                    "run_id = excluded.run_id, attempts = attempts + 1",
+                    self._pending,
+                )
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    def report(self, slowest: int = 5, errors: int = 10) -> Dict[str, Any]:
+        """Counts per state, throughput, duration percentiles, the slowest files and the commonest errors."""
+        self.flush()
+        states = dict(self.conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall())
+        durations = [row[0] for row in self.conn.execute(
+            "SELECT duration FROM items WHERE state = ? AND cached = 0 AND duration IS NOT NULL", (DONE,)
+        )]
+        cached = self.conn.execute("SELECT COUNT(*) FROM items WHERE cached = 1 AND state = ?", (DONE,)).fetchone()[0]
+        runs = [
+            {"id": run_id, "pattern": pattern, "started": started, "finished": finished}
+            for run_id, pattern, started, finished in self.conn.execute(
+                "SELECT id, pattern, started, finished FROM runs ORDER BY id"
+            )
+        ]
+
+        # Throughput over the time actually spent running, summed across resumed runs
+        elapsed = 0.0
+        for run in runs:
+            end = run["finished"] or self.conn.execute(
+                "SELECT MAX(finished) FROM items WHERE run_id = ?", (run["id"],)
+            ).fetchone()[0]
+            if end:
+                elapsed += max(0.0, end - run["started"])
+        finished_items = states.get(DONE, 0) + states.get(FAILED, 0)
+
+        error_counts = Counter(row[0] for row in self.conn.execute(
+            "SELECT error FROM items WHERE state = ?", (FAILED,)
+        ))
+        return {
+            "command": self.command(),
+            "runs": runs,
+            "states": {state: states.get(state, 0) for state in (PENDING, DONE, FAILED)},
+            "cached": cached,
+            "elapsed": elapsed,
+            "throughput": finished_items / elapsed if elapsed > 0 else None,
+            "p50": percentile(durations, 50) if durations else None,
+            "p95": percentile(durations, 95) if durations else None,
+            "slowest": self.conn.execute(
+                "SELECT input_file, duration FROM items WHERE state = ? AND cached = 0 "
+                "ORDER BY duration DESC LIMIT ?", (DONE, slowest)
+            ).fetchall(),
+            "errors": error_counts.most_common(errors),
+        }
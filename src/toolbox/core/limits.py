@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from toolbox.core.config import config_manager
+from toolbox.core.metrics import _try_lock
+
+LOCKS_DIR = Path.home() / ".toolbox" / "locks"
+
+def default_limit(engine: str) -> int:
+    """Concurrent runs allowed for an engine when `engine_limits` does not set one."""
+    cpus = os.cpu_count() or 1
+    if engine == "libreoffice":
+        # Instances sharing one user profile fail or serialize on its lock anyway
+        return 1
+    if engine == "ffmpeg":
+        # Encoders are already multi-threaded
+        return max(1, cpus // 2)
+    return cpus
+
+class EngineLimiter:
+    """
+    Per-engine concurrency slots with resource-aware admission.
+
+    Each engine gets a process-wide semaphore sized by `engine_limits` in the
+    config (0 means unlimited). With `engine_limits_scope: machine` a slot
+    additionally requires an exclusive lock on one of N slot files under
+    ~/.toolbox/locks, so separate toolbox processes share the same budget;
+    the OS drops the lock when a process dies. Before a run is admitted the
+    limiter waits while available memory is below `admission_min_free_mb` or
+    the 1-minute load average per CPU is above `admission_max_load`, but only
+    while this process has other engine runs in flight, so one run is always
+    allowed to make progress.
+    """
+
+    def __init__(self, locks_dir: Optional[Path] = None, poll_interval: float = 0.1):
+        self.locks_dir = locks_dir or LOCKS_DIR
+        self.poll_interval = poll_interval
+        self._semaphores: Dict[str, Tuple[int, threading.BoundedSemaphore]] = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self.active: Dict[str, int] = {}
+
+    def limit(self, engine: str) -> int:
+        limits = config_manager.settings.engine_limits
+        return limits[engine] if engine in limits else default_limit(engine)
+
+    def _semaphore(self, engine: str, limit: int) -> threading.BoundedSemaphore:
+        with self._lock:
+            size, sem = self._semaphores.get(engine, (None, None))
+            # Replaced when the configured limit changes
+            if size != limit:
+                sem = threading.BoundedSemaphore(limit)
+                self._semaphores[engine] = (limit, sem)
+            return sem
+
+    def _machine_slot(self, engine: str, limit: int):
+        """Block until one of the engine's slot files is locked; returns the open file."""
+        self.locks_dir.mkdir(parents=True, exist_ok=True)
+        delay = self.poll_interval
+        while True:
+            for index in range(limit):
+                f = open(self.locks_dir / f"{engine}.{index}.lock", "a")
+                if _try_lock(f):
+                    return f
+                f.close()
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def pressure(self) -> Optional[str]:
+        """Why a new run should wait, or None if memory and load are within limits."""
+        settings = config_manager.settings
+        try:
+            import psutil
+        except ImportError:
+            return None
+        if settings.admission_min_free_mb:
+            available = psutil.virtual_memory().available
+            if available < settings.admission_min_free_mb * 1024 * 1024:
+                return f"{available // (1024 * 1024)} MB free"
+        if settings.admission_max_load:
+            try:
+                load = psutil.getloadavg()[0] / (psutil.cpu_count() or 1)
+            except (AttributeError, OSError):
+                return None
+            if load > settings.admission_max_load:
+                return f"load {load:.2f} per CPU"
+        return None
+
+    def _admit(self, engine: str):
+        with self._cond:
+            while sum(self.active.values()) and self.pressure():
+                # Re-checked when another run finishes, or after a short wait
+                self._cond.wait(self.poll_interval * 10)
+            self.active[engine] = self.active.get(engine, 0) + 1
+
+    @contextmanager
+    def slot(self, engine: str) -> Iterator[None]:
+        """Hold one of `engine`'s slots for the duration of the block."""
+        limit = self.limit(engine)
+        sem = self._semaphore(engine, limit) if limit > 0 else None
+        if sem is not None:
+            sem.acquire()
+        lock_file = None
+        try:
+            if sem is not None and config_manager.settings.engine_limits_scope == "machine":
+                lock_file = self._machine_slot(engine, limit)
+            self._admit(engine)
+            try:
+                yield
+            finally:
+                with self._cond:
+                    self.active[engine] -= 1
+                    self._cond.notify_all()
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+            if sem is not None:
+                sem.release()
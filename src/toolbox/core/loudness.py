@@ -0,0 +1,51 @@
+import json
+from typing import Dict
+
+from toolbox.core import media
+from toolbox.core.engine import BaseEngine, EngineError
+
+# EBU R128 defaults of FFmpeg's loudnorm filter
+DEFAULT_I = -24.0
+DEFAULT_TP = -2.0
+DEFAULT_LRA = 7.0
+
+MEASURED_KEYS = ("input_i", "input_tp", "input_lra", "input_thresh")
+
+def parse_loudnorm_json(stderr: str) -> Dict[str, float]:
+    """The input measurements from the JSON block loudnorm prints at the end of a `print_format=json` pass."""
+    start, end = stderr.rfind("{"), stderr.rfind("}")
+    if start < 0 or end < start:
+        raise EngineError("loudnorm printed no measurement")
+    try:
+        data = json.loads(stderr[start:end + 1])
+        return {key: float(data[key]) for key in MEASURED_KEYS}
+    except (KeyError, ValueError) as e:
+        raise EngineError(f"Unreadable loudnorm measurement: {e}") from e
+
+def measure(ffmpeg: BaseEngine, path: str) -> Dict[str, float]:
+    """First loudnorm pass: analyse the whole input, write nothing."""
+    result = ffmpeg.run([
+        "-hide_banner", "-nostats", "-i", path, "-map", "0:a:0",
+        "-af", "loudnorm=print_format=json", "-f", "null", "-",
+    ])
+    return parse_loudnorm_json(result.stderr or "")
+
+def loudnorm_filter(measured: Dict[str, float], i: float = DEFAULT_I, tp: float = DEFAULT_TP,
+                    lra: float = DEFAULT_LRA) -> str:
+    """
+    Second-pass loudnorm with the first pass's measurements.
+
+    Knowing the whole input's loudness up front lets loudnorm apply a
+    linear gain where the target allows it, instead of converging
+    dynamically as in a single pass.
+    """
+    return (
+        f"loudnorm=I={i}:TP={tp}:LRA={lra}"
+        f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+        ":linear=true"
+    )
+
+def measured_loudness(ffmpeg: BaseEngine, path: str) -> Dict[str, float]:
+    """First-pass measurements for `path`, reused from the media cache when its content was analysed before."""
+    return media.media_cache.measurement(path, "loudnorm", lambda: measure(ffmpeg, path))
@@ -0,0 +1,376 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from toolbox.core.engine import EngineError, engine_registry
+
+MEDIA_CACHE_PATH = Path.home() / ".toolbox" / "cache" / "media.db"
+# Bumped when MediaInfo gains fields, so probes stored without them are redone
+MEDIA_CACHE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    info TEXT NOT NULL,
+    keyframes TEXT,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    digest TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (digest, kind)
+);
+"""
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _rate(value: Any) -> Optional[float]:
+    """Frame rate from ffprobe's "num/den" notation; None for "0/0"."""
+    num, _, den = str(value or "").partition("/")
+    num_f, den_f = _float(num), _float(den or 1)
+    if not num_f or not den_f:
+        return None
+    return num_f / den_f
+
+def _rotation(raw: Dict[str, Any]) -> Optional[int]:
+    """Display rotation in degrees from the display matrix side data, or the older `rotate` tag."""
+    for side in raw.get("side_data_list", []):
+        if "rotation" in side:
+            rotation = _float(side["rotation"])
+            return round(rotation) if rotation is not None else None
+    return _int(raw.get("tags", {}).get("rotate"))
+
+def parse_timestamp(value: str) -> float:
+    """Seconds from an FFmpeg time value: "SS[.ms]", "MM:SS[.ms]" or "HH:MM:SS[.ms]"."""
+    parts = str(value).strip().split(":")
+    try:
+        if len(parts) > 3:
+            raise ValueError
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}'; use seconds or HH:MM:SS") from None
+    if seconds < 0:
+        raise ValueError(f"Invalid time '{value}'; it must not be negative")
+    return seconds
+
+class StreamInfo(BaseModel):
+    index: int
+    type: str
+    codec: Optional[str] = None
+    profile: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    pix_fmt: Optional[str] = None
+    fps: Optional[float] = None
+    frames: Optional[int] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    channel_layout: Optional[str] = None
+    sample_fmt: Optional[str] = None
+    bits_per_raw_sample: Optional[int] = None
+    bit_rate: Optional[int] = None
+    duration: Optional[float] = None
+    # Degrees players rotate the picture by; FFmpeg's decoder applies it by default
+    rotation: Optional[int] = None
+
+    @property
+    def display_size(self) -> Tuple[Optional[int], Optional[int]]:
+        """Width and height of the frames FFmpeg decodes, which autorotation swaps for quarter turns."""
+        if self.rotation and self.rotation % 180:
+            return self.height, self.width
+        return self.width, self.height
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        """Frames as stored in the container, estimated from duration and rate when it has no count."""
+        if self.frames:
+            return self.frames
+        if self.fps and self.duration:
+            return round(self.fps * self.duration)
+        return None
+
+class MediaInfo(BaseModel):
+    """What ffprobe reports about a file: container, streams and, on request, keyframes."""
+    path: str
+    size: int
+    format: Optional[str] = None
+    duration: Optional[float] = None
+    start_time: float = 0.0
+    bit_rate: Optional[int] = None
+    streams: List[StreamInfo] = []
+    # Seconds from the start of the file (the timeline `-ss` seeks in); None until indexed
+    keyframes: Optional[List[float]] = None
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.type == "video"), None)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.type == "audio"), None)
+
+    @classmethod
+    def from_ffprobe(cls, path: str, size: int, data: Dict[str, Any]) -> "MediaInfo":
+        fmt = data.get("format", {})
+        start = _float(fmt.get("start_time")) or 0.0
+        streams = []
+        for raw in data.get("streams", []):
+            streams.append(StreamInfo(
+                index=raw.get("index", len(streams)),
+                type=raw.get("codec_type", "unknown"),
+                codec=raw.get("codec_name"),
+                profile=raw.get("profile"),
+                width=_int(raw.get("width")),
+                height=_int(raw.get("height")),
+                pix_fmt=raw.get("pix_fmt"),
+                # avg_frame_rate is the real rate; r_frame_rate is only the timebase guess
+                fps=_rate(raw.get("avg_frame_rate")) or _rate(raw.get("r_frame_rate")),
+                frames=_int(raw.get("nb_frames")),
+                sample_rate=_int(raw.get("sample_rate")),
+                channels=_int(raw.get("channels")),
+                channel_layout=raw.get("channel_layout"),
+                sample_fmt=raw.get("sample_fmt"),
+                bits_per_raw_sample=_int(raw.get("bits_per_raw_sample")),
+                bit_rate=_int(raw.get("bit_rate")),
+                duration=_float(raw.get("duration")),
+                rotation=_rotation(raw),
+            ))
+        return cls(
+            path=path,
+            size=size,
+            format=fmt.get("format_name"),
+            duration=_float(fmt.get("duration")),
+            start_time=start,
+            bit_rate=_int(fmt.get("bit_rate")),
+            streams=streams,
+        )
+
+# Audio codecs each output container can hold without re-encoding; None accepts any
+AUDIO_CONTAINER_CODECS: Dict[str, Optional[set]] = {
+    ".mp3": {"mp3"},
+    ".m4a": {"aac", "alac"},
+    ".aac": {"aac"},
+    ".flac": {"flac"},
+    ".ogg": {"vorbis", "opus", "flac"},
+    ".opus": {"opus"},
+    ".wav": {"pcm_s16le", "pcm_s24le", "pcm_s32le", "pcm_f32le", "pcm_u8"},
+    ".mka": None,
+}
+
+def audio_copy_mismatch(infos: Sequence[MediaInfo], output: str) -> Optional[str]:
+    """
+    Why the audio of `infos` cannot be joined by stream copy into `output`, or None if it can.
+
+    Stream copy needs one audio stream per input with the same codec,
+    profile, sample format and depth, sample rate and channel layout, in
+    a container that holds that codec.
+    """
+    def describe(a: StreamInfo) -> str:
+        codec = f"{a.codec} ({a.profile})" if a.profile else str(a.codec)
+        depth = f"{a.sample_fmt or '?'}" + (f"/{a.bits_per_raw_sample} bit" if a.bits_per_raw_sample else "")
+        return f"{codec} {depth} {a.sample_rate} Hz, {a.channels} ch"
+
+    first = None
+    for info in infos:
+        audio = [s for s in info.streams if s.type == "audio"]
+        if len(audio) != 1:
+            return f"{os.path.basename(info.path)} has {len(audio)} audio streams"
+        a = audio[0]
+        signature = (a.codec, a.profile, a.sample_fmt, a.bits_per_raw_sample, a.sample_rate, a.channels, a.channel_layout)
+        if first is None:
+            first, first_stream = signature, a
+        elif signature != first:
+            return f"{os.path.basename(info.path)} is {describe(a)}; expected {describe(first_stream)}"
+    extension = Path(output).suffix.lower()
+    if extension not in AUDIO_CONTAINER_CODECS:
+        return f"stream copy into '{extension or output}' files is not supported"
+    allowed = AUDIO_CONTAINER_CODECS[extension]
+    if first and allowed is not None and first[0] not in allowed:
+        return f"{extension} cannot hold {first[0]} audio"
+    return None
+
+def write_concat_list(paths: Sequence[Any], list_path: Path):
+    """Write a concat demuxer list; entries are single-quoted with a quote inside written as '\\''."""
+    lines = []
+    for path in paths:
+        escaped = str(Path(path).absolute()).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'\n")
+    Path(list_path).write_text("".join(lines), encoding="utf-8")
+
+def ffprobe_json(path: str, args: List[str]) -> Dict[str, Any]:
+    """Run ffprobe with JSON output on `path` and return the parsed document."""
+    ffprobe = engine_registry.get("ffprobe")
+    result = ffprobe.run(["-v", "error", "-print_format", "json", *args, path])
+    try:
+        return json.loads(result.stdout or "{}")
+    except ValueError as e:
+        raise EngineError(f"ffprobe returned unreadable output for {path}") from e
+
+def _read_keyframes(path: str, start_time: float) -> List[float]:
+    # Packet flags come from the demuxer, so nothing is decoded
+    data = ffprobe_json(path, ["-select_streams", "v:0", "-show_entries", "packet=pts_time,flags"])
+    times = []
+    for packet in data.get("packets", []):
+        pts = _float(packet.get("pts_time"))
+        if pts is not None and "K" in packet.get("flags", ""):
+            times.append(pts - start_time)
+    return sorted(times)
+
+class MediaCache:
+    """
+    Persistent ffprobe results, keyed by path and invalidated by size, mtime and inode.
+
+    Trimming, progress reporting, segmenting and batch planning all ask the
+    same questions about the same inputs; probing once keeps them from
+    spawning ffprobe, or demuxing a long file for its keyframes, again.
+    Keyframe indexes are only built when asked for and then stored with the
+    rest of the entry.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or MEDIA_CACHE_PATH
+        self._memo: Dict[str, Tuple[Tuple[int, int, int], MediaInfo]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != MEDIA_CACHE_VERSION:
+                with conn:
+                    conn.execute("DELETE FROM probes")
+                    conn.execute(f"PRAGMA user_version = {MEDIA_CACHE_VERSION}")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _load(self, path: str, stamp: Tuple[int, int, int]) -> Optional[MediaInfo]:
+        with self._db() as conn:
+            row = conn.execute(
+                "SELECT info, keyframes FROM probes WHERE path = ? AND size = ? AND mtime_ns = ? AND ino = ?",
+                (path, *stamp),
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE probes SET last_used = ? WHERE path = ?", (time.time(), path))
+        info = MediaInfo.model_validate_json(row[0])
+        if row[1] is not None:
+            info.keyframes = json.loads(row[1])
+        return info
+
+    def _save(self, path: str, stamp: Tuple[int, int, int], info: MediaInfo):
+        keyframes = json.dumps(info.keyframes) if info.keyframes is not None else None
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO probes (path, size, mtime_ns, ino, info, keyframes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, *stamp, info.model_dump_json(exclude={"keyframes"}), keyframes, time.time()),
+            )
+
+    def probe(self, path: str, keyframes: bool = False) -> MediaInfo:
+        """Media information for `path`, probing only when the file is new or has changed."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+        with self._lock:
+            memo = self._memo.get(path)
+        info = memo[1] if memo and memo[0] == stamp else self._load(path, stamp)
+        dirty = False
+        if info is None:
+            info = MediaInfo.from_ffprobe(path, st.st_size, ffprobe_json(path, ["-show_format", "-show_streams"]))
+            dirty = True
+        if keyframes and info.keyframes is None and info.video:
+            info.keyframes = _read_keyframes(path, info.start_time)
+            dirty = True
+        if dirty:
+            self._save(path, stamp, info)
+        with self._lock:
+            self._memo[path] = (stamp, info)
+        return info
+
+    def measurement(self, path: str, kind: str, measure: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        An expensive analysis of a file's content (e.g. a loudness pass), computed once per content hash.
+
+        Keyed by the SHA-256 of the file, so renamed or copied inputs reuse
+        the stored result and edited ones are analysed again.
+        """
+        from toolbox.core.cache import result_cache
+
+        digest = result_cache.file_digest(path)
+        with self._db() as conn:
+            row = conn.execute("SELECT value FROM measurements WHERE digest = ? AND kind = ?", (digest, kind)).fetchone()
+        if row:
+            return json.loads(row[0])
+        value = measure()
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO measurements (digest, kind, value, created) VALUES (?, ?, ?, ?)",
+                (digest, kind, json.dumps(value), time.time()),
+            )
+        return value
+
+    def prune(self) -> int:
+        """Forget files that were deleted or changed since they were probed. Returns entries removed."""
+        with self._db() as conn:
+            rows = conn.execute("SELECT path, size, mtime_ns, ino FROM probes").fetchall()
+            stale = []
+            for path, size, mtime_ns, ino in rows:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    st = None
+                if st is None or (st.st_size, st.st_mtime_ns, st.st_ino) != (size, mtime_ns, ino):
+                    stale.append((path,))
+            conn.executemany("DELETE FROM probes WHERE path = ?", stale)
+        with self._lock:
+            self._memo.clear()
+        return len(stale)
+
+    def clear(self):
+        with self._db() as conn:
+            conn.execute("DELETE FROM probes")
+            conn.execute("DELETE FROM measurements")
+        with self._lock:
+            self._memo.clear()
+
+    def counts(self) -> Dict[str, int]:
+        with self._db() as conn:
+            return {
+                "probes": conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0],
+                "measurements": conn.execute("SELECT COUNT(*) FROM measurements").fetchone()[0],
+            }
+
+media_cache = MediaCache()
+
+def probe(path: str, keyframes: bool = False) -> MediaInfo:
+    return media_cache.probe(path, keyframes=keyframes)
@@ -0,0 +1,276 @@
+import json
+import math
+import os
+import stat
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ModuleNotFoundError:
+    fcntl = None
+    import msvcrt
+
+METRICS_DIR = Path.home() / ".toolbox" / "metrics"
+
+# A log still under its staging name is left alone this long after its last
+# write: until then its writer may not have locked it yet
+STAGING_GRACE = 60.0
+
+SIZE_BUCKETS = [
+    (1 << 20, "< 1 MB"),
+    (10 << 20, "1-10 MB"),
+    (100 << 20, "10-100 MB"),
+    (1 << 30, "100 MB-1 GB"),
+]
+
+def _try_lock(f) -> bool:
+    """Take a non-blocking exclusive lock on an open file. Released when the file is closed."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def size_bucket(nbytes: Optional[int]) -> str:
+    if nbytes is None:
+        return "no input file"
+    for limit, label in SIZE_BUCKETS:
+        if nbytes < limit:
+            return label
+    return ">= 1 GB"
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def input_bytes(args: Sequence[Any]) -> Optional[int]:
+    """Total size of the arguments that name existing files, or None if there are none."""
+    total = None
+    for arg in args:
+        if not isinstance(arg, (str, os.PathLike)):
+            continue
+        try:
+            st = os.stat(arg)
+        except (OSError, ValueError):
+            continue
+        if stat.S_ISREG(st.st_mode):
+            total = (total or 0) + st.st_size
+    return total
+
+def _current_command() -> Optional[str]:
+    try:
+        import click
+        ctx = click.get_current_context(silent=True)
+    except ImportError:
+        return None
+    if ctx is None:
+        return None
+    # Drop the program name so reports read "video compress", not "toolbox video compress"
+    return " ".join(ctx.command_path.split()[1:]) or None
+
+class MetricsStore:
+    """
+    Append-only engine metrics.
+
+    Every process appends JSON lines to its own log file and holds an
+    exclusive lock on it while alive, so writers never contend with each
+    other. Compaction merges the logs of finished processes into a single
+    file, keeping the newest `max_samples` per (engine, command).
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_samples: int = 1000,
+                 max_logs: int = 32, compact_interval: float = 3600.0):
+        self.directory = directory or METRICS_DIR
+        self.max_samples = max_samples
+        self.max_logs = max_logs
+        self.compact_interval = compact_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[Path] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def compacted_path(self) -> Path:
+        return self.directory / "compacted.jsonl"
+
+    def record(self, engine: str, duration: float, args: Sequence[Any] = (), ok: bool = True,
+               command: Optional[str] = None):
+        entry = {
+            "ts": time.time(),
+            "engine": engine,
+            "command": command or _current_command(),
+            "duration": duration,
+            "args_count": len(args),
+            "input_bytes": input_bytes(args),
+            "ok": ok,
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            f = self._open_log()
+            if f is not None:
+                f.write(line)
+                f.flush()
+
+    def _open_log(self):
+        # Re-open after fork so a child never writes into its parent's log
+        if self._file is not None and self._pid == os.getpid():
+            return self._file
+
+        self._pid = os.getpid()
+        self._file = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            name = f"proc-{os.getpid()}-{time.time_ns()}.jsonl"
+            # Created under a staging name and renamed once locked, so compact()
+            # never sees an unlocked log of a live process and takes it as finished
+            staging = self.directory / f".{name}.new"
+            f = open(staging, "a", encoding="utf-8")
+        except OSError:
+            return None
+        self._path = staging
+        if _try_lock(f):
+            try:
+                os.replace(staging, self.directory / name)
+                self._path = self.directory / name
+            except OSError:
+                # Windows cannot rename an open file; the log keeps its staging name
+                pass
+        self._file = f
+
+        if self._needs_compaction():
+            try:
+                self.compact()
+            except OSError:
+                pass
+        return self._file
+
+    def _logs(self) -> List[Path]:
+        try:
+            return sorted([*self.directory.glob("proc-*.jsonl"), *self.directory.glob(".proc-*.jsonl.new")])
+        except OSError:
+            return []
+
+    @staticmethod
+    def _settling(path: Path) -> bool:
+        """Whether `path` is a staged log that its writer may still be about to lock."""
+        if not path.name.endswith(".new"):
+            return False
+        try:
+            return time.time() - path.stat().st_mtime < STAGING_GRACE
+        except OSError:
+            return True
+
+    def _needs_compaction(self) -> bool:
+        if len(self._logs()) > self.max_logs:
+            return True
+        try:
+            age = time.time() - self.compacted_path.stat().st_mtime
+        except OSError:
+            return len(self._logs()) > 1
+        return age > self.compact_interval
+
+    @staticmethod
+    def _parse(lines) -> Iterator[Dict[str, Any]]:
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Torn final line of a log that is still being written
+                continue
+
+    def _read(self, path: Path) -> List[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return list(self._parse(f))
+        except OSError:
+            return []
+
+    def compact(self) -> int:
+        """Merge logs of finished processes into the compacted file. Returns the number merged."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".compact.lock", "a") as guard:
+            if not _try_lock(guard):
+                return 0
+
+            own = self._path if self._file is not None else None
+            finished = []
+            for path in self._logs():
+                if path == own or self._settling(path):
+                    continue
+                try:
+                    f = open(path, "a+", encoding="utf-8")
+                except OSError:
+                    continue
+                if _try_lock(f):
+                    finished.append((path, f))
+                else:
+                    f.close()
+
+            if not finished:
+                return 0
+
+            samples: Dict[Tuple[Any, Any], List[Dict[str, Any]]] = defaultdict(list)
+            for entry in self._read(self.compacted_path):
+                samples[(entry.get("engine"), entry.get("command"))].append(entry)
+            for _, f in finished:
+                # Read through the locked handle; Windows locks are mandatory
+                f.seek(0)
+                for entry in self._parse(f):
+                    samples[(entry.get("engine"), entry.get("command"))].append(entry)
+
+            tmp_path = self.compacted_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                for entries in samples.values():
+                    entries.sort(key=lambda e: e.get("ts", 0))
+                    for entry in entries[-self.max_samples:]:
+                        out.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.compacted_path)
+
+            for path, f in finished:
+                f.close()
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            return len(finished)
+
+    def load(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """All samples from the compacted file and every live or finished process log."""
+        entries = []
+        for path in [self.compacted_path, *self._logs()]:
+            for entry in self._read(path):
+                if since is None or entry.get("ts", 0) >= since:
+                    entries.append(entry)
+        return entries
+
+def summarize(entries: List[Dict[str, Any]], key: Callable[[Dict[str, Any]], Any]) -> List[Dict[str, Any]]:
+    """Group samples by `key` and compute p50/p95/p99 over successful runs."""
+    groups: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    for entry in entries:
+        groups[key(entry)].append(entry)
+
+    rows = []
+    for group_key, group in groups.items():
+        durations = [e["duration"] for e in group if e.get("ok", True)]
+        rows.append({
+            "key": group_key,
+            "count": len(group),
+            "errors": len(group) - len(durations),
+            "p50": percentile(durations, 50) if durations else None,
+            "p95": percentile(durations, 95) if durations else None,
+            "p99": percentile(durations, 99) if durations else None,
+        })
+    rows.sort(key=lambda r: tuple(str(k) for k in (r["key"] if isinstance(r["key"], tuple) else (r["key"],))))
+    return rows
+
+metrics_store = MetricsStore()
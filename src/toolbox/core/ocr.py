@@ -0,0 +1,458 @@
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from toolbox.core import resident
+from toolbox.core.cache import CACHE_DIR, make_key, result_cache
+from toolbox.core.config import config_manager
+from toolbox.core.engine import engine_registry
+from toolbox.core.events import ProgressTask
+
+# pdf2image's own default resolution
+DEFAULT_DPI = 200
+DEFAULT_WINDOW = 8
+PREPROCESS_MODES = ["none", "grayscale", "threshold"]
+OCR_CACHE_PATH = CACHE_DIR / "ocr.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS texts_last_used ON texts(last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+def ocr_jobs(jobs: int = 0) -> int:
+    """Worker count for `jobs` (0 = CPU count), capped by engine_limits.tesseract."""
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    limit = engine_registry.limiter.limit("tesseract")
+    return min(jobs, limit) if limit > 0 else jobs
+
+def text_key(digest: str, lang: str, version: Optional[str], **params: Any) -> str:
+    """Cache key for the text of an image with content hash `digest`."""
+    return make_key(kind="ocr", digest=digest, lang=lang, tesseract=version, **params)
+
+def image_digest(image) -> str:
+    """SHA-256 of a PIL image's pixels, mode and size."""
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+class OcrCache:
+    """
+    Persistent OCR text, keyed by image content and recognition parameters.
+
+    Keys combine the hash of the image file or rendered page with the
+    language, preprocessing and tesseract version, so the same scan is only
+    recognized once however its file or output is named, and a PDF that
+    gained a page only sends the new page to tesseract. Entries are trimmed
+    least-recently-used first to `ocr_cache_max_mb`.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.db_path = db_path or OCR_CACHE_PATH
+        self._max_bytes = max_bytes
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return config_manager.settings.ocr_cache_max_mb * 1024 * 1024
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # OCR workers read and write concurrently, so wait for their locks
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, amount: int):
+        if amount:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount),
+            )
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        """Cached text for each of `keys` that has any."""
+        found: Dict[str, str] = {}
+        with self._db() as conn:
+            for key in set(keys):
+                row = conn.execute("SELECT text FROM texts WHERE key = ?", (key,)).fetchone()
+                if row:
+                    found[key] = row[0]
+            conn.executemany("UPDATE texts SET last_used = ? WHERE key = ?", [(time.time(), key) for key in found])
+            self._bump(conn, "hits", sum(1 for key in keys if key in found))
+            self._bump(conn, "misses", sum(1 for key in keys if key not in found))
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, texts: Dict[str, str]):
+        """Store text under each key, then trim the cache to its size limit."""
+        if not texts:
+            return
+        now = time.time()
+        with self._db() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO texts (key, text, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                [(key, text, len(text.encode("utf-8")), now, now) for key, text in texts.items()],
+            )
+        self.prune(self.max_bytes)
+
+    def put(self, key: str, text: str):
+        self.put_many({key: text})
+
+    def prune(self, max_bytes: Optional[int] = None, older_than: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Drop texts unused for `older_than` seconds, then least-recently-used
+        ones until the cache fits in `max_bytes`. Returns (entries, bytes) removed.
+        """
+        removed, freed = 0, 0
+        with self._db() as conn:
+            if older_than is not None:
+                cutoff = time.time() - older_than
+                row = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM texts WHERE last_used < ?", (cutoff,)).fetchone()
+                conn.execute("DELETE FROM texts WHERE last_used < ?", (cutoff,))
+                removed, freed = removed + row[0], freed + row[1]
+
+            if max_bytes is not None:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0]
+                if total > max_bytes:
+                    for key, size in conn.execute("SELECT key, size FROM texts ORDER BY last_used").fetchall():
+                        if total <= max_bytes:
+                            break
+                        conn.execute("DELETE FROM texts WHERE key = ?", (key,))
+                        total -= size
+                        removed, freed = removed + 1, freed + size
+        return removed, freed
+
+    def clear(self):
+        with self._db() as conn:
+            conn.execute("DELETE FROM texts")
+            conn.execute("DELETE FROM counters")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._db() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM texts").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "entries": entries,
+            "size": size,
+            "max_size": self.max_bytes,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+        }
+
+ocr_cache = OcrCache()
+
+def use_ocr_cache(cache: Optional[bool] = None) -> bool:
+    """`cache` if given, else the ocr_cache setting."""
+    return config_manager.settings.ocr_cache if cache is None else cache
+
+def page_count(path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+def page_windows(count: int, window: int) -> List[Tuple[int, int]]:
+    """1-based inclusive (first, last) page ranges of at most `window` pages."""
+    window = max(1, window)
+    return [(first, min(first + window - 1, count)) for first in range(1, count + 1, window)]
+
+def preprocess_image(img, preprocess: str = "none", scale: float = 1.0):
+    """Scale and binarize an image the way `image ocr` does before recognition."""
+    from PIL import Image
+
+    if scale != 1.0:
+        img = img.resize((int(img.width * scale), int(img.height * scale)), Image.Resampling.LANCZOS)
+    if preprocess == "grayscale":
+        img = img.convert("L")
+    elif preprocess == "threshold":
+        img = img.convert("L").point(lambda x: 0 if x < 128 else 255, "1")
+    return img
+
+def _version_number(text: str) -> Optional[str]:
+    """The version in a `--version` style line, as the engine probe reports it."""
+    match = re.search(r"\d+(?:\.\d+)+\S*", text.strip().splitlines()[0] if text.strip() else "")
+    return match.group(0) if match else None
+
+def _tesserocr_version() -> Optional[str]:
+    try:
+        import tesserocr
+    except ImportError:
+        return None
+    return _version_number(tesserocr.tesseract_version())
+
+def ocr_backend(binary_version: Optional[str]) -> Tuple[bool, str]:
+    """
+    Whether to recognize in-process with tesserocr, and the engine and version doing the recognition.
+
+    tesserocr links its own libtesseract, so it is only used when that is
+    the same version as the configured tesseract binary (and the
+    ocr_use_tesserocr setting allows it); otherwise the binary runs. The
+    returned label is what OCR cache keys record.
+    """
+    if binary_version and config_manager.settings.ocr_use_tesserocr:
+        api_version = _tesserocr_version()
+        if api_version and api_version == _version_number(binary_version):
+            return True, f"tesserocr {api_version}"
+    return False, f"tesseract {binary_version}" if binary_version else "tesseract"
+
+# Per-process state of an OCR worker
+_worker_cmd = "tesseract"
+_worker_use_api = False
+_worker_apis: Dict[str, Any] = {}
+
+def _init_worker(tesseract_cmd: str, use_api: bool = False):
+    global _worker_cmd, _worker_use_api
+    _worker_cmd = tesseract_cmd
+    _worker_use_api = use_api
+    _worker_apis.clear()
+
+def _api(lang: str):
+    """This worker's tesserocr API for `lang`, created once; None when the binary is used."""
+    if not _worker_use_api:
+        return None
+    import tesserocr
+
+    if lang not in _worker_apis:
+        _worker_apis[lang] = tesserocr.PyTessBaseAPI(lang=lang)
+    return _worker_apis[lang]
+
+def _recognize(images: List[Any], lang: str) -> List[str]:
+    """
+    OCR a list of PIL images with as little start-up cost as possible.
+
+    When the pool chose tesserocr (see `ocr_backend`) the worker keeps one
+    initialized API per language and recognizes in-process. Otherwise the
+    images are written out and passed to a single tesseract run as a list
+    file, so the binary starts and loads its language data once per batch
+    instead of once per image.
+    """
+    api = _api(lang)
+    if api is not None:
+        texts = []
+        for image in images:
+            api.SetImage(image)
+            texts.append(api.GetUTF8Text())
+        return texts
+
+    with tempfile.TemporaryDirectory(prefix="toolbox_ocr_") as work:
+        names = []
+        for i, image in enumerate(images):
+            names.append(os.path.join(work, f"{i:04d}.png"))
+            image.save(names[-1])
+        source = names[0]
+        if len(names) > 1:
+            source = os.path.join(work, "pages.txt")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write("\n".join(names) + "\n")
+        result = subprocess.run([_worker_cmd, source, "stdout", "-l", lang], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", "replace").strip() or f"tesseract exited with {result.returncode}")
+    # Every page ends with tesseract's page separator, a form feed
+    pages = result.stdout.decode("utf-8", "replace").split("\f")
+    return (pages + [""] * len(images))[:len(images)]
+
+def _ocr_image(path: str, lang: str, preprocess: str, scale: float) -> List[str]:
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return _recognize([preprocess_image(img, preprocess, scale)], lang)
+
+def _ocr_window(path: str, first: int, last: int, lang: str, dpi: int, grayscale: bool,
+                poppler_path: Optional[str], version: Optional[str] = None, cache: bool = False) -> List[str]:
+    """
+    Render pages `first`..`last` and OCR them; runs in a worker process.
+
+    With `cache`, pages whose rendered pixels were recognized before are
+    answered from the OCR cache and only the rest go to tesseract.
+    """
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(path, dpi=dpi, first_page=first, last_page=last, grayscale=grayscale,
+                               poppler_path=poppler_path)
+    try:
+        if not cache:
+            return _recognize(images, lang)
+        keys = [text_key(image_digest(image), lang, version) for image in images]
+        texts = ocr_cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in texts]
+        if missing:
+            recognized = dict(zip((keys[i] for i in missing), _recognize([images[i] for i in missing], lang)))
+            ocr_cache.put_many(recognized)
+            texts.update(recognized)
+        return [texts[key] for key in keys]
+    finally:
+        for image in images:
+            image.close()
+
+class OcrPool:
+    """
+    A pool of resident OCR worker processes.
+
+    Workers are started once and reused for every image and PDF page
+    recognized with the same tesseract binary, across files and commands,
+    so a batch pays for process and language-data start-up per worker
+    rather than per page. The pool also keeps the page throughput.
+
+    `version` is the tesseract binary's version. The pool picks the
+    recognition backend once (`ocr_backend`) and every OCR cache key records
+    the engine and version that actually recognize, so upgrading either does
+    not serve text recognized by the old one.
+    """
+
+    def __init__(self, tesseract_cmd: str, jobs: int = 1, version: Optional[str] = None):
+        self.tesseract_cmd = tesseract_cmd
+        self.jobs = max(1, jobs)
+        self.use_api, self.version = ocr_backend(version)
+        self.executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                            initargs=(tesseract_cmd, self.use_api))
+        self.pages = 0
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args) -> Future:
+        """Run `fn(*args)` (returning a list of page texts) on a worker, counting the pages."""
+        with self._lock:
+            if self._started is None:
+                self._started = time.monotonic()
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self._count)
+        return future
+
+    def _count(self, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self.pages += len(future.result())
+            self._finished = time.monotonic()
+
+    @property
+    def pages_per_second(self) -> float:
+        with self._lock:
+            if self._started is None or self._finished is None or self._finished <= self._started:
+                return 0.0
+            return self.pages / (self._finished - self._started)
+
+    def summary(self) -> str:
+        return f"{self.pages} pages, {self.pages_per_second:.2f} pages/s over {self.jobs} OCR workers"
+
+    def image_text(self, path: str, lang: str = "eng", preprocess: str = "none", scale: float = 1.0,
+                   cache: Optional[bool] = None) -> str:
+        """
+        OCR an image file. With `cache` (default: ocr_cache setting), text of
+        an identical file recognized with the same settings is returned from
+        the OCR cache without touching a worker.
+        """
+        key = None
+        if use_ocr_cache(cache):
+            key = text_key(result_cache.file_digest(path), lang, self.version, preprocess=preprocess, scale=scale)
+            text = ocr_cache.get(key)
+            if text is not None:
+                return text
+        text = self.submit(_ocr_image, path, lang, preprocess, scale).result()[0]
+        if key:
+            ocr_cache.put(key, text)
+        return text
+
+    def pdf_pages(self, path: str, lang: str = "eng", poppler_path: Optional[str] = None, dpi: int = DEFAULT_DPI,
+                  grayscale: bool = True, window: int = DEFAULT_WINDOW, cache: Optional[bool] = None,
+                  progress: Optional[ProgressTask] = None) -> Iterator[str]:
+        """
+        Yield the OCR text of every page of a PDF, in page order.
+
+        Pages are rendered and recognized a window at a time, and at most two
+        windows per worker are in flight, so peak memory depends on `window`
+        and the worker count rather than on the length of the document. Text
+        is yielded as soon as all earlier pages are done. With `cache`
+        (default: ocr_cache setting), pages rendered identically before are
+        not recognized again.
+        """
+        cache = use_ocr_cache(cache)
+        count = page_count(path)
+        if progress:
+            progress.update(total=count)
+        windows = iter(page_windows(count, window))
+        pending: Deque[Future] = deque()
+        page = 0
+
+        def submit_next() -> bool:
+            span = next(windows, None)
+            if span is None:
+                return False
+            pending.append(self.submit(_ocr_window, path, *span, lang, dpi, grayscale, poppler_path,
+                                       self.version, cache))
+            return True
+
+        while len(pending) < 2 * self.jobs and submit_next():
+            pass
+        try:
+            while pending:
+                texts = pending.popleft().result()
+                submit_next()
+                for text in texts:
+                    page += 1
+                    if progress:
+                        progress.advance(page=page)
+                    yield text
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+_pools: Dict[Tuple[str, int], OcrPool] = {}
+_pools_lock = threading.Lock()
+
+def get_ocr_pool(tesseract_cmd: str, jobs: int = 0, version: Optional[str] = None):
+    """The resident OcrPool for this binary and worker count (0 = `ocr_jobs` default): the local server's under `serve-local`."""
+    host = resident.host()
+    if host is not None:
+        return host.ocr_pool(tesseract_cmd, jobs, version)
+    return load_ocr_pool(tesseract_cmd, jobs, version)
+
+def load_ocr_pool(tesseract_cmd: str, jobs: int = 0, version: Optional[str] = None) -> OcrPool:
+    """The OcrPool for this binary and worker count in this process, started on first use."""
+    key = (tesseract_cmd, ocr_jobs(jobs))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = OcrPool(*key, version=version)
+        return _pools[key]
+
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
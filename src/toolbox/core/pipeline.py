@@ -0,0 +1,95 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+_DONE = object()
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+def read_exact(read: Callable[[int], bytes], size: int) -> bytes:
+    """Read exactly `size` bytes from a pipe, or fewer only at end of stream."""
+    parts: List[bytes] = []
+    remaining = size
+    while remaining:
+        chunk = read(remaining)
+        if not chunk:
+            break
+        parts.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(parts)
+
+def run_stages(source: Iterable[Any], stages: Sequence[Callable[[Any], Any]], maxsize: int = 4) -> Iterator[Any]:
+    """
+    Run `source` and each stage on its own thread, linked by bounded queues.
+
+    Items flow through the stages in order and come out of the returned
+    iterator, so decoding, compute and encoding overlap while at most
+    `maxsize` items wait between any two stages. An exception in any stage
+    stops the others and is raised from the iterator; closing the iterator
+    early stops them too.
+    """
+    queues = [queue.Queue(maxsize) for _ in range(len(stages) + 1)]
+    stop = threading.Event()
+
+    def put(q: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def produce():
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+            put(queues[0], _DONE)
+        except BaseException as e:
+            put(queues[0], _Failure(e))
+
+    def work(stage: Callable[[Any], Any], inbox: queue.Queue, outbox: queue.Queue):
+        while True:
+            item = get(inbox)
+            if item is _DONE or isinstance(item, _Failure):
+                put(outbox, item)
+                return
+            try:
+                result = stage(item)
+            except BaseException as e:
+                put(outbox, _Failure(e))
+                return
+            if not put(outbox, result):
+                return
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [
+        threading.Thread(target=work, args=(stage, queues[i], queues[i + 1]), daemon=True)
+        for i, stage in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = get(queues[-1])
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
@@ -1,8 +1,14 @@
 import importlib
+import json
+import os
 import pkgutil
 from abc import ABC, abstractmethod
-from typing import Dict, List, Type
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
 from pydantic import BaseModel
+from toolbox import __version__
+
+MANIFEST_VERSION = 1
 
 class PluginMetadata(BaseModel):
     name: str
@@ -25,8 +31,12 @@ class BasePlugin(ABC):
         pass
 
 class PluginManager:
-    def __init__(self):
+    def __init__(self, manifest_path: Optional[Path] = None):
         self.plugins: Dict[str, BasePlugin] = {}
+        self.manifest_path = manifest_path or Path.home() / ".toolbox" / "plugin_manifest.json"
+        self.failed: Set[str] = set()
+        self._module_plugins: Dict[str, List[BasePlugin]] = {}
+        self._registered: Set[Tuple[str, int]] = set()
 
     def create_scaffold(self, plugin_name: str):
         """Create a new plugin directory with a template __init__.py."""
@@ -67,22 +77,112 @@ class {plugin_name.capitalize()}Plugin(BasePlugin):
         
         return str(new_plugin_dir)
 
+    def discover(self, package_name: str = "toolbox.plugins") -> List[str]:
+        """Return the module names of all plugin packages without importing them."""
+        package = importlib.import_module(package_name)
+        return [f"{package_name}.{name}" for _, name, ispkg in pkgutil.iter_modules(package.__path__) if ispkg]
+
+    def load_plugin(self, module_name: str) -> List[BasePlugin]:
+        """Import a single plugin module and instantiate the plugins it defines."""
+        if module_name in self._module_plugins:
+            return self._module_plugins[module_name]
+
+        instances: List[BasePlugin] = []
+        try:
+            module = importlib.import_module(module_name)
+            # Look for a class that inherits from BasePlugin
+            for item_name in dir(module):
+                item = getattr(module, item_name)
+                if (isinstance(item, type) and 
+                    issubclass(item, BasePlugin) and 
+                    item is not BasePlugin):
+                    plugin_instance = item()
+                    self.plugins[plugin_instance.metadata.name] = plugin_instance
+                    instances.append(plugin_instance)
+        except Exception as e:
+            self.failed.add(module_name)
+            print(f"Failed to load plugin {module_name.rsplit('.', 1)[-1]}: {e}")
+            return instances
+
+        self._module_plugins[module_name] = instances
+        return instances
+
     def load_plugins(self, package_name: str = "toolbox.plugins"):
+        for module_name in self.discover(package_name):
+            self.load_plugin(module_name)
+
+    def register_module(self, module_name: str, group) -> Dict[str, str]:
+        """
+        Load a plugin module and register its commands on `group`.
+        Returns the newly added top-level commands mapped to their help text.
+        """
+        key = (module_name, id(group))
+        if key in self._registered:
+            return {}
+
+        before = set(group.commands)
+        for plugin in self.load_plugin(module_name):
+            plugin.register_commands(group)
+        if module_name not in self.failed:
+            self._registered.add(key)
+
+        return {
+            name: group.commands[name].short_help or group.commands[name].help or ""
+            for name in sorted(set(group.commands) - before)
+        }
+
+    def _manifest_key(self, package_name: str) -> Dict[str, int]:
+        """Modification times of every plugin source file, used to validate the manifest."""
         package = importlib.import_module(package_name)
-        for _, name, ispkg in pkgutil.iter_modules(package.__path__):
-            if ispkg:
-                plugin_module_name = f"{package_name}.{name}"
-                try:
-                    module = importlib.import_module(plugin_module_name)
-                    # Look for a class that inherits from BasePlugin
-                    for item_name in dir(module):
-                        item = getattr(module, item_name)
-                        if (isinstance(item, type) and 
-                            issubclass(item, BasePlugin) and 
-                            item is not BasePlugin):
-                            plugin_instance = item()
-                            self.plugins[plugin_instance.metadata.name] = plugin_instance
-                except Exception as e:
-                    print(f"Failed to load plugin {name}: {e}")
+        mtimes: Dict[str, int] = {}
+        for finder, name, ispkg in pkgutil.iter_modules(package.__path__):
+            if not ispkg:
+                continue
+            plugin_dir = os.path.join(getattr(finder, "path", ""), name)
+            try:
+                with os.scandir(plugin_dir) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".py") and entry.is_file():
+                            mtimes[f"{name}/{entry.name}"] = entry.stat().st_mtime_ns
+            except OSError:
+                mtimes[name] = 0
+        return mtimes
+
+    def load_manifest(self, package_name: str = "toolbox.plugins") -> Optional[Dict[str, Any]]:
+        """
+        Return the cached manifest, or None if it is missing or any plugin
+        module changed since it was written. The manifest maps "modules" to
+        {module: {command: help}} and lists modules that failed to import
+        under "failed" so they can be retried on the next start.
+        """
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if (data.get("manifest_version") != MANIFEST_VERSION or
+                data.get("toolbox_version") != __version__ or
+                data.get("package") != package_name or
+                data.get("key") != self._manifest_key(package_name)):
+            return None
+        return data
+
+    def save_manifest(self, modules: Dict[str, Dict[str, str]], package_name: str = "toolbox.plugins"):
+        data = {
+            "manifest_version": MANIFEST_VERSION,
+            "toolbox_version": __version__,
+            "package": package_name,
+            "key": self._manifest_key(package_name),
+            "modules": {name: cmds for name, cmds in modules.items() if name not in self.failed},
+            "failed": sorted(name for name in modules if name in self.failed),
+        }
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            # A read-only home only costs us the fast path
+            pass
 
 plugin_manager = PluginManager()
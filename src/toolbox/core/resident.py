@@ -0,0 +1,225 @@
+import multiprocessing
+import os
+from multiprocessing.managers import BaseManager, BaseProxy, IteratorProxy
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from toolbox.core.logging import logger
+
+class ModelInput(NamedTuple):
+    """What TiledUpscaler reads of an ONNX Runtime NodeArg, in a form that can cross processes."""
+    name: str
+    shape: List[Any]
+
+class _Recorder:
+    """Stands in for a ProgressTask in the host and records the calls made on it."""
+
+    def __init__(self):
+        self.calls: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+def _events(run: Callable[[Any], Iterator[Any]]) -> Iterator[Tuple[str, Any]]:
+    """Items of a generator that reports to a ProgressTask, interleaved with its progress calls in order."""
+    progress = _Recorder()
+    for item in run(progress):
+        yield from (("progress", call) for call in progress.calls)
+        progress.calls.clear()
+        yield "item", item
+    yield from (("progress", call) for call in progress.calls)
+
+def _replay(events: Iterator[Tuple[str, Any]], progress: Any) -> Iterator[Any]:
+    """Yield the items of `_events` and apply its progress calls to the caller's ProgressTask."""
+    for kind, value in events:
+        if kind == "item":
+            yield value
+        elif progress is not None:
+            name, args, kwargs = value
+            getattr(progress, name)(*args, **kwargs)
+
+class _HostedSession:
+    def __init__(self, model_path: str, gpu: bool):
+        from toolbox.core.inference import load_session
+
+        self.session = load_session(model_path, gpu)
+
+    def get_inputs(self) -> List[ModelInput]:
+        return [ModelInput(arg.name, list(arg.shape)) for arg in self.session.get_inputs()]
+
+    def run(self, output_names: Optional[Sequence[str]], feeds: dict) -> list:
+        return self.session.run(output_names, feeds)
+
+class _HostedTranscriber:
+    def __init__(self, model: str, device: Optional[str] = None, jobs: int = 0):
+        from toolbox.core.transcribe import default_device, default_jobs, load_transcriber
+
+        device = device or default_device()
+        self.transcriber = load_transcriber(model, device, jobs or default_jobs(device))
+
+    def warm(self):
+        self.transcriber.warm()
+
+    def transcribe_events(self, samples, chunk_length: float, language: Optional[str]) -> Iterator[Tuple[str, Any]]:
+        return _events(lambda progress: self.transcriber.transcribe(
+            samples, chunk_length=chunk_length, language=language, progress=progress))
+
+class _HostedOcrPool:
+    def __init__(self, tesseract_cmd: str, jobs: int, version: Optional[str]):
+        from toolbox.core.ocr import load_ocr_pool
+
+        self.pool = load_ocr_pool(tesseract_cmd, jobs, version)
+
+    def image_text(self, *args, **kwargs) -> str:
+        return self.pool.image_text(*args, **kwargs)
+
+    def pdf_page_events(self, path: str, lang: str, **kwargs) -> Iterator[Tuple[str, Any]]:
+        return _events(lambda progress: self.pool.pdf_pages(path, lang, progress=progress, **kwargs))
+
+    def pages(self) -> int:
+        return self.pool.pages
+
+    def summary(self) -> str:
+        return self.pool.summary()
+
+class SessionProxy(BaseProxy):
+    """The host's ONNX Runtime session for a model, with the part of the session API TiledUpscaler uses."""
+    _exposed_ = ("get_inputs", "run")
+
+    def get_inputs(self) -> List[ModelInput]:
+        return self._callmethod("get_inputs")
+
+    def run(self, output_names: Optional[Sequence[str]], feeds: dict) -> list:
+        return self._callmethod("run", (output_names, feeds))
+
+class TranscriberProxy(BaseProxy):
+    """The host's Transcriber; `transcribe` streams segments and reports progress like the local one."""
+    _exposed_ = ("warm", "transcribe_events")
+    _method_to_typeid_ = {"transcribe_events": "Iterator"}
+
+    def warm(self):
+        self._callmethod("warm")
+
+    def transcribe(self, samples, chunk_length: float, language: Optional[str] = None,
+                   progress: Any = None) -> Iterator[dict]:
+        return _replay(self._callmethod("transcribe_events", (samples, chunk_length, language)), progress)
+
+class OcrPoolProxy(BaseProxy):
+    """The host's OcrPool, with the API the image and pdf plugins use."""
+    _exposed_ = ("image_text", "pdf_page_events", "pages", "summary")
+    _method_to_typeid_ = {"pdf_page_events": "Iterator"}
+
+    @property
+    def pages(self) -> int:
+        return self._callmethod("pages")
+
+    def summary(self) -> str:
+        return self._callmethod("summary")
+
+    def image_text(self, path: str, lang: str = "eng", preprocess: str = "none", scale: float = 1.0,
+                   cache: Optional[bool] = None) -> str:
+        from toolbox.core.ocr import use_ocr_cache
+
+        # The setting is resolved here: the server re-reads the config, the host does not
+        return self._callmethod("image_text", (path, lang, preprocess, scale), {"cache": use_ocr_cache(cache)})
+
+    def pdf_pages(self, path: str, lang: str = "eng", progress: Any = None, cache: Optional[bool] = None,
+                  **kwargs) -> Iterator[str]:
+        from toolbox.core.ocr import use_ocr_cache
+
+        kwargs["cache"] = use_ocr_cache(cache)
+        return _replay(self._callmethod("pdf_page_events", (path, lang), kwargs), progress)
+
+class ModelHost(BaseManager):
+    """
+    Process that keeps models loaded for the commands a local server runs.
+
+    `serve-local` runs every command in a forked child, and a fork cannot
+    use the server's ONNX Runtime sessions or worker pools: their threads
+    do not survive it. So the server starts this host once, the host owns
+    the sessions, Whisper transcribers and OCR pools, and children reach
+    them through proxies. Each model is then loaded once per server rather
+    than once per request.
+    """
+
+# One instance per set of arguments for the life of the host, whoever asks for it
+_hosted: dict = {}
+
+def _resident(cls: type, *args) -> Any:
+    key = (cls, *args)
+    if key not in _hosted:
+        _hosted[key] = cls(*args)
+    return _hosted[key]
+
+def _session(model_path: str, gpu: bool) -> _HostedSession:
+    return _resident(_HostedSession, model_path, gpu)
+
+def _transcriber(model: str, device: Optional[str] = None, jobs: int = 0) -> _HostedTranscriber:
+    return _resident(_HostedTranscriber, model, device, jobs)
+
+def _ocr_pool(tesseract_cmd: str, jobs: int, version: Optional[str]) -> _HostedOcrPool:
+    return _resident(_HostedOcrPool, tesseract_cmd, jobs, version)
+
+ModelHost.register("session", _session, SessionProxy)
+ModelHost.register("transcriber", _transcriber, TranscriberProxy)
+ModelHost.register("ocr_pool", _ocr_pool, OcrPoolProxy)
+ModelHost.register("Iterator", proxytype=IteratorProxy, create_method=False)
+
+# Where the server's host listens; inherited by the server's children
+_address: Any = None
+_authkey: Optional[bytes] = None
+_host: Optional[ModelHost] = None
+_host_owner: Optional[Tuple[int, Any]] = None
+
+def _preload(names: Sequence[str]):
+    """Load the named models (AVAILABLE_MODELS keys) in the host before it serves anything."""
+    from toolbox.core.ai import AVAILABLE_MODELS, get_model_path, is_gpu_available
+
+    for name in names:
+        info = AVAILABLE_MODELS.get(name)
+        try:
+            if info and info["type"] == "image-upscale":
+                _session(str(get_model_path(info["name"], info["url"])), is_gpu_available())
+            elif info and info["type"] == "audio-stt":
+                _transcriber(name.split("-", 1)[1]).warm()
+            else:
+                logger.warning(f"Cannot preload '{name}': not an upscale or Whisper model")
+                continue
+            logger.info(f"Preloaded {name}")
+        except Exception as e:
+            logger.warning(f"Could not preload {name}: {e}")
+
+def start(preload: Sequence[str] = (), ctx: Any = None) -> ModelHost:
+    """
+    Start the model host for this process and the children it forks.
+
+    The host is a fresh interpreter (spawned) unless `ctx` says otherwise,
+    so it shares no threads or locks with the server. `preload` models are
+    loaded before this returns.
+    """
+    global _address, _authkey
+    authkey = os.urandom(32)
+    manager = ModelHost(authkey=authkey, ctx=ctx or multiprocessing.get_context("spawn"))
+    manager.start(initializer=_preload, initargs=(list(preload),))
+    _address, _authkey = manager.address, authkey
+    return manager
+
+def stop(manager: ModelHost):
+    global _address, _authkey
+    _address = _authkey = None
+    manager.shutdown()
+
+def host() -> Optional[ModelHost]:
+    """This process's connection to the server's model host; None outside a server or when it is gone."""
+    global _host, _host_owner
+    if _address is None:
+        return None
+    # Connections are per process: a forked child must not share its parent's socket
+    if _host_owner != (os.getpid(), _address):
+        manager = ModelHost(address=_address, authkey=_authkey)
+        try:
+            manager.connect()
+        except OSError as e:
+            logger.warning(f"Model host unavailable, loading models locally: {e}")
+            return None
+        _host, _host_owner = manager, (os.getpid(), _address)
+    return _host
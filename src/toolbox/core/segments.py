@@ -0,0 +1,247 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from toolbox.core.config import config_manager
+from toolbox.core.engine import BaseEngine, EngineError, console, engine_registry
+from toolbox.core.events import event_bus
+from toolbox.core import media
+
+# Cuts are placed this far before each keyframe so rounding in the reported
+# times can never make a seek skip the keyframe itself
+SEEK_MARGIN = 0.0005
+
+def plan_segments(keyframes: Sequence[float], total: float, count: int) -> List[Tuple[float, Optional[float]]]:
+    """
+    Split [0, total) into at most `count` spans that start on keyframes.
+
+    Each boundary is the keyframe closest to an even split, so every span
+    decodes independently. The last span is open-ended (end None) so
+    nothing after the final boundary is dropped.
+    """
+    if count < 2 or total <= 0:
+        return [(0.0, None)]
+    candidates = [t for t in keyframes if 0 < t < total]
+    boundaries: List[float] = []
+    for i in range(1, count):
+        if not candidates:
+            break
+        target = total * i / count
+        best = min(candidates, key=lambda t: abs(t - target))
+        if not boundaries or best > boundaries[-1]:
+            boundaries.append(best)
+    starts = [0.0, *boundaries]
+    ends: List[Optional[float]] = [*boundaries, None]
+    return list(zip(starts, ends))
+
+def _check_output(output: str):
+    """Fail before any part is encoded if the final join would refuse to overwrite `output`."""
+    if not config_manager.settings.auto_overwrite and os.path.exists(output):
+        raise EngineError(f"{output} already exists; remove it or enable auto_overwrite to replace it")
+
+def transcode_segmented(ffmpeg: BaseEngine, path: str, output: str, video_args: Sequence[str],
+                        audio_args: Sequence[str] = (), inputs: Sequence[str] = (), segments: int = 4,
+                        label: str = "Encoding") -> bool:
+    """
+    Encode `path` as concurrently encoded keyframe-aligned segments joined without re-encoding.
+
+    `video_args` are the options that produce the video stream (filters,
+    codec, quality); `inputs` are extra `-i` inputs they refer to, such as an
+    overlay image. Segments are encoded video-only, each with an equal share
+    of the cores, and the audio of the original is muxed in with
+    `audio_args` while the segments are concatenated with stream copy.
+    Returns False without writing anything when the input cannot be split,
+    so the caller can fall back to a single-pass encode.
+    """
+    _check_output(output)
+    if not engine_registry.get("ffprobe").is_available:
+        console.print("[yellow]FFprobe not found; encoding in a single pass.[/yellow]")
+        return False
+    info = media.probe(path, keyframes=True)
+    if not info.duration or not info.keyframes:
+        return False
+    plan = plan_segments(info.keyframes, info.duration, segments)
+    if len(plan) < 2:
+        console.print("[yellow]Input has too few keyframes to split; encoding in a single pass.[/yellow]")
+        return False
+
+    limit = ffmpeg.limiter.limit("ffmpeg") if ffmpeg.limiter else 0
+    jobs = min(len(plan), limit) if limit > 0 else len(plan)
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    console.print(f"[dim]Encoding {len(plan)} segments, {jobs} at a time with {threads} threads each[/dim]")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="toolbox_segments_"))
+    try:
+        parts = [work_dir / f"part_{i:04d}.mkv" for i in range(len(plan))]
+
+        def encode(index: int):
+            start, end = plan[index]
+            seek_at = start - SEEK_MARGIN if start else 0.0
+            seek = ["-ss", f"{seek_at:.6f}"] if start else []
+            span = ["-t", f"{end - SEEK_MARGIN - seek_at:.6f}"] if end is not None else []
+            extra = [arg for item in inputs for arg in ("-i", item)]
+            ffmpeg.run([
+                "-y", *seek, *span, "-i", path, *extra,
+                *video_args, "-an", "-threads", str(threads), str(parts[index]),
+            ])
+            progress.advance()
+
+        with event_bus.task(label, total=len(plan), unit="segments") as progress:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                # list() re-raises the first failed encode
+                list(executor.map(encode, range(len(plan))))
+
+        concat_list = work_dir / "segments.txt"
+        media.write_concat_list(parts, concat_list)
+        # Never prompt on an existing output: the engine's stdin is not a terminal
+        overwrite = "-y" if config_manager.settings.auto_overwrite else "-n"
+        ffmpeg.run([
+            overwrite, "-f", "concat", "-safe", "0", "-i", str(concat_list), "-i", path,
+            "-map", "0:v", "-map", "1:a?", "-c:v", "copy", *audio_args, output,
+        ])
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# Encoders used to re-encode the partial GOPs at trim boundaries, by source codec,
+# with settings that keep the re-encoded frames close to the copied ones
+BOUNDARY_ENCODERS = {
+    "h264": ("libx264", ["-crf", "16"]),
+    "hevc": ("libx265", ["-crf", "18"]),
+    "vp9": ("libvpx-vp9", ["-crf", "20", "-b:v", "0"]),
+}
+
+# Encoder profiles for the profiles ffprobe reports, so boundary parts declare
+# the same profile as the GOPs copied between them
+BOUNDARY_PROFILES = {
+    "h264": {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high",
+             "High 10": "high10", "High 4:2:2": "high422", "High 4:4:4 Predictive": "high444"},
+    "hevc": {"Main": "main", "Main 10": "main10"},
+}
+
+# Bitstream filters that put a codec's parameter sets in front of every keyframe,
+# as (copied parts, re-encoded parts). The concat demuxer keeps only the first
+# part's out-of-band headers, so every part has to carry its own in-band:
+# copied GOPs convert the container's headers, re-encoded parts repeat the
+# encoder's (which x264 and x265 emit in Annex B form). VP9 frames need none.
+INBAND_HEADERS = {
+    "h264": ("h264_mp4toannexb", "dump_extra"),
+    "hevc": ("hevc_mp4toannexb", "dump_extra"),
+}
+
+def plan_trim(keyframes: Sequence[float], start: float, end: Optional[float]) -> List[Tuple[float, Optional[float], bool]]:
+    """
+    Split [start, end) into (start, end, copy) spans for a smart trim.
+
+    Whole GOPs between the first keyframe at or after `start` and the last
+    keyframe at or before `end` are copied; the partial GOPs before and
+    after them are re-encoded. A range without a whole GOP in it is one
+    re-encoded span. `end` None runs to the end of the input.
+    """
+    inner = [t for t in keyframes if t >= start - SEEK_MARGIN and (end is None or t <= end + SEEK_MARGIN)]
+    if not inner:
+        return [(start, end, False)]
+    first = inner[0]
+    last = inner[-1] if end is not None else None
+    if last is not None and last - first <= SEEK_MARGIN:
+        return [(start, end, False)]
+
+    spans: List[Tuple[float, Optional[float], bool]] = []
+    if first - start > SEEK_MARGIN:
+        spans.append((start, first, False))
+    spans.append((first, last, True))
+    if last is not None and end - last > SEEK_MARGIN:
+        spans.append((last, end, False))
+    return spans
+
+def _copy_filter(bsf: Optional[str], until: Optional[float]) -> List[str]:
+    """
+    `-bsf:v` for a copied span: in-band headers, and drop packets outside the span by presentation time.
+
+    `-t` stops a stream copy by decoding order, which lets through the
+    keyframe closing the span (and frames decoded after it) whenever the
+    source has B-frames. Leading pictures of an open GOP reference the GOP
+    before the cut, so they must not be copied either. Both belong to the
+    neighbouring re-encoded parts. Timestamps here are relative to the seek
+    point, which lies SEEK_MARGIN past the span's first keyframe; leading
+    pictures are at least a frame earlier.
+    """
+    drop = f"lt(pts*tb\\,{-4 * SEEK_MARGIN:.6f})"
+    if until is not None:
+        drop += f"+gte(pts*tb\\,{until:.6f})"
+    return ["-bsf:v", ",".join([*([bsf] if bsf else []), f"noise=drop={drop}"])]
+
+def smart_trim(ffmpeg: BaseEngine, path: str, output: str, start: float, end: Optional[float],
+               audio_args: Sequence[str] = ("-c:a", "copy"), label: str = "Trimming") -> bool:
+    """
+    Cut [start, end) out of `path` frame-accurately at close to stream-copy speed.
+
+    Every part is read with input seeking, so nothing before the cut is
+    decoded. Whole GOPs inside the range are stream-copied; only the
+    partial GOPs at each boundary are re-encoded, with the source codec,
+    profile and pixel format. Each part carries its codec headers in-band,
+    so the parts concatenate without re-encoding into a stream every
+    decoder can follow. Audio is cut from the same range with `audio_args`.
+    Returns False without writing anything when the input has no keyframe
+    index or its codec has no matching encoder, so the caller can fall back
+    to a plain cut.
+    """
+    _check_output(output)
+    if not engine_registry.get("ffprobe").is_available:
+        console.print("[yellow]FFprobe not found; falling back to a keyframe cut.[/yellow]")
+        return False
+    info = media.probe(path, keyframes=True)
+    video = info.video
+    if video is None or not info.keyframes:
+        return False
+    encoder, quality = BOUNDARY_ENCODERS.get(video.codec, (None, []))
+    copy_bsf, encode_bsf = INBAND_HEADERS.get(video.codec, (None, None))
+    needed = [("encoders", encoder), ("bsfs", "noise"), *(("bsfs", bsf) for bsf in (copy_bsf, encode_bsf) if bsf)]
+    if encoder is None or not all(ffmpeg.has_capability(kind, name) for kind, name in needed):
+        console.print(f"[yellow]No encoder for {video.codec} boundaries; falling back to a keyframe cut.[/yellow]")
+        return False
+    if info.duration and end is not None and end >= info.duration:
+        end = None
+
+    plan = plan_trim(info.keyframes, start, end)
+    profile = BOUNDARY_PROFILES.get(video.codec, {}).get(video.profile or "")
+    encode = ["-c:v", encoder, *quality,
+              *(["-profile:v", profile] if profile else []),
+              *(["-pix_fmt", video.pix_fmt] if video.pix_fmt else []),
+              *(["-bsf:v", encode_bsf] if encode_bsf else [])]
+    work_dir = Path(tempfile.mkdtemp(prefix="toolbox_trim_"))
+    try:
+        parts = [work_dir / f"part_{i:02d}.mkv" for i in range(len(plan))]
+        with event_bus.task(label, total=len(plan), unit="parts") as progress:
+            for (span_start, span_end, copy), part in zip(plan, parts):
+                if copy:
+                    # A keyframe seek lands on the keyframe at or before the position,
+                    # so aim just past it, and stop just short of the keyframe closing
+                    # the span: the next part starts from that one
+                    seek_at = span_start + SEEK_MARGIN if span_start else 0.0
+                    stop_at = span_end - SEEK_MARGIN if span_end is not None else None
+                    codec = ["-c:v", "copy", *_copy_filter(copy_bsf, None if stop_at is None else stop_at - seek_at)]
+                else:
+                    seek_at, stop_at = span_start, span_end
+                    codec = encode
+                seek = ["-ss", f"{seek_at:.6f}"] if seek_at else []
+                span = ["-t", f"{stop_at - seek_at:.6f}"] if stop_at is not None else []
+                ffmpeg.run(["-y", *seek, *span, "-i", path, "-map", "0:v:0", *codec, "-an", str(part)])
+                progress.advance()
+
+        concat_list = work_dir / "parts.txt"
+        media.write_concat_list(parts, concat_list)
+        audio_seek = ["-ss", f"{start:.6f}"] if start else []
+        audio_span = ["-t", f"{end - start:.6f}"] if end is not None else []
+        overwrite = "-y" if config_manager.settings.auto_overwrite else "-n"
+        ffmpeg.run([
+            overwrite, "-f", "concat", "-safe", "0", "-i", str(concat_list),
+            *audio_seek, *audio_span, "-i", path,
+            "-map", "0:v", "-map", "1:a?", "-c:v", "copy", *audio_args, output,
+        ])
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,230 @@
+import os
+import signal
+import socket
+import sys
+import threading
+import _thread
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import click
+import rich
+from rich.console import Console
+
+from toolbox.client import EXIT_CODE, HEADER, INTERRUPT, decode_request, default_socket_path, recv_exact
+from toolbox.core import resident
+from toolbox.core.config import config_manager
+from toolbox.core.engine import engine_registry
+from toolbox.core.logging import logger
+
+class ServerError(Exception):
+    """Base class for resident server errors."""
+    pass
+
+class LocalServer:
+    """
+    Resident ToolBox process that serves commands over a Unix socket.
+
+    Plugins, engine paths and configuration are loaded once in the server.
+    Each request is run in a forked child that inherits this warm state and
+    the client's stdin/stdout/stderr, so commands behave exactly as if they
+    had been run from the client's shell. Models live in a ModelHost next
+    to the server, so they stay loaded across requests too.
+    """
+
+    def __init__(self, cli_group: click.Group, socket_path: Optional[Path] = None):
+        if not hasattr(os, "fork") or not hasattr(socket, "recv_fds"):
+            raise ServerError("serve-local requires a POSIX platform with Unix socket fd passing.")
+        self.cli_group = cli_group
+        self.socket_path = Path(socket_path or default_socket_path())
+        self.sock: Optional[socket.socket] = None
+        self.models: Optional[resident.ModelHost] = None
+        self._config_mtime = self._read_config_mtime()
+
+    def warm_up(self):
+        """Import every plugin, resolve engine paths and start the model host before accepting requests."""
+        if hasattr(self.cli_group, "load_all_commands"):
+            self.cli_group.load_all_commands()
+        for engine in engine_registry.engines.values():
+            engine.path
+        # Started before any request is forked, so every child knows where to find it
+        self.models = resident.start(config_manager.settings.server_preload)
+
+    def serve_forever(self):
+        self._bind()
+        # Treat SIGTERM like Ctrl+C so the socket file is removed on shutdown
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        logger.info(f"ToolBox server listening on {self.socket_path}")
+        try:
+            while True:
+                try:
+                    conn, _ = self.sock.accept()
+                except socket.timeout:
+                    self._reap()
+                    continue
+                try:
+                    self._dispatch(conn)
+                except Exception as e:
+                    logger.error(f"Failed to dispatch request: {e}")
+                finally:
+                    conn.close()
+                self._reap()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.models is not None:
+            resident.stop(self.models)
+            self.models = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def _secure_parent(self):
+        """Create the socket's directory private, or check that an existing one is ours and not shared-writable."""
+        parent = self.socket_path.parent
+        parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = parent.stat()
+        # Other users who can write here could swap the socket for their own
+        if st.st_uid != os.getuid() or st.st_mode & 0o022:
+            raise ServerError(f"{parent} must be owned by you and not writable by other users.")
+
+    def _bind(self):
+        self._secure_parent()
+        if self.socket_path.exists():
+            # Refuse to steal the socket of a live server, but clean up stale ones
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+                raise ServerError(f"A ToolBox server is already running on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                self.socket_path.unlink()
+            finally:
+                probe.close()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Bind with the socket already 0600, so there is no window in which others can connect
+        umask = os.umask(0o177)
+        try:
+            self.sock.bind(str(self.socket_path))
+        finally:
+            os.umask(umask)
+        self.sock.listen(64)
+        # Wake up periodically to reap finished children
+        self.sock.settimeout(5.0)
+
+    def _read_config_mtime(self) -> Optional[float]:
+        try:
+            return config_manager.config_path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _refresh_config(self):
+        mtime = self._read_config_mtime()
+        if mtime != self._config_mtime:
+            config_manager.settings = config_manager._load_config()
+            self._config_mtime = mtime
+
+    def _reap(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+    def _dispatch(self, conn: socket.socket):
+        conn.settimeout(None)
+        header, fds, _, _ = socket.recv_fds(conn, HEADER.size, 3)
+        try:
+            if len(fds) != 3:
+                raise ServerError("Client did not pass stdin/stdout/stderr")
+            header += recv_exact(conn, HEADER.size - len(header))
+            argv, cwd, env = decode_request(recv_exact(conn, HEADER.unpack(header)[0]))
+
+            self._refresh_config()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                try:
+                    self._run_child(conn, argv, cwd, env, fds)
+                finally:
+                    os._exit(1)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def _run_child(self, conn: socket.socket, argv: List[str], cwd: str, env: Dict[str, str], fds: List[int]):
+        """Run one command in the forked child. Never returns."""
+        code = 1
+        try:
+            self.sock.close()
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(env)
+
+            sys.stdin = open(0, "r", closefd=False)
+            sys.stdout = open(1, "w", buffering=1, closefd=False)
+            sys.stderr = open(2, "w", buffering=1, closefd=False)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            self._reset_consoles()
+
+            threading.Thread(target=self._watch_client, args=(conn,), daemon=True).start()
+
+            try:
+                self.cli_group.main(args=argv, prog_name="toolbox")
+                code = 0
+            except SystemExit as e:
+                if e.code is None:
+                    code = 0
+                elif isinstance(e.code, int):
+                    code = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    code = 1
+        except BaseException as e:
+            try:
+                print(f"toolbox server: {e}", file=sys.stderr)
+            except Exception:
+                pass
+        finally:
+            # Late interrupts from the client hanging up must not escape the child
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                conn.sendall(EXIT_CODE.pack(code))
+            except Exception:
+                pass
+            os._exit(code)
+
+    @staticmethod
+    def _watch_client(conn: socket.socket):
+        """Interrupt the command if the client is interrupted or goes away."""
+        try:
+            data = conn.recv(1)
+        except OSError:
+            data = b""
+        if data == INTERRUPT or not data:
+            _thread.interrupt_main()
+
+    @staticmethod
+    def _reset_consoles():
+        """Re-detect terminal, width and colour support against the client's stdio and env."""
+        rich.reconfigure()
+        seen = set()
+        for name, module in list(sys.modules.items()):
+            if not name.startswith("toolbox") or module is None:
+                continue
+            candidate = getattr(module, "console", None)
+            if isinstance(candidate, Console) and id(candidate) not in seen:
+                seen.add(id(candidate))
+                candidate.__init__()
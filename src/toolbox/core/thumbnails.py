@@ -0,0 +1,116 @@
+import bisect
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from toolbox.core.engine import BaseEngine
+from toolbox.core.events import event_bus
+
+# Frames grabbed per FFmpeg process: enough to amortize start-up, few enough to spread over workers
+SEEKS_PER_RUN = 16
+
+def frame_times(duration: float, interval: float) -> List[float]:
+    """Timestamps every `interval` seconds from the start, all inside the media."""
+    count = int(duration // interval) + 1
+    return [round(i * interval, 6) for i in range(count) if i * interval < duration]
+
+def snap_to_keyframes(times: Sequence[float], keyframes: Sequence[float]) -> List[float]:
+    """
+    Move every time to its nearest keyframe, dropping duplicates.
+
+    A seek that lands on a keyframe decodes exactly one frame, so snapped
+    extraction costs one decode per thumbnail whatever the GOP length.
+    """
+    if not keyframes:
+        return list(times)
+    snapped: List[float] = []
+    for t in times:
+        i = bisect.bisect_left(keyframes, t)
+        nearest = min(keyframes[max(0, i - 1):i + 1], key=lambda k: abs(k - t))
+        if not snapped or nearest > snapped[-1]:
+            snapped.append(nearest)
+    return snapped
+
+def extract_at(ffmpeg: BaseEngine, path: str, times: Sequence[float], outputs: Sequence[str],
+               jobs: int = 1, video_args: Sequence[str] = (), label: str = "Extracting frames"):
+    """
+    Write the frame at each of `times` to the matching entry of `outputs`.
+
+    Every frame is read with input seeking, so only the GOP around it is
+    decoded instead of the whole stream. Timestamps are sharded into runs of
+    `SEEKS_PER_RUN` (each one FFmpeg process with one seeked input per
+    frame) and the runs are spread over `jobs` concurrent workers.
+    """
+    runs = [range(i, min(i + SEEKS_PER_RUN, len(times))) for i in range(0, len(times), SEEKS_PER_RUN)]
+
+    with event_bus.task(label, total=len(times), unit="frames") as progress:
+        def grab(indices: range):
+            args = ["-y"]
+            for i in indices:
+                args += ["-ss", f"{times[i]:.6f}", "-i", path]
+            for k, i in enumerate(indices):
+                args += ["-map", f"{k}:v:0", "-frames:v", "1", *video_args, outputs[i]]
+            ffmpeg.run(args)
+            progress.advance(len(indices))
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            # list() re-raises the first failed run
+            list(executor.map(grab, runs))
+
+def _vtt_time(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    h, rest = divmod(ms, 3_600_000)
+    m, rest = divmod(rest, 60_000)
+    s, ms = divmod(rest, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+def build_sprites(frames: Sequence[str], times: Sequence[float], out_dir: Path, duration: Optional[float] = None,
+                  columns: int = 10, rows: int = 10, prefix: str = "sprite", quality: int = 85,
+                  thumb_width: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Pack thumbnails into sprite sheets and write a JSON and a WebVTT index.
+
+    Sheets hold `columns` x `rows` thumbnails of the first frame's size, or
+    `thumb_width` wide with its aspect ratio; the frame files themselves are
+    left untouched. Each index entry gives the time span a thumbnail covers,
+    its sheet and its rectangle; the VTT cues use the
+    `sheet.jpg#xywh=x,y,w,h` form video players read for preview scrubbing.
+    Returns the index entries.
+    """
+    from PIL import Image
+
+    if columns < 1 or rows < 1:
+        raise ValueError("Sprite sheets need at least one column and one row")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with Image.open(frames[0]) as first:
+        width, height = first.size
+    if thumb_width:
+        width, height = thumb_width, max(1, round(height * thumb_width / width))
+    per_sheet = columns * rows
+    entries: List[Dict[str, Any]] = []
+
+    for sheet_index, offset in enumerate(range(0, len(frames), per_sheet)):
+        batch = frames[offset:offset + per_sheet]
+        sheet_rows = -(-len(batch) // columns)
+        sheet = Image.new("RGB", (width * min(columns, len(batch)), height * sheet_rows))
+        name = f"{prefix}_{sheet_index:03d}.jpg"
+        for k, frame in enumerate(batch):
+            x, y = (k % columns) * width, (k // columns) * height
+            with Image.open(frame) as img:
+                if img.size != (width, height):
+                    img = img.resize((width, height), Image.Resampling.LANCZOS)
+                sheet.paste(img.convert("RGB"), (x, y))
+            i = offset + k
+            end = times[i + 1] if i + 1 < len(times) else (duration if duration else times[i] + 1)
+            entries.append({"start": times[i], "end": end, "sheet": name, "x": x, "y": y, "w": width, "h": height})
+        sheet.save(out_dir / name, quality=quality)
+
+    with open(out_dir / f"{prefix}.json", "w", encoding="utf-8") as f:
+        json.dump({"width": width, "height": height, "columns": columns, "rows": rows, "thumbnails": entries}, f, indent=2)
+    with open(out_dir / f"{prefix}.vtt", "w", encoding="utf-8") as f:
+        f.write("WEBVTT\n")
+        for entry in entries:
+            f.write(f"\n{_vtt_time(entry['start'])} --> {_vtt_time(entry['end'])}\n"
+                    f"{entry['sheet']}#xywh={entry['x']},{entry['y']},{entry['w']},{entry['h']}\n")
+    return entries
@@ -0,0 +1,280 @@
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from toolbox.core import resident
+from toolbox.core.engine import BaseEngine
+from toolbox.core.events import ProgressTask
+from toolbox.core.inference import physical_cores
+
+# Whisper models work on 16 kHz mono audio
+SAMPLE_RATE = 16000
+DEFAULT_CHUNK_LENGTH = 300.0
+VAD_FRAME = 0.03
+MIN_SILENCE = 0.4
+
+def decode_pcm(ffmpeg: BaseEngine, path: str):
+    """Decode the first audio stream of `path` to 16 kHz mono int16 samples."""
+    import numpy as np
+
+    buffer = bytearray()
+    with ffmpeg.stream(["-v", "error", "-i", path, "-map", "0:a:0", "-f", "s16le", "-ac", "1",
+                        "-ar", str(SAMPLE_RATE), "-"]) as proc:
+        for chunk in proc.iter_chunks():
+            buffer.extend(chunk)
+    return np.frombuffer(bytes(buffer), dtype=np.int16)
+
+def _frame_levels(samples, frame: int):
+    """RMS level in dBFS of every `frame` samples."""
+    import numpy as np
+
+    count = len(samples) // frame
+    frames = samples[:count * frame].astype(np.float32).reshape(count, frame) / 32768.0
+    return 20 * np.log10(np.sqrt((frames ** 2).mean(axis=1)) + 1e-10)
+
+def speech_chunks(samples, rate: int = SAMPLE_RATE, chunk_length: float = DEFAULT_CHUNK_LENGTH,
+                  min_silence: float = MIN_SILENCE) -> List[Tuple[int, int]]:
+    """
+    Split audio into chunks of at most `chunk_length` seconds, cut in pauses.
+
+    A frame counts as silent when its energy is well below the recording's
+    own noise floor estimate; runs of at least `min_silence` seconds are cut
+    candidates, and each chunk ends at the last candidate that keeps it
+    within the length (a hard cut only if there is none). Chunks without any
+    speech are left out. Returns (start, end) sample offsets.
+    """
+    import numpy as np
+
+    frame = max(1, int(rate * VAD_FRAME))
+    if len(samples) < frame:
+        return [(0, len(samples))] if len(samples) else []
+    levels = _frame_levels(samples, frame)
+    floor = float(np.percentile(levels, 10))
+    threshold = min(max(floor + 10.0, -60.0), -30.0)
+    silent = levels < threshold
+
+    # Centers of silent runs long enough to cut in, in samples
+    cuts: List[int] = []
+    run_start = None
+    min_frames = max(1, int(min_silence / VAD_FRAME))
+    for i, quiet in enumerate(np.append(silent, False)):
+        if quiet and run_start is None:
+            run_start = i
+        elif not quiet and run_start is not None:
+            if i - run_start >= min_frames:
+                cuts.append((run_start + i) // 2 * frame)
+            run_start = None
+
+    total, max_len = len(samples), int(chunk_length * rate)
+    chunks: List[Tuple[int, int]] = []
+    start = 0
+    while start < total:
+        if total - start <= max_len:
+            end = total
+        else:
+            fitting = [c for c in cuts if start < c <= start + max_len]
+            end = fitting[-1] if fitting else start + max_len
+        first, last = start // frame, min(len(silent), -(-end // frame))
+        if not silent[first:last].all():
+            chunks.append((start, end))
+        start = end
+    return chunks
+
+# Per-process state of a transcription worker
+_worker_model = None
+
+def _load_model(model: str, device: str, threads: int):
+    global _worker_model
+    import torch
+    import whisper
+
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model, device=device)
+
+def _transcribe_chunk(samples, offset: float, options: Dict[str, Any]) -> Dict[str, Any]:
+    # Chunks travel as int16, half the size of the float32 Whisper wants
+    result = _worker_model.transcribe(samples.astype("float32") / 32768.0, **options)
+    segments = [
+        {"start": round(seg["start"] + offset, 3), "end": round(seg["end"] + offset, 3), "text": seg["text"].strip()}
+        for seg in result.get("segments", [])
+    ]
+    return {"language": result.get("language"), "segments": segments}
+
+def _detect_language(samples) -> str:
+    """The language Whisper hears in the first 30 s of `samples`, as transcribe() would detect it."""
+    import whisper
+
+    model = _worker_model
+    if not model.is_multilingual:
+        return "en"
+    audio = whisper.pad_or_trim(samples.astype("float32") / 32768.0)
+    mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+class Transcriber:
+    """
+    A pool of Whisper worker processes, each holding the model in memory.
+
+    Audio is cut into chunks at pauses and the chunks are transcribed
+    concurrently, one per worker, with every segment's timestamps shifted
+    back onto the original timeline. Workers load the model once and are
+    reused for every file transcribed with the same model and device.
+    """
+
+    def __init__(self, model: str, device: str = "cpu", jobs: int = 1):
+        self.model = model
+        self.device = device
+        self.jobs = max(1, jobs)
+        # Split the cores between workers so they do not oversubscribe each other
+        threads = max(1, physical_cores() // self.jobs)
+        # torch is not fork-safe once initialized, so workers start fresh interpreters
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.jobs, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_load_model, initargs=(model, device, threads),
+        )
+
+    def transcribe(self, samples, chunk_length: float = DEFAULT_CHUNK_LENGTH,
+                   language: Optional[str] = None, progress: Optional[ProgressTask] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the segments of `samples` (16 kHz int16) in order.
+
+        Chunks are submitted up front and their segments are yielded as soon
+        as every earlier chunk is done. Without a `language`, it is detected
+        once from the start of the first chunk and used for all of them, so
+        chunks cannot come out in different languages. `progress` counts
+        finished chunks.
+        """
+        options: Dict[str, Any] = {"fp16": self.device == "cuda"}
+        chunks = speech_chunks(samples, chunk_length=chunk_length)
+        if progress:
+            progress.update(total=len(chunks))
+        if not language and chunks:
+            start, end = chunks[0]
+            language = self.executor.submit(_detect_language, samples[start:end]).result()
+        if language:
+            options["language"] = language
+        futures = [
+            self.executor.submit(_transcribe_chunk, samples[start:end], start / SAMPLE_RATE, options)
+            for start, end in chunks
+        ]
+        try:
+            for future in futures:
+                result = future.result()
+                if progress:
+                    progress.advance()
+                yield from result["segments"]
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def warm(self):
+        """Start every worker, loading the model, rather than on the first chunks."""
+        for future in [self.executor.submit(int) for _ in range(self.jobs)]:
+            future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+_transcribers: Dict[Tuple[str, str, int], Transcriber] = {}
+_transcribers_lock = threading.Lock()
+
+def default_device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def default_jobs(device: str) -> int:
+    """Workers when none are asked for: one on a GPU, up to 4 on CPU, each holding a copy of the model."""
+    return 1 if device == "cuda" else max(1, min(4, physical_cores() // 2))
+
+def get_transcriber(model: str, device: str = "cpu", jobs: int = 1):
+    """The resident Transcriber for this model, device and worker count: the local server's under `serve-local`."""
+    host = resident.host()
+    if host is not None:
+        return host.transcriber(model, device, jobs)
+    return load_transcriber(model, device, jobs)
+
+def load_transcriber(model: str, device: str = "cpu", jobs: int = 1) -> Transcriber:
+    """A resident Transcriber for this model, device and worker count in this process, started on first use."""
+    key = (model, device, max(1, jobs))
+    with _transcribers_lock:
+        if key not in _transcribers:
+            _transcribers[key] = Transcriber(model, device, jobs)
+        return _transcribers[key]
+
+@atexit.register
+def _close_transcribers():
+    with _transcribers_lock:
+        for transcriber in _transcribers.values():
+            transcriber.close()
+        _transcribers.clear()
+
+TRANSCRIPT_FORMATS = ["txt", "srt", "vtt", "jsonl"]
+
+def transcript_format(output: Optional[str], fmt: Optional[str] = None) -> str:
+    """The explicit format, else the one the output's extension names, else plain text."""
+    if fmt:
+        return fmt
+    suffix = os.path.splitext(output or "")[1].lstrip(".").lower()
+    return suffix if suffix in TRANSCRIPT_FORMATS else "txt"
+
+def _timestamp(seconds: float, separator: str) -> str:
+    ms = int(round(seconds * 1000))
+    h, rest = divmod(ms, 3_600_000)
+    m, rest = divmod(rest, 60_000)
+    s, ms = divmod(rest, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{separator}{ms:03d}"
+
+class TranscriptWriter:
+    """
+    Writes transcript segments to a file as they arrive, flushing after each one.
+
+    The file is valid after every segment in every format, so it can be
+    tailed while transcription runs and keeps everything finished so far if
+    the run dies. `txt` is the plain text, `srt` and `vtt` are numbered
+    subtitle cues, and `jsonl` has one {"start", "end", "text"} object per line.
+    """
+
+    def __init__(self, path: str, fmt: str = "txt"):
+        if fmt not in TRANSCRIPT_FORMATS:
+            raise ValueError(f"Unknown transcript format '{fmt}'")
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self.chars = 0
+        self._file = open(path, "w", encoding="utf-8")
+        if fmt == "vtt":
+            self._write("WEBVTT\n")
+
+    def _write(self, text: str):
+        self._file.write(text)
+        self._file.flush()
+
+    def write(self, segment: Dict[str, Any]):
+        text = segment["text"].strip()
+        if not text:
+            return
+        self.count += 1
+        self.chars += len(text)
+        if self.fmt == "txt":
+            self._write(text if self.count == 1 else f" {text}")
+        elif self.fmt == "jsonl":
+            self._write(json.dumps({"start": segment["start"], "end": segment["end"], "text": text}, ensure_ascii=False) + "\n")
+        elif self.fmt == "srt":
+            self._write(f"{self.count}\n{_timestamp(segment['start'], ',')} --> {_timestamp(segment['end'], ',')}\n{text}\n\n")
+        else:
+            self._write(f"\n{_timestamp(segment['start'], '.')} --> {_timestamp(segment['end'], '.')}\n{text}\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "TranscriptWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,13 +1,13 @@
 import click
-import glob
 import os
 import socket
 import urllib.parse
 import functools
 from pathlib import Path
-from typing import Callable, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence
+from toolbox.core.config import config_manager
 from toolbox.core.engine import console
+from toolbox.core.batch import EXECUTORS, invoke_file, run_glob
 
 def is_safe_url(url: str) -> bool:
     """Basic SSRF protection - prevent access to private IP ranges."""
@@ -35,56 +35,58 @@ def is_safe_url(url: str) -> bool:
     except Exception:
         return False
 
-def batch_process(func: Callable):
+def batch_process(func: Optional[Callable] = None, *, outputs: Optional[Callable] = None, engines: Sequence[str] = ()):
     """
     Decorator to add --glob and --parallel support to a click command.
+
+    Parallel batches run in threads or, for CPU-bound pure-Python plugins, in
+    a process pool that receives a picklable task (command path plus kwargs).
+
+    Commands that pass `outputs` (a function from the command's kwargs to the
+    files it writes) can be served from the result cache with --cache. Extra
+    `engines` the command uses beyond its plugin's engine become part of the
+    cache key, so upgrading them invalidates cached results.
     """
+    if func is None:
+        return functools.partial(batch_process, outputs=outputs, engines=engines)
+
     @click.option("--glob", "glob_pattern", help="Glob pattern to process multiple files (e.g. '*.jpg')")
     @click.option("--parallel", is_flag=True, help="Enable parallel processing for batch operations")
-    @click.option("--workers", type=int, default=os.cpu_count(), help="Number of worker threads (default: CPU count)")
+    @click.option("--workers", type=int, default=os.cpu_count(), help="Number of parallel workers (default: CPU count)")
+    @click.option("--executor", type=click.Choice(EXECUTORS), default="auto", show_default=True,
+                  help="Run --parallel batches in threads or processes; 'auto' uses processes for CPU-bound plugins")
+    @click.option("--cache/--no-cache", "use_cache", default=None,
+                  help="Skip inputs whose results are in the result cache (default: result_cache setting)")
+    @click.option("--journal", "journal_path", type=click.Path(dir_okay=False),
+                  help="Record per-file outcomes of a --glob batch in this SQLite file")
+    @click.option("--resume", is_flag=True, help="With --journal, skip files already done and retry failures")
     @click.pass_context
     @functools.wraps(func)
-    def wrapper(ctx, glob_pattern, parallel, workers, *args, **kwargs):
+    def wrapper(ctx, glob_pattern, parallel, workers, executor, use_cache, journal_path, resume, *args, **kwargs):
         input_file = kwargs.get('input_file')
+        if use_cache is None:
+            use_cache = config_manager.settings.result_cache
+        use_cache = use_cache and outputs is not None
+
+        def invoke(file_path: str) -> bool:
+            return invoke_file(ctx, wrapper, {**kwargs, 'input_file': file_path}, use_cache)
         
+        if resume and not journal_path:
+            raise click.UsageError("--resume requires --journal.")
+
         if glob_pattern:
-            files = [f for f in glob.glob(glob_pattern, recursive=True) if os.path.isfile(f)]
-            if not files:
-                console.print(f"[yellow]No files matched pattern: {glob_pattern}[/yellow]")
-                return
-            
-            console.print(f"[cyan]Batch processing {len(files)} files (Parallel: {parallel})...[/cyan]")
-            success_count = 0
-            
-            if parallel:
-                with ThreadPoolExecutor(max_workers=workers) as executor:
-                    futures = []
-                    for file_path in files:
-                        current_kwargs = kwargs.copy()
-                        current_kwargs['input_file'] = file_path
-                        # We use ctx.invoke but in a thread-safe-ish way for basic operations
-                        futures.append(executor.submit(ctx.invoke, func, **current_kwargs))
-                    
-                    for future in as_completed(futures):
-                        try:
-                            future.result()
-                            success_count += 1
-                        except Exception as e:
-                            console.print(f"[red]Parallel error: {e}[/red]")
-            else:
-                for file_path in files:
-                    try:
-                        current_kwargs = kwargs.copy()
-                        current_kwargs['input_file'] = file_path
-                        ctx.invoke(func, **current_kwargs)
-                        success_count += 1
-                    except Exception as e:
-                        console.print(f"[red]Error processing {file_path}: {e}[/red]")
-            
-            console.print(f"[green]✓ Batch processing complete: {success_count}/{len(files)} successful.[/green]")
+            run_glob(ctx, wrapper, kwargs, glob_pattern, parallel=parallel, workers=max(1, workers or 1),
+                     executor=executor, use_cache=use_cache, journal_path=journal_path, resume=resume)
         else:
             if not input_file:
                 raise click.UsageError("Missing argument 'INPUT_FILE' or '--glob' option.")
+            if use_cache:
+                invoke(input_file)
+                return None
             return ctx.invoke(func, **kwargs)
-            
+
+    # Read by invoke_file, including in process-pool workers that only have the command
+    wrapper.batch_func = func
+    wrapper.batch_outputs = outputs
+    wrapper.batch_engines = tuple(engines)
     return wrapper
@@ -1,10 +1,19 @@
 import click
 import os
 import contextlib
+import importlib.util
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
 from typing import Optional, List
 from toolbox.core.plugin import BasePlugin, PluginMetadata
-from toolbox.core.engine import engine_registry, console
+from toolbox.core import media
+from toolbox.core.engine import EngineError, engine_registry, console
+from toolbox.core.events import event_bus
 from toolbox.core.io import get_input_path
+from toolbox.core.loudness import DEFAULT_I, DEFAULT_LRA, DEFAULT_TP, loudnorm_filter, measured_loudness
+from toolbox.core.transcribe import DEFAULT_CHUNK_LENGTH, TRANSCRIPT_FORMATS, TranscriptWriter, decode_pcm, default_jobs, get_transcriber, transcript_format
+from toolbox.core.utils import batch_process
 
 class AudioPlugin(BasePlugin):
     """Plugin for audio processing using FFmpeg and Whisper."""
@@ -23,41 +32,62 @@ class AudioPlugin(BasePlugin):
             pass
 
         @audio_group.command(name="stt")
-        @click.argument("input_file")
+        @click.argument("input_file", required=False)
         @click.option("-m", "--model", default="base", help="Whisper model size (tiny, base, small, medium, large)")
-        @click.option("-o", "--output", type=click.Path(), help="Output text file")
+        @click.option("-o", "--output", type=click.Path(), help="Output file (default: input name with the format's extension)")
+        @click.option("-f", "--format", "fmt", type=click.Choice(TRANSCRIPT_FORMATS), help="Transcript format (default: from the output extension, else txt)")
         @click.option("--gpu", is_flag=True, help="Use GPU for inference")
-        def stt(input_file: str, model: str, output: Optional[str], gpu: bool):
-            """Transcribe audio to text using OpenAI Whisper."""
-            try:
-                import whisper
-                import torch
-            except ModuleNotFoundError:
+        @click.option("-j", "--jobs", type=int, default=0, help="Worker processes, each holding the model (0 = auto: 1 on GPU, up to 4 on CPU)")
+        @click.option("--chunk-length", type=float, default=DEFAULT_CHUNK_LENGTH, show_default=True, help="Longest chunk in seconds; chunks are cut at pauses")
+        @click.option("-l", "--language", help="Spoken language (default: detect per chunk)")
+        @batch_process(outputs=lambda kw: [kw["output"] or f"{Path(kw['input_file']).stem}.{transcript_format(kw['output'], kw['fmt'])}"],
+                       engines=("openai-whisper",))
+        def stt(input_file: str, model: str, output: Optional[str], fmt: Optional[str], gpu: bool, jobs: int,
+                chunk_length: float, language: Optional[str]):
+            """Transcribe audio to text, SRT, VTT or JSONL using OpenAI Whisper.
+
+            Long recordings are split at pauses and the chunks transcribed in
+            parallel by worker processes that keep the model loaded, also
+            across the files of a --glob batch. Segments are written and
+            flushed as soon as they are ready, so the output can be tailed.
+            """
+            # Whisper itself is only imported by the workers
+            if importlib.util.find_spec("whisper") is None or importlib.util.find_spec("torch") is None:
                 console.print("[bold red]Error:[/bold red] Speech-to-text dependencies are missing.")
                 console.print("Install with: pip install 'toolbox-universal[ai]'")
                 return
-            
-            device = "cuda" if (gpu or torch.cuda.is_available()) else "cpu"
-            console.print(f"[blue]Loading Whisper model '{model}' on {device}...[/blue]")
-            
-            try:
-                model_instance = whisper.load_model(model, device=device)
-            except Exception as e:
-                console.print(f"[bold red]Error loading model:[/bold red] {e}")
+            import torch
+
+            ffmpeg = engine_registry.get("ffmpeg")
+            if not ffmpeg.is_available:
+                console.print("[bold red]Error:[/bold red] FFmpeg engine not found. Please install FFmpeg.")
                 return
 
+            device = "cuda" if (gpu or torch.cuda.is_available()) else "cpu"
+            if jobs <= 0:
+                jobs = default_jobs(device)
+            transcriber = get_transcriber(model, device, jobs)
+
             with get_input_path(input_file) as path:
-                console.print(f"[blue]Transcribing {input_file}...[/blue]")
-                result = model_instance.transcribe(str(path))
-                
-                text = result["text"].strip()
-                out_path = output or f"{Path(path).stem}.txt"
-                
-                with open(out_path, "w", encoding="utf-8") as f:
-                    f.write(text)
-                
-                console.print(f"[green]✓ Transcription saved to {out_path}[/green]")
-                console.print(f"\n[bold]Preview:[/bold]\n{text[:200]}...")
+                console.print(f"[blue]Transcribing {input_file} with Whisper '{model}' on {device} ({jobs} worker(s))...[/blue]")
+                samples = decode_pcm(ffmpeg, path)
+                out_format = transcript_format(output, fmt)
+                out_path = output or f"{Path(path).stem}.{out_format}"
+                preview = ""
+                try:
+                    with TranscriptWriter(out_path, out_format) as writer, \
+                         event_bus.task(f"Transcribing {os.path.basename(path)}", unit="chunks") as progress:
+                        for segment in transcriber.transcribe(samples, chunk_length=chunk_length,
+                                                              language=language, progress=progress):
+                            writer.write(segment)
+                            if len(preview) < 200:
+                                preview = f"{preview} {segment['text']}".strip()
+                except BrokenProcessPool:
+                    console.print(f"[bold red]Error loading model:[/bold red] Whisper '{model}' could not be loaded on {device}.")
+                    return
+
+                console.print(f"[green]✓ Transcription saved to {out_path} ({writer.count} segments)[/green]")
+                console.print(f"\n[bold]Preview:[/bold]\n{preview[:200]}...")
 
         @audio_group.command(name="convert")
         @click.argument("input_file")
@@ -92,18 +122,28 @@ class AudioPlugin(BasePlugin):
                 console.print("[bold red]Error:[/bold red] FFmpeg engine not found. Please install FFmpeg.")
                 return
 
+            try:
+                start_s = media.parse_timestamp(start) if start else 0.0
+                end_s = media.parse_timestamp(end) if end else None
+            except ValueError as e:
+                console.print(f"[bold red]Error:[/bold red] {e}")
+                return
+            if end_s is not None and end_s <= start_s:
+                console.print("[bold red]Error:[/bold red] --end must be after --start.")
+                return
+
             with get_input_path(input_file) as path:
                 if dry_run:
                     console.print(f"[bold yellow]Would trim {input_file} (start={start}, end={end}) and save as {output}[/bold yellow]")
                     return
 
-                args = ["-i", path]
-                if start:
-                    args.extend(["-ss", start])
-                if end:
-                    args.extend(["-to", end])
-                args.extend(["-c", "copy", output])
-                
+                # Every audio packet is a sync point, so seeking on the input is
+                # packet-accurate and skips reading everything before the cut
+                args = ["-ss", f"{start_s:.6f}"] if start_s else []
+                if end_s is not None:
+                    args.extend(["-t", f"{end_s - start_s:.6f}"])
+                args.extend(["-i", path, "-c", "copy", output])
+
                 ffmpeg.run(args)
                 console.print(f"[green]✓ Trimmed audio saved to {output}[/green]")
 
@@ -124,24 +164,51 @@ class AudioPlugin(BasePlugin):
 
             with contextlib.ExitStack() as stack:
                 paths = [stack.enter_context(get_input_path(f)) for f in input_files]
+                label = f"Merging {len(input_files)} files"
+
+                if not engine_registry.get("ffprobe").is_available:
+                    reason = "FFprobe not found"
+                else:
+                    try:
+                        reason = media.audio_copy_mismatch([media.probe(p) for p in paths], output)
+                    except EngineError as e:
+                        reason = f"could not probe inputs ({e})"
+
+                if reason is None:
+                    # Same codec and format throughout: join the packets, decode nothing
+                    console.print("[blue]Inputs are compatible; joining with the concat demuxer (stream copy).[/blue]")
+                    work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="toolbox_merge_"))
+                    concat_list = Path(work_dir) / "inputs.txt"
+                    media.write_concat_list(paths, concat_list)
+                    args = ["-f", "concat", "-safe", "0", "-i", str(concat_list), "-map", "0:a", "-c", "copy", output]
+                else:
+                    console.print(f"[blue]Re-encoding with the concat filter: {reason}.[/blue]")
+                    # FFmpeg concat filter for multiple inputs
+                    filter_str = "".join([f"[{i}:a]" for i in range(len(paths))]) + f"concat=n={len(paths)}:v=0:a=1[a]"
+                    args = []
+                    for p in paths:
+                        args.extend(["-i", p])
+                    args.extend(["-filter_complex", filter_str, "-map", "[a]", output])
                 
-                # FFmpeg concat filter for multiple inputs
-                filter_str = "".join([f"[{i}:a]" for i in range(len(paths))]) + f"concat=n={len(paths)}:v=0:a=1[a]"
-                args = []
-                for p in paths:
-                    args.extend(["-i", p])
-                args.extend(["-filter_complex", filter_str, "-map", "[a]", output])
-                
-                ffmpeg.run_with_progress(args, label=f"Merging {len(input_files)} files")
+                ffmpeg.run_with_progress(args, label=label)
             
             console.print(f"[green]✓ Merged {len(input_files)} files into {output}[/green]")
 
         @audio_group.command(name="normalize")
-        @click.argument("input_file")
+        @click.argument("input_file", required=False)
         @click.option("-o", "--output", type=click.Path(), help="Output filename")
+        @click.option("--target-i", type=float, default=DEFAULT_I, show_default=True, help="Integrated loudness target (LUFS)")
+        @click.option("--target-tp", type=float, default=DEFAULT_TP, show_default=True, help="Maximum true peak (dBTP)")
+        @click.option("--target-lra", type=float, default=DEFAULT_LRA, show_default=True, help="Loudness range target (LU)")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        def normalize(input_file: str, output: Optional[str], dry_run: bool):
-            """Normalize audio volume using loudnorm filter. Supports local or URL."""
+        @batch_process(outputs=lambda kw: [kw["output"] or f"normalized_{os.path.basename(kw['input_file'])}"])
+        def normalize(input_file: str, output: Optional[str], target_i: float, target_tp: float, target_lra: float, dry_run: bool):
+            """Normalize audio volume with two-pass loudnorm. Supports local or URL.
+
+            The first pass measures the input's loudness and is cached by
+            content, so normalizing the same audio to another target only
+            runs the second pass.
+            """
             ffmpeg = engine_registry.get("ffmpeg")
             if not ffmpeg.is_available:
                 console.print("[bold red]Error:[/bold red] FFmpeg engine not found. Please install FFmpeg.")
@@ -151,9 +218,18 @@ class AudioPlugin(BasePlugin):
                 out_path = output or f"normalized_{os.path.basename(path)}"
                 
                 if dry_run:
-                    console.print(f"[bold yellow]Would normalize {input_file} and save as {out_path}[/bold yellow]")
+                    console.print(f"[bold yellow]Would normalize {input_file} to {target_i} LUFS and save as {out_path}[/bold yellow]")
                     return
 
-                args = ["-i", path, "-af", "loudnorm", out_path]
+                measured = measured_loudness(ffmpeg, path)
+                console.print(f"[dim]Measured {measured['input_i']:.1f} LUFS, {measured['input_tp']:.1f} dBTP, "
+                              f"LRA {measured['input_lra']:.1f} LU[/dim]")
+                args = ["-i", path, "-af", loudnorm_filter(measured, target_i, target_tp, target_lra)]
+                # loudnorm resamples to 192 kHz internally; keep the input's rate
+                if engine_registry.get("ffprobe").is_available:
+                    audio = media.probe(path).audio
+                    if audio and audio.sample_rate:
+                        args += ["-ar", str(audio.sample_rate)]
+                args.append(out_path)
                 ffmpeg.run(args)
                 console.print(f"[green]✓ Normalized audio saved to {out_path}[/green]")
@@ -36,7 +36,9 @@ class DesktopPlugin(BasePlugin):
         @desktop_group.command(name="daemon")
         @click.option("--tray", is_flag=True, help="Start with system tray icon")
         @click.option("--hotkeys", is_flag=True, help="Enable global hotkeys")
-        def start_daemon(tray: bool, hotkeys: bool):
+        @click.option("--serve-local", is_flag=True, help="Also serve commands to `toolboxc` over a Unix socket")
+        @click.pass_context
+        def start_daemon(ctx, tray: bool, hotkeys: bool, serve_local: bool):
             """Start the ToolBox desktop daemon for background tasks."""
             import threading
             import time
@@ -105,6 +107,20 @@ class DesktopPlugin(BasePlugin):
 
             console.print("[bold blue]ToolBox Desktop Daemon is running...[/bold blue]")
             console.print("[dim]Press Ctrl+C to stop.[/dim]")
+
+            if serve_local:
+                from toolbox.core.server import LocalServer, ServerError
+                try:
+                    # The server forks per request, so it owns the main thread instead of the live panel
+                    server = LocalServer(ctx.find_root().command)
+                    server.warm_up()
+                    console.print(f"[green]✓ Serving commands on {server.socket_path}[/green]")
+                    server.serve_forever()
+                except ServerError as e:
+                    console.print(f"[bold red]Error:[/bold red] {e}")
+                except KeyboardInterrupt:
+                    console.print("\n[bold red]Daemon stopped.[/bold red]")
+                return
             
             try:
                 with Live(Panel("Daemon Active", title="ToolBox"), refresh_per_second=1) as live:
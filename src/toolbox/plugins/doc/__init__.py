@@ -26,7 +26,9 @@ class DocPlugin(BasePlugin):
         @click.option("--to", required=True, help="Target format (e.g., pdf, docx, html, txt)")
         @click.option("-o", "--output-dir", type=click.Path(), help="Output directory")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        @batch_process
+        @batch_process(outputs=lambda kw: [
+            Path(kw["output_dir"] or ".") / f"{Path(kw['input_file']).stem}.{kw['to'].split(':')[0]}"
+        ])
         def convert(input_file: Optional[str], to: str, output_dir: Optional[str], dry_run: bool):
             """Convert document format using LibreOffice. Supports local or URL."""
             libreoffice = engine_registry.get("libreoffice")
@@ -1,14 +1,16 @@
 import click
-import pytesseract
 import os
 from typing import Optional
 from pathlib import Path
 from PIL import Image, ExifTags, ImageSequence, ImageOps
 from toolbox.core.plugin import BasePlugin, PluginMetadata
 from toolbox.core.engine import engine_registry, console
+from toolbox.core.events import event_bus
 from toolbox.core.io import get_input_path
+from toolbox.core.ocr import PREPROCESS_MODES, get_ocr_pool
 from toolbox.core.utils import batch_process
 from toolbox.core.ai import get_model_path, is_gpu_available
+from toolbox.core.inference import DEFAULT_BATCH, DEFAULT_TILE, TiledUpscaler, get_session, validate_tile
 
 class ImagePlugin(BasePlugin):
     """Plugin for image processing using Pillow and Tesseract."""
@@ -30,7 +32,9 @@ class ImagePlugin(BasePlugin):
         @click.argument("input_file")
         @click.option("-o", "--output", type=click.Path(), help="Output upscaled filename")
         @click.option("-s", "--scale", type=int, default=4, help="Upscale factor (2 or 4)")
-        def upscale(input_file: str, output: Optional[str], scale: int):
+        @click.option("--tile", type=int, default=DEFAULT_TILE, callback=validate_tile, help="Tile size in pixels; bounds memory use (0 = whole image)")
+        @click.option("--batch", type=int, default=DEFAULT_BATCH, help="Tiles per inference run")
+        def upscale(input_file: str, output: Optional[str], scale: int, tile: int, batch: int):
             """Upscale image using AI (ESRGAN). Supports local or URL."""
             import cv2
             import numpy as np
@@ -61,28 +65,11 @@ class ImagePlugin(BasePlugin):
 
                 console.print(f"[blue]Upscaling {input_file} by {scale}x...[/blue]")
                 
-                # Load ONNX model
-                import onnxruntime as ort
-                providers = ["CPUExecutionProvider"]
-                if is_gpu_available():
-                    providers.insert(0, "CUDAExecutionProvider")
-                
-                session = ort.InferenceSession(str(model_path), providers=providers)
-                
-                # Preprocess
-                img = img.astype(np.float32) / 255.0
-                img = np.transpose(img[:, :, [2, 1, 0]], (2, 0, 1))
-                img = np.expand_dims(img, axis=0)
-                
-                # Inference
-                ort_inputs = {session.get_inputs()[0].name: img}
-                output_tensor = session.run(None, ort_inputs)[0]
-                
-                # Postprocess
-                output_img = np.squeeze(output_tensor)
-                output_img = np.clip(output_img, 0, 1)
-                output_img = np.transpose(output_img, (1, 2, 0))
-                output_img = (output_img[:, :, [2, 1, 0]] * 255).astype(np.uint8)
+                session = get_session(str(model_path), gpu=is_gpu_available())
+                upscaler = TiledUpscaler(session, scale, tile=tile, batch_size=batch)
+
+                # OpenCV loads BGR; the model works in RGB
+                output_img = np.ascontiguousarray(upscaler.upscale([img[:, :, ::-1]])[0][:, :, ::-1])
                 
                 out_path = output or f"upscaled_{Path(path).name}"
                 cv2.imwrite(out_path, output_img)
@@ -91,7 +78,7 @@ class ImagePlugin(BasePlugin):
         @image_group.command(name="convert")
         @click.argument("input_file", required=False)
         @click.argument("output_file", type=click.Path(), required=False)
-        @batch_process
+        @batch_process(outputs=lambda kw: [kw["output_file"] or f"{Path(kw['input_file']).stem}.png"])
         def convert(input_file: str, output_file: Optional[str]):
             """Convert image format (e.g., photo.jpg photo.png). Supports local or URL."""
             if not output_file and not input_file:
@@ -113,7 +100,7 @@ class ImagePlugin(BasePlugin):
         @click.option("-h", "--height", type=int, help="Target height")
         @click.option("-o", "--output", type=click.Path(), help="Output filename")
         @click.option("--dry-run", is_flag=True, help="Show what would happen without actual resizing")
-        @batch_process
+        @batch_process(outputs=lambda kw: [kw["output"] or f"resized_{Path(kw['input_file']).name}"])
         def resize(input_file: str, width: Optional[int], height: Optional[int], output: Optional[str], dry_run: bool):
             """Resize an image. Supports local or URL."""
             if not width and not height:
@@ -202,14 +189,24 @@ class ImagePlugin(BasePlugin):
                 console.print(f"[green]✓ Stripped metadata and saved to {out_path}[/green]")
 
         @image_group.command(name="ocr")
-        @click.argument("input_file")
+        @click.argument("input_file", required=False)
         @click.option("-l", "--lang", default="eng", help="OCR language (default: eng)")
         @click.option("-o", "--output", type=click.Path(), help="Output text file")
-        @click.option("--preprocess", type=click.Choice(['none', 'grayscale', 'threshold']), default='none', help="Image preprocessing")
+        @click.option("--preprocess", type=click.Choice(PREPROCESS_MODES), default='none', help="Image preprocessing")
         @click.option("--scale", type=float, default=1.0, help="Scale factor for the image")
+        @click.option("-j", "--jobs", type=int, default=0, help="OCR worker processes (0 = CPU count, capped by engine_limits.tesseract)")
+        @click.option("--ocr-cache/--no-ocr-cache", default=None, help="Reuse text recognized before for identical images (default: ocr_cache setting)")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        def ocr(input_file: str, lang: str, output: Optional[str], preprocess: str, scale: float, dry_run: bool):
-            """Perform OCR on an image. Supports local or URL."""
+        @batch_process(outputs=lambda kw: [kw["output"]], engines=("tesseract",))
+        def ocr(input_file: Optional[str], lang: str, output: Optional[str], preprocess: str, scale: float, jobs: int,
+                ocr_cache: Optional[bool], dry_run: bool):
+            """Perform OCR on an image. Supports local or URL.
+
+            Recognition runs on the resident OCR worker pool shared with
+            `pdf ocr`, so a --glob batch starts tesseract once per worker
+            instead of once per image. Text of an image recognized before
+            with the same settings comes from the OCR cache.
+            """
             tesseract = engine_registry.get("tesseract")
             if not tesseract.is_available:
                 console.print("[bold red]Error:[/bold red] Tesseract engine not found. Please install Tesseract-OCR.")
@@ -219,30 +216,11 @@ class ImagePlugin(BasePlugin):
                 console.print(f"[bold yellow]Would run OCR on {input_file} (lang={lang}, preprocess={preprocess}, scale={scale})[/bold yellow]")
                 return
 
-            import pytesseract
-            from rich.progress import Progress, SpinnerColumn, TextColumn
-            pytesseract.pytesseract.tesseract_cmd = tesseract.path
-
+            pool = get_ocr_pool(tesseract.path, jobs, tesseract.version)
             with get_input_path(input_file) as path:
-                with Progress(
-                    SpinnerColumn(),
-                    TextColumn("[progress.description]{task.description}"),
-                    console=console,
-                ) as progress:
-                    task = progress.add_task(f"Running OCR on {os.path.basename(path)}...", total=None)
-                    
-                    with Image.open(path) as img:
-                        if scale != 1.0:
-                            new_size = (int(img.width * scale), int(img.height * scale))
-                            img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-                        if preprocess == 'grayscale':
-                            img = img.convert("L")
-                        elif preprocess == 'threshold':
-                            img = img.convert("L").point(lambda x: 0 if x < 128 else 255, '1')
-
-                        text = pytesseract.image_to_string(img, lang=lang)
-                        progress.update(task, completed=True)
+                with event_bus.task(f"Running OCR on {os.path.basename(path)}", total=1, unit="pages") as progress:
+                    text = pool.image_text(path, lang, preprocess, scale, cache=ocr_cache)
+                    progress.advance()
 
             if output:
                 with open(output, "w", encoding="utf-8") as f:
@@ -250,6 +228,8 @@ class ImagePlugin(BasePlugin):
                 console.print(f"[green]✓ OCR text saved to {output}[/green]")
             else:
                 console.print(text)
+            if pool.pages > 1:
+                console.print(f"[dim]OCR pool: {pool.summary()}[/dim]")
 
         @image_group.command(name="to-sticker")
         @click.argument("input_file")
@@ -310,7 +290,7 @@ class ImagePlugin(BasePlugin):
         @click.argument("input_file", required=False)
         @click.option("-o", "--output", help="Output filename")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        @batch_process
+        @batch_process(outputs=lambda kw: [kw["output"] or f"{Path(kw['input_file']).stem}_nobg.png"])
         def remove_bg(input_file: str, output: Optional[str], dry_run: bool):
             """Remove image background using rembg (AI-powered)."""
             from rembg import remove
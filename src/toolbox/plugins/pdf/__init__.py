@@ -1,16 +1,16 @@
 import click
-import pytesseract
 import contextlib
+import time
 from pathlib import Path
 from typing import List, Optional, Tuple
 from pypdf import PdfWriter, PdfReader
-from pdf2image import convert_from_path
 from toolbox.core.plugin import BasePlugin, PluginMetadata
 from toolbox.core.engine import engine_registry, console
+from toolbox.core.events import event_bus
 from toolbox.core.io import get_input_path
+from toolbox.core.ocr import DEFAULT_DPI, DEFAULT_WINDOW, get_ocr_pool
 from toolbox.core.utils import batch_process
 from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 
 class PdfPlugin(BasePlugin):
     def get_metadata(self) -> PluginMetadata:
@@ -85,7 +85,7 @@ class PdfPlugin(BasePlugin):
         @click.option("-r", "--rotation", type=int, default=90, help="Rotation angle (degrees clockwise)")
         @click.option("-o", "--output", type=click.Path(), help="Output filename")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        @batch_process
+        @batch_process(outputs=lambda kw: [kw["output"] or f"rotated_{Path(kw['input_file']).name}"])
         def rotate(input_file: Optional[str], rotation: int, output: Optional[str], dry_run: bool):
             """Rotate all pages in a PDF. Supports local or URL."""
             with get_input_path(input_file) as path:
@@ -150,7 +150,7 @@ class PdfPlugin(BasePlugin):
         @click.argument("input_file", required=False)
         @click.option("-o", "--output", type=click.Path(), help="Output text file")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        @batch_process
+        @batch_process(outputs=lambda kw: [kw["output"]])
         def extract_text(input_file: Optional[str], output: Optional[str], dry_run: bool):
             """Extract text content from a PDF. Supports local or URL."""
             with get_input_path(input_file) as path:
@@ -177,10 +177,23 @@ class PdfPlugin(BasePlugin):
         @click.argument("input_file", required=False)
         @click.option("-l", "--lang", default="eng", help="OCR language (default: eng)")
         @click.option("-o", "--output", type=click.Path(), help="Output text file")
+        @click.option("--dpi", type=int, default=DEFAULT_DPI, show_default=True, help="Rendering resolution")
+        @click.option("--grayscale/--color", default=True, show_default=True, help="Render pages in grayscale (a third of the memory)")
+        @click.option("--window", type=int, default=DEFAULT_WINDOW, show_default=True, help="Pages rendered at a time per worker")
+        @click.option("-j", "--jobs", type=int, default=0, help="OCR worker processes (0 = CPU count, capped by engine_limits.tesseract)")
+        @click.option("--ocr-cache/--no-ocr-cache", default=None, help="Reuse text recognized before for identically rendered pages (default: ocr_cache setting)")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        @batch_process
-        def ocr(input_file: Optional[str], lang: str, output: Optional[str], dry_run: bool):
-            """Perform OCR on a PDF. Supports local or URL."""
+        @batch_process(outputs=lambda kw: [kw["output"]], engines=("tesseract", "poppler"))
+        def ocr(input_file: Optional[str], lang: str, output: Optional[str], dpi: int, grayscale: bool, window: int,
+                jobs: int, ocr_cache: Optional[bool], dry_run: bool):
+            """Perform OCR on a PDF. Supports local or URL.
+
+            Pages are rendered and recognized a window at a time on the
+            resident OCR worker pool shared with `image ocr`, so memory does
+            not grow with the page count, and text is written to the output
+            in page order as it is ready. Pages rendered identically before
+            (same pixels, language and tesseract) come from the OCR cache.
+            """
             tesseract = engine_registry.get("tesseract")
             poppler = engine_registry.get("poppler")
             
@@ -190,7 +203,6 @@ class PdfPlugin(BasePlugin):
             if not poppler or not poppler.is_available:
                 raise click.ClickException("Poppler not found. Required for PDF to Image conversion.")
 
-            pytesseract.pytesseract.tesseract_cmd = tesseract.path
             poppler_path = str(Path(poppler.path).parent)
             
             with get_input_path(input_file) as path:
@@ -199,31 +211,30 @@ class PdfPlugin(BasePlugin):
                     return
 
                 console.print(f"Processing PDF for OCR: [cyan]{input_file}[/cyan]...")
+                pool = get_ocr_pool(tesseract.path, jobs, tesseract.version)
+                start = time.monotonic()
+                page = 0
                 try:
-                    images = convert_from_path(path, poppler_path=poppler_path)
-                    full_text = []
-                    
-                    with Progress(
-                        SpinnerColumn(),
-                        TextColumn("[progress.description]{task.description}"),
-                        BarColumn(),
-                        TaskProgressColumn(),
-                        console=console
-                    ) as progress:
-                        task = progress.add_task("Running OCR on pages...", total=len(images))
-                        for img in images:
-                            text = pytesseract.image_to_string(img, lang=lang)
-                            full_text.append(text)
-                            progress.update(task, advance=1)
-                    
-                    result = "\n\n".join(full_text)
-                    
+                    with contextlib.ExitStack() as stack:
+                        out = stack.enter_context(open(output, "w", encoding="utf-8")) if output else None
+                        progress = stack.enter_context(event_bus.task("Running OCR on pages", unit="pages"))
+                        pages = pool.pdf_pages(path, lang, poppler_path=poppler_path, dpi=dpi, grayscale=grayscale,
+                                               window=window, cache=ocr_cache, progress=progress)
+                        for page, text in enumerate(pages, 1):
+                            separator = "\n\n" if page > 1 else ""
+                            if out:
+                                out.write(separator + text)
+                                out.flush()
+                            else:
+                                console.print(separator + text, end="")
                     if output:
-                        with open(output, "w", encoding="utf-8") as f:
-                            f.write(result)
                         console.print(f"[green]✓[/green] OCR text saved to [cyan]{output}[/cyan]")
                     else:
-                        console.print(result)
+                        console.print()
+                    elapsed = time.monotonic() - start
+                    if page:
+                        console.print(f"[dim]{page} pages in {elapsed:.1f}s ({page / max(elapsed, 1e-6):.2f} pages/s; "
+                                      f"pool: {pool.summary()})[/dim]")
                         
                 except Exception as e:
                     raise click.ClickException(f"Error during PDF OCR: {e}")
@@ -1,19 +1,40 @@
 import click
 import os
-from typing import Optional
+import shutil
+import tempfile
+from typing import Iterator, List, Optional
 from pathlib import Path
 from toolbox.core.plugin import BasePlugin, PluginMetadata
-from toolbox.core.engine import engine_registry, console
+from toolbox.core.engine import EngineError, engine_registry, console
+from toolbox.core.events import event_bus
+from toolbox.core.inference import DEFAULT_BATCH, DEFAULT_TILE, validate_tile
 from toolbox.core.io import get_input_path
+from toolbox.core import media
+from toolbox.core.media import parse_timestamp
+from toolbox.core.segments import smart_trim, transcode_segmented
 from toolbox.core.utils import batch_process
 
+# Encoder settings for WhatsApp-style animated stickers
+STICKER_CODEC_ARGS = ["-loop", "0", "-vcodec", "libwebp", "-lossless", "0", "-compression_level", "6", "-q:v", "50"]
+
+def gif_filter(fps: int, width: int, source: str = "", output: str = "") -> str:
+    """High-quality GIF filter: a palette generated from the clip itself, then applied to it."""
+    return (f"{source}fps={fps},scale={width}:-1:flags=lanczos,split[s0][s1];"
+            f"[s0]palettegen[p];[s1][p]paletteuse{output}")
+
+def sticker_filter(fps: int) -> str:
+    # 1. Resize to fit 512x512 while maintaining aspect ratio
+    # 2. Pad to exactly 512x512 with transparent background
+    # 3. Set FPS
+    return f"scale=512:512:force_original_aspect_ratio=decrease,pad=512:512:(ow-iw)/2:(oh-ih)/2:color=#00000000,fps={fps}"
+
 class VideoPlugin(BasePlugin):
     """Plugin for video processing using FFmpeg."""
 
     def get_metadata(self) -> PluginMetadata:
         return PluginMetadata(
             name="video",
-            commands=["trim", "extract-audio", "to-gif", "compress", "to-sticker", "extract-frames", "watermark", "remove-watermark"],
+            commands=["trim", "extract-audio", "to-gif", "compress", "to-sticker", "extract-frames", "multi", "watermark", "remove-watermark"],
             engine="ffmpeg"
         )
 
@@ -28,14 +49,14 @@ class VideoPlugin(BasePlugin):
         @click.option("-s", "--scale", type=int, default=2, help="Upscale factor (2 or 4)")
         @click.option("-o", "--output", type=click.Path(), help="Output upscaled video filename")
         @click.option("--fps", type=int, help="Override FPS (defaults to original)")
-        def upscale(input_file: str, scale: int, output: Optional[str], fps: Optional[int]):
+        @click.option("--tile", type=int, default=DEFAULT_TILE, callback=validate_tile, help="Tile size in pixels; bounds memory use (0 = whole frame)")
+        @click.option("--batch", type=int, default=DEFAULT_BATCH, help="Tiles per inference run")
+        def upscale(input_file: str, scale: int, output: Optional[str], fps: Optional[int], tile: int, batch: int):
             """Upscale video using AI (ESRGAN). WARNING: Very slow and resource-intensive."""
-            import cv2
             import numpy as np
-            import onnxruntime as ort
             from toolbox.core.ai import get_model_path, is_gpu_available, AVAILABLE_MODELS
-            import tempfile
-            import shutil
+            from toolbox.core.inference import TiledUpscaler, get_session
+            from toolbox.core.pipeline import read_exact, run_stages
 
             ffmpeg = engine_registry.get("ffmpeg")
             if not ffmpeg.is_available:
@@ -56,121 +77,131 @@ class VideoPlugin(BasePlugin):
 
             with get_input_path(input_file) as path:
                 # 1. Prepare session
-                providers = ["CPUExecutionProvider"]
-                if is_gpu_available():
-                    providers.insert(0, "CUDAExecutionProvider")
-                
                 try:
-                    session = ort.InferenceSession(str(model_path), providers=providers)
+                    session = get_session(str(model_path), gpu=is_gpu_available())
                 except Exception as e:
                     console.print(f"[bold red]Error:[/bold red] Failed to load AI model: {e}")
                     return
 
                 # 2. Get video info
-                cap = cv2.VideoCapture(str(path))
-                if not cap.isOpened():
-                    console.print(f"[bold red]Error:[/bold red] Could not open video {input_file}")
+                try:
+                    stream = media.probe(str(path)).video
+                except EngineError as e:
+                    console.print(f"[bold red]Error:[/bold red] Could not probe video {input_file}: {e}")
+                    return
+                if stream is None or not stream.width or not stream.height:
+                    console.print(f"[bold red]Error:[/bold red] No video stream found in {input_file}")
                     return
-                
-                orig_fps = fps or cap.get(cv2.CAP_PROP_FPS)
-                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                cap.release()
+
+                orig_fps = fps or stream.fps or 30
+                total_frames = stream.frame_count
+                # The decoder applies the rotation, so a portrait phone clip decodes portrait
+                width, height = stream.display_size
 
                 console.print(f"[blue]Upscaling video: {width}x{height} @ {orig_fps} FPS[/blue]")
                 console.print(f"[dim]Scale: {scale}x | Target: {width*scale}x{height*scale}[/dim]")
 
-                # 3. Create temp directory for frames
-                temp_dir = Path(tempfile.mkdtemp(prefix="toolbox_upscale_"))
-                frames_dir = temp_dir / "frames"
-                upscaled_dir = temp_dir / "upscaled"
-                frames_dir.mkdir()
-                upscaled_dir.mkdir()
+                out_path = output or f"upscaled_{Path(path).name}"
+                frame_size = width * height * 3
+                upscaler = TiledUpscaler(session, scale, tile=tile, batch_size=batch)
+                # Small frames are batched together, large ones fill a batch with their own tiles
+                frames_per_run = upscaler.images_per_run(height, width)
+
+                # 3. Decode -> upscale -> encode as concurrent stages over raw RGB pipes.
+                # Nothing touches the disk but the output, and only a few frames are in memory.
+                decode_args = ["-v", "error", "-i", str(path), "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+                encode_args = [
+                    "-y", "-v", "error",
+                    "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width * scale}x{height * scale}",
+                    "-framerate", str(orig_fps),
+                    "-i", "-",
+                    "-i", str(path), # Second input for audio
+                    "-map", "0:v",   # Take video from the upscaled frames on stdin
+                    "-map", "1:a?",  # Take audio from second input (optional)
+                    "-c:v", "libx264",
+                    "-pix_fmt", "yuv420p",
+                    "-crf", "18",
+                    out_path
+                ]
 
-                try:
-                    # Step 1: Extract frames
-                    console.print("[yellow]Step 1/3: Extracting frames...[/yellow]")
-                    ffmpeg.run(["-i", str(path), str(frames_dir / "frame_%05d.png")])
-
-                    # Step 2: Upscale frames
-                    frame_files = sorted(list(frames_dir.glob("*.png")))
-                    console.print(f"[yellow]Step 2/3: Upscaling {len(frame_files)} frames...[/yellow]")
-                    
-                    with console.status("[bold blue]Processing frames...") as status:
-                        for i, frame_file in enumerate(frame_files):
-                            status.update(f"[bold blue]Processing frame {i+1}/{len(frame_files)}...")
-                            
-                            # Load and preprocess
-                            img = cv2.imread(str(frame_file))
-                            if img is None: continue
-                            
-                            img_input = img.astype(np.float32) / 255.0
-                            img_input = np.transpose(img_input[:, :, [2, 1, 0]], (2, 0, 1))
-                            img_input = np.expand_dims(img_input, axis=0)
-                            
-                            # Inference
-                            ort_inputs = {session.get_inputs()[0].name: img_input}
-                            output_tensor = session.run(None, ort_inputs)[0]
-                            
-                            # Postprocess
-                            output_img = np.squeeze(output_tensor)
-                            output_img = np.clip(output_img, 0, 1)
-                            output_img = np.transpose(output_img, (1, 2, 0))
-                            output_img = (output_img[:, :, [2, 1, 0]] * 255).astype(np.uint8)
-                            
-                            # Save upscaled frame
-                            cv2.imwrite(str(upscaled_dir / frame_file.name), output_img)
-
-                    # Step 3: Re-encode video
-                    console.print("[yellow]Step 3/3: Re-encoding video and merging audio...[/yellow]")
-                    out_path = output or f"upscaled_{Path(path).name}"
-                    
-                    # Merge frames back to video and copy audio from original
-                    args = [
-                        "-framerate", str(orig_fps),
-                        "-i", str(upscaled_dir / "frame_%05d.png"),
-                        "-i", str(path), # Second input for audio
-                        "-map", "0:v",   # Take video from first input (upscaled frames)
-                        "-map", "1:a?",  # Take audio from second input (optional)
-                        "-c:v", "libx264",
-                        "-pix_fmt", "yuv420p",
-                        "-crf", "18",
-                        out_path
-                    ]
-                    ffmpeg.run_with_progress(args, label="Finalizing video")
-                    
-                    console.print(f"[green]✓ Video successfully upscaled to {out_path}[/green]")
-
-                finally:
-                    shutil.rmtree(temp_dir)
+                with event_bus.task("Upscaling frames", total=total_frames or None, unit="frames") as progress:
+                    def upscale_frames(raw_frames: List[bytes]) -> bytes:
+                        images = [np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3) for raw in raw_frames]
+                        upscaled = upscaler.upscale(images)
+                        progress.advance(len(upscaled))
+                        return b"".join(img.tobytes() for img in upscaled)
+
+                    def read_groups(decoder) -> Iterator[List[bytes]]:
+                        group: List[bytes] = []
+                        for frame in iter(lambda: read_exact(decoder.read, frame_size), b""):
+                            if len(frame) < frame_size:
+                                break
+                            group.append(frame)
+                            if len(group) == frames_per_run:
+                                yield group
+                                group = []
+                        if group:
+                            yield group
+
+                    # One FFmpeg slot covers decoder and encoder: they only make progress together
+                    with ffmpeg.slot():
+                        with ffmpeg.stream(decode_args, chunk_size=frame_size, acquire=False) as decoder:
+                            upscaled = run_stages(read_groups(decoder), [upscale_frames], maxsize=max(2, 8 // frames_per_run))
+                            try:
+                                encoder = ffmpeg.stream(encode_args, stdin=upscaled, acquire=False)
+                                encoder.wait()
+                            finally:
+                                # Stops the stage threads at once if the encoder failed
+                                upscaled.close()
+
+                console.print(f"[green]✓ Video successfully upscaled to {out_path}[/green]")
 
         @video_group.command(name="trim")
         @click.argument("input_file")
-        @click.option("--start", help="Start time (HH:MM:SS)")
-        @click.option("--end", help="End time (HH:MM:SS)")
+        @click.option("--start", help="Start time (HH:MM:SS or seconds)")
+        @click.option("--end", help="End time (HH:MM:SS or seconds)")
         @click.option("-o", "--output", type=click.Path(), default="trimmed.mp4")
+        @click.option("--mode", type=click.Choice(["copy", "smart", "exact"]), default="copy", show_default=True,
+                      help="copy: stream copy, cuts snap to keyframes; smart: copy whole GOPs and re-encode "
+                           "only the cut ones (frame-accurate, H.264/HEVC/VP9); exact: re-encode everything")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        def trim(input_file: str, start: Optional[str], end: Optional[str], output: str, dry_run: bool):
+        def trim(input_file: str, start: Optional[str], end: Optional[str], output: str, mode: str, dry_run: bool):
             """Trim a video file. Supports local or URL."""
             ffmpeg = engine_registry.get("ffmpeg")
             if not ffmpeg.is_available:
                 console.print("[bold red]Error:[/bold red] FFmpeg engine not found. Please install FFmpeg.")
                 return
 
+            try:
+                start_s = parse_timestamp(start) if start else 0.0
+                end_s = parse_timestamp(end) if end else None
+            except ValueError as e:
+                console.print(f"[bold red]Error:[/bold red] {e}")
+                return
+            if end_s is not None and end_s <= start_s:
+                console.print("[bold red]Error:[/bold red] --end must be after --start.")
+                return
+
             with get_input_path(input_file) as path:
-                args = ["-i", path]
-                if start:
-                    args.extend(["-ss", start])
-                if end:
-                    args.extend(["-to", end])
-                args.extend(["-c", "copy", output])
-                
                 if dry_run:
-                    console.print(f"[bold yellow]Would trim {input_file} (start={start}, end={end}) and save as {output}[/bold yellow]")
+                    console.print(f"[bold yellow]Would trim {input_file} (start={start}, end={end}, mode={mode}) and save as {output}[/bold yellow]")
                     return
 
-                ffmpeg.run_with_progress(args, label=f"Trimming {os.path.basename(path)}")
+                label = f"Trimming {os.path.basename(path)}"
+                if mode == "smart" and smart_trim(ffmpeg, path, output, start_s, end_s, label=label):
+                    console.print(f"[green]✓ Trimmed video saved to {output}[/green]")
+                    return
+
+                # Seeking on the input jumps straight to the cut instead of reading up to it
+                args = ["-ss", f"{start_s:.6f}"] if start_s else []
+                if end_s is not None:
+                    args.extend(["-t", f"{end_s - start_s:.6f}"])
+                args.extend(["-i", path])
+                if mode != "exact":
+                    args.extend(["-c", "copy"])
+                args.append(output)
+
+                ffmpeg.run_with_progress(args, label=label)
                 console.print(f"[green]✓ Trimmed video saved to {output}[/green]")
 
         @video_group.command(name="extract-audio")
@@ -200,7 +231,7 @@ class VideoPlugin(BasePlugin):
         @click.option("-fps", "--fps", type=int, default=10, help="Frames per second")
         @click.option("-w", "--width", type=int, default=480, help="GIF width")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        @batch_process
+        @batch_process(outputs=lambda kw: [kw["output"] or f"{Path(kw['input_file']).stem}.gif"])
         def to_gif(input_file: str, output: Optional[str], fps: int, width: int, dry_run: bool):
             """Convert video to GIF. Supports local or URL."""
             ffmpeg = engine_registry.get("ffmpeg")
@@ -216,8 +247,7 @@ class VideoPlugin(BasePlugin):
                     return
 
                 # Use a high-quality GIF conversion filter palette
-                filter_complex = f"fps={fps},scale={width}:-1:flags=lanczos,split[s0][s1];[s0]palettegen[p];[s1][p]paletteuse"
-                args = ["-i", path, "-filter_complex", filter_complex, out_path]
+                args = ["-i", path, "-filter_complex", gif_filter(fps, width), out_path]
                 ffmpeg.run_with_progress(args, label=f"Converting {os.path.basename(path)} to GIF")
                 console.print(f"[green]✓ Converted to GIF: {out_path}[/green]")
 
@@ -225,9 +255,10 @@ class VideoPlugin(BasePlugin):
         @click.argument("input_file", required=False)
         @click.option("-crf", "--crf", type=int, default=28, help="Constant Rate Factor (lower is better quality, 0-51)")
         @click.option("-o", "--output", type=click.Path(), help="Output filename")
+        @click.option("--segments", type=int, default=0, help="Encode N keyframe-aligned segments in parallel and join them (0 = single pass)")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        @batch_process
-        def compress(input_file: str, crf: int, output: Optional[str], dry_run: bool):
+        @batch_process(outputs=lambda kw: [kw["output"] or f"compressed_{os.path.basename(kw['input_file'])}"])
+        def compress(input_file: str, crf: int, output: Optional[str], segments: int, dry_run: bool):
             """Compress video using H.264. Supports local or URL."""
             ffmpeg = engine_registry.get("ffmpeg")
             if not ffmpeg.is_available:
@@ -241,8 +272,11 @@ class VideoPlugin(BasePlugin):
                     console.print(f"[bold yellow]Would compress {input_file} (crf={crf}) and save as {out_path}[/bold yellow]")
                     return
 
-                args = ["-i", path, "-vcodec", "libx264", "-crf", str(crf), out_path]
-                ffmpeg.run_with_progress(args, label=f"Compressing {os.path.basename(path)}")
+                video_args = ["-vcodec", "libx264", "-crf", str(crf)]
+                label = f"Compressing {os.path.basename(path)}"
+                if not (segments > 1 and transcode_segmented(ffmpeg, path, out_path, video_args,
+                                                             segments=segments, label=label)):
+                    ffmpeg.run_with_progress(["-i", path, *video_args, out_path], label=label)
                 console.print(f"[green]✓ Compressed video saved to {out_path}[/green]")
 
         @video_group.command(name="to-sticker")
@@ -264,22 +298,8 @@ class VideoPlugin(BasePlugin):
                     console.print(f"[bold yellow]Would convert {input_file} to sticker (fps={fps}) and save as {out_path}[/bold yellow]")
                     return
                 
-                # WhatsApp sticker filter: 
-                # 1. Resize to fit 512x512 while maintaining aspect ratio
-                # 2. Pad to exactly 512x512 with transparent background
-                # 3. Set FPS
-                filter_str = f"scale=512:512:force_original_aspect_ratio=decrease,pad=512:512:(ow-iw)/2:(oh-ih)/2:color=#00000000,fps={fps}"
-                
-                args = [
-                    "-i", path,
-                    "-vf", filter_str,
-                    "-loop", "0",
-                    "-vcodec", "libwebp",
-                    "-lossless", "0",
-                    "-compression_level", "6",
-                    "-q:v", "50",
-                    out_path
-                ]
+                # WhatsApp sticker: 512x512 animated WebP
+                args = ["-i", path, "-vf", sticker_filter(fps), *STICKER_CODEC_ARGS, out_path]
                 
                 ffmpeg.run_with_progress(args, label=f"Converting {os.path.basename(path)} to sticker")
                 console.print(f"[green]✓ Video converted to sticker: {out_path}[/green]")
@@ -290,13 +310,32 @@ class VideoPlugin(BasePlugin):
         @click.option("-i", "--interval", type=float, default=1.0, help="Interval in seconds between frames")
         @click.option("-o", "--output-dir", type=click.Path(), default="frames", help="Output directory")
         @click.option("-f", "--format", type=click.Choice(['jpg', 'png']), default='jpg')
+        @click.option("-j", "--jobs", type=int, default=0, help="Seek to each frame with N parallel workers instead of decoding the whole stream (0 = one sequential decode)")
+        @click.option("--snap-keyframes", is_flag=True, help="With --jobs, take the nearest keyframe to each time (one decoded frame per thumbnail)")
+        @click.option("--sprite", is_flag=True, help="Also pack the frames into sprite sheets with a JSON and WebVTT index")
+        @click.option("--thumb-width", type=int, default=160, help="Width of the thumbnails in the sprite sheets (the extracted frames keep their size)")
+        @click.option("--sprite-grid", default="10x10", help="Thumbnails per sprite sheet as COLUMNSxROWS")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        def extract_frames(input_file: str, interval: float, output_dir: str, format: str, dry_run: bool):
+        def extract_frames(input_file: str, interval: float, output_dir: str, format: str, jobs: int,
+                           snap_keyframes: bool, sprite: bool, thumb_width: int, sprite_grid: str, dry_run: bool):
             """Extract frames from video at intervals. Supports local or URL."""
+            from toolbox.core import media
+            from toolbox.core.thumbnails import build_sprites, extract_at, frame_times, snap_to_keyframes
+
             ffmpeg = engine_registry.get("ffmpeg")
             if not ffmpeg.is_available:
                 console.print("[bold red]Error:[/bold red] FFmpeg engine not found. Please install FFmpeg.")
                 return
+            try:
+                columns, rows = (int(v) for v in sprite_grid.lower().split("x"))
+            except ValueError:
+                columns = rows = 0
+            if columns < 1 or rows < 1:
+                console.print("[bold red]Error:[/bold red] --sprite-grid must look like 10x10, with both values at least 1.")
+                return
+            if sprite and thumb_width < 1:
+                console.print("[bold red]Error:[/bold red] --thumb-width must be at least 1.")
+                return
 
             with get_input_path(input_file) as path:
                 out_dir = Path(output_dir)
@@ -306,23 +345,140 @@ class VideoPlugin(BasePlugin):
                     return
 
                 out_dir.mkdir(parents=True, exist_ok=True)
-                
-                args = [
-                    "-i", path,
-                    "-vf", f"fps=1/{interval}",
-                    str(out_dir / f"frame_%04d.{format}")
-                ]
-                ffmpeg.run_with_progress(args, label=f"Extracting frames from {os.path.basename(path)}")
+                label = f"Extracting frames from {os.path.basename(path)}"
+                info = None
+                if jobs > 0 or sprite:
+                    if engine_registry.get("ffprobe").is_available:
+                        info = media.probe(path, keyframes=snap_keyframes)
+                    elif jobs > 0:
+                        console.print("[yellow]FFprobe not found; extracting with one sequential decode.[/yellow]")
+
+                if jobs > 0 and info and info.duration:
+                    times = frame_times(info.duration, interval)
+                    if snap_keyframes:
+                        times = snap_to_keyframes(times, info.keyframes or [])
+                    frames = [str(out_dir / f"frame_{i:04d}.{format}") for i in range(1, len(times) + 1)]
+                    limit = ffmpeg.limiter.limit("ffmpeg") if ffmpeg.limiter else 0
+                    video_args = ["-q:v", "2"] if format == "jpg" else []
+                    extract_at(ffmpeg, path, times, frames, jobs=min(jobs, limit) if limit > 0 else jobs,
+                               video_args=video_args, label=label)
+                else:
+                    # Decode into a fresh directory so only this run's frames are counted,
+                    # not ones an earlier run left behind, then move them into place
+                    work_dir = Path(tempfile.mkdtemp(prefix=".frames_", dir=out_dir))
+                    try:
+                        args = [
+                            "-i", path,
+                            "-vf", f"fps=1/{interval}",
+                            str(work_dir / f"frame_%04d.{format}")
+                        ]
+                        ffmpeg.run_with_progress(args, label=label)
+                        frames = []
+                        for produced in sorted(work_dir.glob(f"frame_*.{format}")):
+                            frames.append(str(out_dir / produced.name))
+                            os.replace(produced, frames[-1])
+                    finally:
+                        shutil.rmtree(work_dir, ignore_errors=True)
+                    times = [i * interval for i in range(len(frames))]
                 console.print(f"[green]✓ Frames extracted to {output_dir}[/green]")
 
+                if sprite and frames:
+                    entries = build_sprites(frames, times, out_dir, duration=info.duration if info else None,
+                                            columns=columns, rows=rows, thumb_width=thumb_width)
+                    sheets = len({entry["sheet"] for entry in entries})
+                    console.print(f"[green]✓ Packed {len(entries)} thumbnails into {sheets} sprite sheet(s); "
+                                  f"index: {out_dir / 'sprite.json'}, {out_dir / 'sprite.vtt'}[/green]")
+
+        @video_group.command(name="multi")
+        @click.argument("input_file")
+        @click.option("--gif", "gif_out", type=click.Path(), help="Write a GIF here")
+        @click.option("--sticker", "sticker_out", type=click.Path(), help="Write a 512x512 WebP sticker here")
+        @click.option("--audio", "audio_out", type=click.Path(), help="Write the audio track here")
+        @click.option("--frames", "frames_dir", type=click.Path(), help="Write frames into this directory")
+        @click.option("--compressed", "compressed_out", type=click.Path(), help="Write an H.264 copy here")
+        @click.option("--gif-fps", type=int, default=10, help="GIF frames per second")
+        @click.option("--gif-width", type=int, default=480, help="GIF width")
+        @click.option("--sticker-fps", type=int, default=15, help="Sticker FPS")
+        @click.option("-i", "--interval", type=float, default=1.0, help="Interval in seconds between frames")
+        @click.option("-f", "--format", "frame_format", type=click.Choice(['jpg', 'png']), default='jpg', help="Frame image format")
+        @click.option("-crf", "--crf", type=int, default=28, help="Constant Rate Factor of the compressed copy")
+        @click.option("--dry-run", is_flag=True, help="Show what would happen")
+        def multi(input_file: str, gif_out: Optional[str], sticker_out: Optional[str], audio_out: Optional[str],
+                  frames_dir: Optional[str], compressed_out: Optional[str], gif_fps: int, gif_width: int,
+                  sticker_fps: int, interval: float, frame_format: str, crf: int, dry_run: bool):
+            """Produce several outputs from one decode of a video. Supports local or URL.
+
+            Equivalent to running to-gif, to-sticker, extract-audio,
+            extract-frames and compress on the same input, but the input is
+            read and decoded once and split between the outputs in a single
+            FFmpeg filter graph.
+            """
+            video_outputs = [out for out in (gif_out, sticker_out, frames_dir, compressed_out) if out]
+            if not video_outputs and not audio_out:
+                console.print("[bold red]Error:[/bold red] Request at least one of --gif, --sticker, --audio, --frames or --compressed.")
+                return
+
+            ffmpeg = engine_registry.get("ffmpeg")
+            if not ffmpeg.is_available:
+                console.print("[bold red]Error:[/bold red] FFmpeg engine not found. Please install FFmpeg.")
+                return
+
+            with get_input_path(input_file) as path:
+                # One decoded video stream, split once per video output
+                branches = [f"[v{i}]" for i in range(len(video_outputs))]
+                graph = [f"[0:v]split={len(branches)}{''.join(branches)}"] if branches else []
+                outputs: List[str] = []
+                branch = iter(branches)
+                if gif_out:
+                    graph.append(gif_filter(gif_fps, gif_width, source=next(branch), output="[gif]"))
+                    outputs += ["-map", "[gif]", gif_out]
+                if sticker_out:
+                    graph.append(f"{next(branch)}{sticker_filter(sticker_fps)}[sticker]")
+                    outputs += ["-map", "[sticker]", *STICKER_CODEC_ARGS, sticker_out]
+                if frames_dir:
+                    graph.append(f"{next(branch)}fps=1/{interval}[frames]")
+                    outputs += ["-map", "[frames]", str(Path(frames_dir) / f"frame_%04d.{frame_format}")]
+                if compressed_out:
+                    # The decoded audio is shared between outputs that map it, like the video split
+                    outputs += ["-map", next(branch), "-map", "0:a?", "-vcodec", "libx264", "-crf", str(crf), compressed_out]
+                if audio_out:
+                    outputs += ["-map", "0:a", "-q:a", "0", audio_out]
+
+                args = ["-i", path]
+                if graph:
+                    args += ["-filter_complex", ";".join(graph)]
+                args += outputs
+
+                if dry_run:
+                    console.print(f"[bold yellow]Would run: ffmpeg {' '.join(args)}[/bold yellow]")
+                    return
+
+                # An --audio output without an audio stream would fail the whole single-decode run
+                if audio_out and engine_registry.get("ffprobe").is_available:
+                    try:
+                        has_audio = media.probe(path).audio is not None
+                    except EngineError as e:
+                        console.print(f"[bold red]Error:[/bold red] Could not probe {input_file}: {e}")
+                        return
+                    if not has_audio:
+                        console.print(f"[bold red]Error:[/bold red] {input_file} has no audio stream; drop --audio.")
+                        return
+
+                if frames_dir:
+                    Path(frames_dir).mkdir(parents=True, exist_ok=True)
+                ffmpeg.run_with_progress(args, label=f"Processing {os.path.basename(path)}")
+                written = [out for out in (gif_out, sticker_out, audio_out, frames_dir, compressed_out) if out]
+                console.print(f"[green]✓ Wrote {len(written)} output(s) from one decode: {', '.join(written)}[/green]")
+
         @video_group.command(name="watermark")
         @click.argument("input_file")
         @click.option("-t", "--text", help="Text watermark to add")
         @click.option("-i", "--image", type=click.Path(exists=True), help="Image watermark to add")
         @click.option("-o", "--output", default="watermarked.mp4", help="Output filename")
         @click.option("--pos", default="bottom-right", type=click.Choice(['top-left', 'top-right', 'bottom-left', 'bottom-right', 'center']), help="Watermark position")
+        @click.option("--segments", type=int, default=0, help="Encode N keyframe-aligned segments in parallel and join them (0 = single pass)")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        def watermark(input_file: str, text: Optional[str], image: Optional[str], output: str, pos: str, dry_run: bool):
+        def watermark(input_file: str, text: Optional[str], image: Optional[str], output: str, pos: str, segments: int, dry_run: bool):
             """Add text or image watermark to a video."""
             if not text and not image:
                 console.print("[bold red]Error:[/bold red] Either --text or --image must be provided.")
@@ -356,23 +512,18 @@ class VideoPlugin(BasePlugin):
                 }
 
                 if image:
-                    args = [
-                        "-i", path,
-                        "-i", image,
-                        "-filter_complex", f"overlay={pos_map[pos]}",
-                        "-codec:a", "copy",
-                        output
-                    ]
+                    inputs = [image]
+                    video_args = ["-filter_complex", f"overlay={pos_map[pos]}"]
                 else:
                     # Basic drawtext filter
-                    args = [
-                        "-i", path,
-                        "-vf", f"drawtext=text='{text}':{text_pos_map[pos]}:fontsize=24:fontcolor=white@0.8:shadowcolor=black:shadowx=2:shadowy=2",
-                        "-codec:a", "copy",
-                        output
-                    ]
-
-                ffmpeg.run_with_progress(args, label=f"Adding watermark to {os.path.basename(path)}")
+                    inputs = []
+                    video_args = ["-vf", f"drawtext=text='{text}':{text_pos_map[pos]}:fontsize=24:fontcolor=white@0.8:shadowcolor=black:shadowx=2:shadowy=2"]
+
+                label = f"Adding watermark to {os.path.basename(path)}"
+                if not (segments > 1 and transcode_segmented(ffmpeg, path, output, video_args, ["-codec:a", "copy"],
+                                                             inputs=inputs, segments=segments, label=label)):
+                    args = ["-i", path, *[arg for item in inputs for arg in ("-i", item)], *video_args, "-codec:a", "copy", output]
+                    ffmpeg.run_with_progress(args, label=label)
                 console.print(f"[green]✓ Watermark added: {output}[/green]")
 
         @video_group.command(name="remove-watermark")
@@ -382,8 +533,9 @@ class VideoPlugin(BasePlugin):
         @click.option("-w", "--width", type=int, required=True, help="Width of the watermark")
         @click.option("-h", "--height", type=int, required=True, help="Height of the watermark")
         @click.option("-o", "--output", default="cleaned.mp4", help="Output filename")
+        @click.option("--segments", type=int, default=0, help="Encode N keyframe-aligned segments in parallel and join them (0 = single pass)")
         @click.option("--dry-run", is_flag=True, help="Show what would happen")
-        def remove_watermark(input_file: str, x: int, y: int, width: int, height: int, output: str, dry_run: bool):
+        def remove_watermark(input_file: str, x: int, y: int, width: int, height: int, output: str, segments: int, dry_run: bool):
             """Remove a watermark from a specific area using the delogo filter."""
             ffmpeg = engine_registry.get("ffmpeg")
             if not ffmpeg.is_available:
@@ -396,13 +548,10 @@ class VideoPlugin(BasePlugin):
                     return
 
                 # delogo filter: x:y:w:h
-                args = [
-                    "-i", path,
-                    "-vf", f"delogo=x={x}:y={y}:w={width}:h={height}",
-                    "-codec:a", "copy",
-                    output
-                ]
-
-                ffmpeg.run_with_progress(args, label=f"Removing watermark from {os.path.basename(path)}")
+                video_args = ["-vf", f"delogo=x={x}:y={y}:w={width}:h={height}"]
+                label = f"Removing watermark from {os.path.basename(path)}"
+                if not (segments > 1 and transcode_segmented(ffmpeg, path, output, video_args, ["-codec:a", "copy"],
+                                                             segments=segments, label=label)):
+                    ffmpeg.run_with_progress(["-i", path, *video_args, "-codec:a", "copy", output], label=label)
                 console.print(f"[green]✓ Watermark removed (blurred): {output}[/green]")
                 console.print("[yellow]Note: Watermark removal uses a blur/interpolation effect on the specified area.[/yellow]")
@@ -0,0 +1,112 @@
+import os
+import click
+import pytest
+from click.testing import CliRunner
+from toolbox.core.batch import BatchTask, choose_executor, command_path, make_task, run_in_processes
+from toolbox.core.cache import ResultCache
+from toolbox.core.utils import batch_process
+
+@click.group()
+def root():
+    pass
+
+@root.group(name="fake")
+def fake_group():
+    pass
+
+@fake_group.command(name="stamp")
+@click.argument("input_file", required=False)
+@click.option("--suffix", default=".out")
+@batch_process(outputs=lambda kw: [kw["input_file"] + kw["suffix"]])
+def stamp(input_file, suffix):
+    if input_file.endswith("bad.txt"):
+        raise ValueError("refusing bad input")
+    with open(input_file + suffix, "w") as f:
+        f.write(str(os.getpid()))
+
+@pytest.fixture
+def inputs(tmp_path):
+    files = []
+    for i in range(6):
+        path = tmp_path / f"in{i}.txt"
+        path.write_text(f"x{i}")
+        files.append(str(path))
+    return files
+
+def test_choose_executor():
+    assert choose_executor("thread", ["image", "resize"], 100, 8) == "thread"
+    assert choose_executor("auto", ["image", "resize"], 1, 8) == "thread"
+    assert choose_executor("auto", ["image", "resize"], 100, 1) == "thread"
+    # A command's own registry engines make it I/O-bound whatever its plugin says
+    assert choose_executor("auto", ["image", "ocr"], 100, 8, engines=("tesseract",)) == "thread"
+
+def test_task_is_built_from_context():
+    ctx = click.Context(root, info_name="toolbox")
+    ctx = click.Context(fake_group, info_name="fake", parent=ctx)
+    ctx = click.Context(stamp, info_name="stamp", parent=ctx)
+    assert command_path(ctx) == ["fake", "stamp"]
+    task = make_task(ctx, {"input_file": "a.txt", "suffix": ".done"})
+    assert task.root == f"{__name__}:root"
+    assert task.kwargs == {"suffix": ".done"}
+
+def test_run_in_processes(inputs):
+    task = BatchTask(root=f"{__name__}:root", command_path=["fake", "stamp"], kwargs={"suffix": ".out"})
+    results = list(run_in_processes(task, inputs, workers=2))
+    assert sorted(r.input_file for r in results) == sorted(inputs)
+    assert all(r.ok for r in results)
+    pids = {open(f + ".out").read() for f in inputs}
+    assert str(os.getpid()) not in pids
+
+def test_process_batch_reports_failures(inputs, tmp_path):
+    (tmp_path / "bad.txt").write_text("x")
+    result = CliRunner().invoke(root, [
+        "fake", "stamp", "--glob", str(tmp_path / "*.txt"), "--parallel", "--workers", "2", "--executor", "process"
+    ])
+    assert result.exit_code == 0
+    assert "executor: process" in result.output
+    assert "bad.txt: refusing bad input" in " ".join(result.output.split())
+    assert "6/7 successful" in result.output
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_cached_batch_skips_unchanged_inputs(inputs, tmp_path, monkeypatch, executor):
+    monkeypatch.setattr("toolbox.core.batch.result_cache", ResultCache(tmp_path / "cache"))
+    args = ["fake", "stamp", "--glob", str(tmp_path / "in*.txt"), "--cache",
+            "--parallel", "--workers", "2", "--executor", executor]
+    first = CliRunner().invoke(root, args)
+    assert "6/6 successful (0 from cache)" in first.output
+
+    (tmp_path / "in0.txt").write_text("changed")
+    second = CliRunner().invoke(root, args)
+    assert "6/6 successful (5 from cache)" in second.output
+    assert all(os.path.exists(f + ".out") for f in inputs)
+
+def test_journal_resume_skips_done_files(inputs, tmp_path):
+    journal = str(tmp_path / "run.db")
+    (tmp_path / "bad.txt").write_text("x")
+    args = ["fake", "stamp", "--glob", str(tmp_path / "*.txt"), "--journal", journal]
+    assert "6/7 successful" in CliRunner().invoke(root, args).output
+
+    result = CliRunner().invoke(root, args + ["--resume"])
+    assert "6 files were already done" in result.output
+    assert "0/1 successful" in result.output
+
+    result = CliRunner().invoke(root, ["fake", "stamp", "in0.txt", "--resume"])
+    assert "--resume requires --journal" in result.output
+
+def test_windowed_bounds_in_flight():
+    from concurrent.futures import ThreadPoolExecutor
+    from toolbox.core.batch import _windowed
+    consumed = []
+
+    def items():
+        for i in range(20):
+            consumed.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = []
+        for item, future in _windowed(lambda i: executor.submit(lambda: i * 2), items(), 3):
+            # Never more than `window` items pulled ahead of those completed
+            assert len(consumed) - len(results) <= 3
+            results.append(future.result())
+    assert sorted(results) == [i * 2 for i in range(20)]
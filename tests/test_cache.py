@@ -0,0 +1,53 @@
+import os
+import time
+import pytest
+from toolbox.core.cache import ResultCache, make_key
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "cache", max_bytes=1 << 20)
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+def test_store_lookup_materialize(cache, tmp_path):
+    output = _write(tmp_path / "out.bin", b"result")
+    key = make_key(command=["x"], input="abc")
+    assert cache.lookup(key) is None
+    cache.store(key, [output], command="x")
+
+    target = tmp_path / "restored" / "out.bin"
+    blobs = cache.lookup(key)
+    cache.materialize(blobs, [str(target)])
+    assert target.read_bytes() == b"result"
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+def test_modified_blob_is_a_miss(cache, tmp_path):
+    output = _write(tmp_path / "out.bin", b"result")
+    cache.store("k", [output])
+    # The output is hardlinked to the blob, so editing it in place corrupts the blob
+    with open(output, "ab") as f:
+        f.write(b"edited")
+    os.utime(output, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    assert cache.lookup("k") is None
+    assert cache.stats()["entries"] == 0
+
+def test_prune_evicts_least_recently_used(cache, tmp_path):
+    for name in ("a", "b", "c"):
+        cache.store(name, [_write(tmp_path / name, name.encode() * 100)])
+        time.sleep(0.01)
+    cache.lookup("a")
+    removed, freed = cache.prune(max_bytes=200)
+    assert (removed, freed) == (1, 100)
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None
+    assert not (cache.blob_dir / "x").exists()
+    assert sum(1 for _ in cache.blob_dir.glob("*/*")) == 2
+
+def test_file_digest_is_memoized(cache, tmp_path, monkeypatch):
+    source = _write(tmp_path / "in.txt", b"data")
+    digest = cache.file_digest(source)
+    monkeypatch.setattr("toolbox.core.cache.hash_file", lambda path: pytest.fail("rehashed"))
+    assert cache.file_digest(source) == digest
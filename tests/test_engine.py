@@ -1,5 +1,6 @@
+import os
 import pytest
-from toolbox.core.engine import EngineRegistry, BaseEngine, EngineError
+from toolbox.core.engine import EngineRegistry, BaseEngine, EngineCache, EngineError, FFmpegEngine
 
 def test_engine_registry_get():
     registry = EngineRegistry()
@@ -12,7 +13,186 @@ def test_engine_registry_invalid():
     with pytest.raises(EngineError):
         registry.get("nonexistent")
 
-def test_base_engine_availability():
+def test_base_engine_availability(tmp_path):
     # This might depend on the environment, but we can mock it
-    engine = BaseEngine("Test", "nonexistent_binary")
+    engine = BaseEngine("Test", "nonexistent_binary", cache=EngineCache(tmp_path / "engine_cache.json"))
     assert engine.is_available is False
+
+FAKE_FFMPEG = """#!/bin/sh
+echo "$@" >> "${0%/*}/../calls.log"
+case "$*" in
+  *-encoders*) printf 'Encoders:\\n V..... = Video\\n ------\\n V....D libx264   H.264\\n A....D aac       AAC\\n' ;;
+  *-filters*) printf 'Filters:\\n  T.. = Timeline support\\n TSC scale  V->V  Scale\\n ... concat N->N Concat\\n' ;;
+  *-hwaccels*) printf 'Hardware acceleration methods:\\ncuda\\n' ;;
+  *-bsfs*) printf 'Bitstream filters:\\ndump_extra\\nnoise\\n' ;;
+  *) echo "ffmpeg version 6.1.1-test Copyright (c) 2000-2023" ;;
+esac
+"""
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    binary = bin_dir / "ffmpeg"
+    binary.write_text(FAKE_FFMPEG)
+    binary.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    return binary
+
+def _calls(binary):
+    log = binary.parent.parent / "calls.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake binary")
+def test_engine_cache_reuses_discovery_and_probe(tmp_path, fake_ffmpeg, monkeypatch):
+    cache_path = tmp_path / "engine_cache.json"
+    engine = FFmpegEngine()
+    engine.cache = EngineCache(cache_path)
+    assert engine.path == str(fake_ffmpeg)
+    assert engine.version == "6.1.1-test"
+    assert engine.has_capability("encoders", "libx264")
+    assert engine.has_capability("filters", "scale")
+    assert not engine.has_capability("filters", "Timeline")
+    assert engine.has_capability("bsfs", "noise")
+    probes = len(_calls(fake_ffmpeg))
+    assert probes == 5
+
+    # A fresh process neither searches PATH nor spawns the binary again
+    monkeypatch.setattr("toolbox.core.engine.shutil.which", lambda *a: pytest.fail("PATH searched"))
+    warm = FFmpegEngine()
+    warm.cache = EngineCache(cache_path)
+    assert warm.path == str(fake_ffmpeg)
+    assert warm.probe()["capabilities"]["hwaccels"] == ["cuda"]
+    assert len(_calls(fake_ffmpeg)) == probes
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake binary")
+def test_engine_cache_invalidation(tmp_path, fake_ffmpeg, monkeypatch):
+    cache_path = tmp_path / "engine_cache.json"
+    engine = FFmpegEngine()
+    engine.cache = EngineCache(cache_path)
+    engine.probe()
+    probes = len(_calls(fake_ffmpeg))
+
+    # Upgrading the binary in place changes its mtime
+    st = os.stat(fake_ffmpeg)
+    os.utime(fake_ffmpeg, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    upgraded = FFmpegEngine()
+    upgraded.cache = EngineCache(cache_path)
+    upgraded.probe()
+    assert len(_calls(fake_ffmpeg)) > probes
+
+    # A different PATH invalidates the whole cache, including negative results
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    moved = FFmpegEngine()
+    moved.cache = EngineCache(cache_path)
+    assert moved.path is None
+
+@pytest.fixture
+def shell_engine(tmp_path):
+    engine = BaseEngine("Shell", "sh", cache=EngineCache(tmp_path / "engine_cache.json"))
+    engine._path = "/bin/sh"
+    return engine
+
+def test_stream_pipes_generator_through_engine(shell_engine, tmp_path):
+    chunks = (bytes([i]) * 100_000 for i in range(5))
+    received = []
+    proc = shell_engine.stream(["-c", "cat; echo done >&2"], stdin=chunks, stdout=received.append,
+                               stderr=str(tmp_path / "err.log"), chunk_size=4096)
+    assert proc.wait() == 0
+    assert b"".join(received) == b"".join(bytes([i]) * 100_000 for i in range(5))
+    assert max(len(c) for c in received) <= 4096
+    assert (tmp_path / "err.log").read_bytes() == b"done\n"
+
+def test_stream_incremental_read_and_failure(shell_engine, tmp_path):
+    source = tmp_path / "in.bin"
+    source.write_bytes(b"abc" * 1000)
+    with shell_engine.stream(["-c", "cat"], stdin=str(source)) as proc:
+        assert b"".join(proc.iter_chunks(100)) == b"abc" * 1000
+
+    lines = []
+    proc = shell_engine.stream(["-c", "echo first >&2; echo boom >&2; exit 3"], stderr=lines.append)
+    with pytest.raises(EngineError, match="exit code 3"):
+        proc.wait()
+    assert lines == ["first\n", "boom\n"]
+    assert "boom" in "".join(proc.stderr_tail)
+
+def test_chained_streams_share_one_slot(shell_engine, tmp_path, monkeypatch):
+    import threading
+    from toolbox.core.config import config_manager
+    from toolbox.core.limits import EngineLimiter
+
+    settings = config_manager.settings.model_copy(deep=True)
+    settings.engine_limits = {"shell": 1}
+    monkeypatch.setattr(config_manager, "settings", settings)
+    shell_engine.limiter = EngineLimiter(tmp_path)
+    received = []
+
+    def pipeline():
+        # Decoder -> encoder as in video upscale; more data than a pipe buffer holds
+        with shell_engine.slot():
+            with shell_engine.stream(["-c", "head -c 1000000 /dev/zero"], acquire=False) as decoder:
+                encoder = shell_engine.stream(["-c", "wc -c"], stdin=decoder.iter_chunks(),
+                                              stdout=received.append, acquire=False)
+                encoder.wait()
+
+    runner = threading.Thread(target=pipeline, daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive(), "pipeline deadlocked on the engine limit"
+    assert b"".join(received).strip() == b"1000000"
+
+FAKE_ENCODE = """#!/bin/sh
+printf "%s\\n" "$@" > "${0%/*}/args.log"
+echo "  Duration: 00:00:10.00, start: 0.000000, bitrate: 1000 kb/s" >&2
+printf 'frame=10\\nout_time_us=N/A\\nprogress=continue\\n'
+printf 'frame=120\\nout_time_us=4000000\\nspeed=2.0x\\nprogress=continue\\n'
+printf 'frame=300\\nout_time_us=10000000\\nspeed=2.1x\\nprogress=end\\n'
+"""
+
+def test_run_with_progress_publishes_events(tmp_path, monkeypatch):
+    from toolbox.core.events import EventBus, ProgressSink
+
+    class Collect(ProgressSink):
+        def __init__(self):
+            self.events = []
+
+        def emit(self, event):
+            self.events.append(event)
+
+    binary = tmp_path / "ffmpeg"
+    binary.write_text(FAKE_ENCODE)
+    binary.chmod(0o755)
+    bus, sink = EventBus(), Collect()
+    bus.configure([sink])
+    monkeypatch.setattr("toolbox.core.engine.event_bus", bus)
+
+    engine = FFmpegEngine()
+    engine._path = str(binary)
+    result = engine.run_with_progress(["-i", "in.mp4", "out.mp4"], label="Encoding")
+    assert result.returncode == 0
+    # stderr (the duration) and stdout (the progress) race each other, so only
+    # what every interleaving guarantees is checked
+    progress = [(e.completed, e.total) for e in sink.events if e.kind == "progress"]
+    assert 4.0 in [completed for completed, _ in progress]
+    totals = [total for _, total in progress]
+    assert all(total == 10.0 for total in totals[totals.index(10.0):])
+    assert progress[-1] == (10.0, 10.0)
+    assert sink.events[-1].kind == "end" and sink.events[-1].ok
+
+@pytest.mark.parametrize("auto_overwrite, flag", [(False, "-n"), (True, "-y")])
+def test_run_with_progress_decides_overwrites_itself(tmp_path, monkeypatch, auto_overwrite, flag):
+    from toolbox.core.config import config_manager
+
+    binary = tmp_path / "ffmpeg"
+    binary.write_text(FAKE_ENCODE)
+    binary.chmod(0o755)
+    monkeypatch.setattr(config_manager.settings, "auto_overwrite", auto_overwrite)
+    engine = FFmpegEngine()
+    engine._path = str(binary)
+
+    engine.run_with_progress(["-i", "in.mp4", "out.mp4"])
+    assert (tmp_path / "args.log").read_text().split()[0] == flag
+    # An explicit choice in the arguments wins
+    engine.run_with_progress(["-y", "-i", "in.mp4", "out.mp4"])
+    args = (tmp_path / "args.log").read_text().split()
+    assert "-n" not in args and args.count("-y") == 1
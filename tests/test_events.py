@@ -0,0 +1,68 @@
+import io
+import json
+import socket
+import threading
+from toolbox.core.events import EventBus, JsonLinesSink, ProgressSink, SocketSink
+
+class ListSink(ProgressSink):
+    items = True
+
+    def __init__(self, interval=0.0):
+        self.interval = interval
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+def test_progress_is_rate_limited_per_sink():
+    bus = EventBus()
+    fast, slow = ListSink(), ListSink(interval=60)
+    bus.configure([fast, slow])
+    with bus.task("work", total=100, unit="pages") as task:
+        for _ in range(100):
+            task.advance()
+
+    assert [e.kind for e in slow.events] == ["start", "progress", "end"]
+    assert len(fast.events) == 102
+    end = slow.events[-1]
+    assert (end.completed, end.total, end.ok) == (100, 100, True)
+    assert end.rate > 0 and fast.events[50].eta is not None
+
+def test_json_lines_items_and_failure():
+    bus = EventBus()
+    stream = io.StringIO()
+    bus.configure([JsonLinesSink(stream)])
+    try:
+        with bus.task("batch", unit="files") as task:
+            task.item("a.png", ok=True, cached=False)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [e["kind"] for e in events] == ["start", "item", "progress", "end"]
+    assert events[1]["data"] == {"item": "a.png", "cached": False}
+    assert events[-1]["ok"] is False
+
+def test_socket_sink(tmp_path):
+    path = str(tmp_path / "progress.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    received = []
+
+    def accept():
+        conn, _ = server.accept()
+        with conn, conn.makefile("r") as f:
+            received.extend(json.loads(line)["kind"] for line in f)
+
+    listener = threading.Thread(target=accept)
+    listener.start()
+    bus = EventBus()
+    bus.configure([SocketSink(path), SocketSink(str(tmp_path / "missing.sock"))])
+    with bus.task("encode", total=10, unit="s") as task:
+        task.update(completed=5)
+    bus.configure([])
+    listener.join(2)
+    server.close()
+    assert received == ["start", "progress", "end"]
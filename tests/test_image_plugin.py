@@ -13,46 +13,33 @@ def test_image_ocr_help(runner):
     assert "--preprocess" in result.output
     assert "--scale" in result.output
 
-@patch("toolbox.plugins.image.pytesseract.image_to_string")
-@patch("toolbox.plugins.image.Image.open")
+@patch("toolbox.plugins.image.get_ocr_pool")
 @patch("toolbox.core.engine.engine_registry.get")
-def test_image_ocr_logic(mock_get_engine, mock_image_open, mock_ocr, runner):
+def test_image_ocr_logic(mock_get_engine, mock_get_pool, runner):
     # Mock Tesseract engine
     mock_engine = MagicMock()
     mock_engine.is_available = True
     mock_engine.path = "/path/to/tesseract"
     mock_get_engine.return_value = mock_engine
-    
-    # Mock Image
-    mock_img_instance = MagicMock()
-    mock_image_open.return_value.__enter__.return_value = mock_img_instance
-    mock_img_instance.width = 100
-    mock_img_instance.height = 100
-    
-    mock_resized_img = MagicMock()
-    mock_img_instance.resize.return_value = mock_resized_img
-    
-    mock_grayscale_img = MagicMock()
-    mock_resized_img.convert.return_value = mock_grayscale_img
-    
-    # Mock OCR result
-    mock_ocr.return_value = "Extracted Text"
-    
+
+    # Mock the shared OCR pool
+    mock_pool = MagicMock()
+    mock_pool.pages = 1
+    mock_pool.image_text.return_value = "Extracted Text"
+    mock_get_pool.return_value = mock_pool
+
     with runner.isolated_filesystem():
         with open("test.png", "w") as f:
             f.write("fake image data")
-            
+
         result = runner.invoke(cli, ["image", "ocr", "test.png", "--preprocess", "threshold", "--scale", "2.0"])
-        
+
         assert result.exit_code == 0
         assert "Extracted Text" in result.output
-        
-        # Verify scaling was called on original
-        mock_img_instance.resize.assert_called()
-        # Verify convert was called on the resized image
-        mock_resized_img.convert.assert_called_with("L")
-        # Verify point was called on the grayscale image (for threshold)
-        mock_grayscale_img.point.assert_called()
+
+        # The same pool serves every file; preprocessing happens in its workers
+        mock_get_pool.assert_called_with("/path/to/tesseract", 0, mock_engine.version)
+        mock_pool.image_text.assert_called_once_with("test.png", "eng", "threshold", 2.0, cache=None)
 
 @patch("toolbox.plugins.image.Image.new")
 @patch("toolbox.plugins.image.Image.open")
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from toolbox.core.inference import TiledUpscaler
+
+class Input:
+    def __init__(self, shape):
+        self.name = "input"
+        self.shape = shape
+
+class NearestSession:
+    """Stands in for an x2 model: nearest-neighbour upscaling, recording batch sizes."""
+
+    def __init__(self, shape=("N", 3, "H", "W")):
+        self.shape = list(shape)
+        self.batches = []
+
+    def get_inputs(self):
+        return [Input(self.shape)]
+
+    def run(self, outputs, feeds):
+        batch = feeds["input"]
+        if isinstance(self.shape[0], int):
+            assert batch.shape[0] == self.shape[0]
+        if isinstance(self.shape[2], int):
+            assert batch.shape[2:] == tuple(self.shape[2:])
+        self.batches.append(batch.shape[0])
+        return [batch.repeat(2, axis=2).repeat(2, axis=3)]
+
+def _expected(img):
+    return img.repeat(2, axis=0).repeat(2, axis=1)
+
+def test_tiles_blend_without_seams():
+    rng = np.random.default_rng(1)
+    images = [rng.integers(0, 256, (70, 100, 3), dtype=np.uint8), rng.integers(0, 256, (20, 30, 3), dtype=np.uint8)]
+    session = NearestSession()
+    upscaler = TiledUpscaler(session, 2, tile=32, overlap=8, batch_size=4)
+
+    results = upscaler.upscale(images)
+    for img, result in zip(images, results):
+        assert np.array_equal(result, _expected(img))
+    assert max(session.batches) == 4 and len(session.batches) > 1
+
+def test_fixed_size_model_is_padded():
+    img = np.random.default_rng(2).integers(0, 256, (20, 50, 3), dtype=np.uint8)
+    session = NearestSession(shape=(1, 3, 32, 32))
+    upscaler = TiledUpscaler(session, 2, tile=256, batch_size=8)
+    assert upscaler.batch_size == 1 and upscaler.tile == 32
+    assert np.array_equal(upscaler.upscale([img])[0], _expected(img))
+
+def test_fixed_batch_model_is_padded():
+    img = np.random.default_rng(4).integers(0, 256, (32, 128, 3), dtype=np.uint8)
+    session = NearestSession(shape=(4, 3, "H", "W"))
+    upscaler = TiledUpscaler(session, 2, tile=32, overlap=8, batch_size=2)
+    assert upscaler.batch_size == 4 and upscaler.tiles_per_image(32, 128) == 5
+    assert np.array_equal(upscaler.upscale([img])[0], _expected(img))
+    assert session.batches == [4, 4]
+
+@pytest.mark.parametrize("tile", [10, 16])
+def test_small_tiles_clamp_the_overlap(tile):
+    img = np.random.default_rng(3).integers(0, 256, (40, 45, 3), dtype=np.uint8)
+    upscaler = TiledUpscaler(NearestSession(), 2, tile=tile)
+    assert 0 < tile - 2 * upscaler.overlap
+    assert np.array_equal(upscaler.upscale([img])[0], _expected(img))
+
+def test_cli_rejects_tiles_within_the_overlap():
+    from click.testing import CliRunner
+    from toolbox.cli import cli
+
+    for command in (["image", "upscale", "in.png"], ["video", "upscale", "in.mp4"]):
+        result = CliRunner().invoke(cli, [*command, "--tile", "16"])
+        assert result.exit_code == 2 and "--tile" in result.output
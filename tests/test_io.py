@@ -78,3 +78,17 @@ def test_get_input_path_url_with_query_params(mock_safe, mock_close):
                 args, kwargs = mock_mkstemp.call_args
                 assert kwargs.get("suffix") == ".pdf"
                 mock_close.assert_called_once_with(99)
+
+def test_iter_glob_matches_glob(tmp_path, monkeypatch):
+    import glob
+    from toolbox.core.io import iter_glob
+    for rel in ["a.txt", "b.png", ".hidden.txt", "sub/c.txt", "sub/deep/d.txt", "sub/.dot/e.txt", "other/f.TXT"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    (tmp_path / "dir.txt").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    for pattern in ["*.txt", "**/*.txt", "sub/**/*", "*/*.txt", "sub/deep/d.txt", "nope/*.txt", str(tmp_path / "**" / "*.png")]:
+        expected = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        assert sorted(iter_glob(pattern)) == expected, pattern
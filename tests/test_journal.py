@@ -0,0 +1,37 @@
+import os
+import pytest
+from toolbox.core.journal import BatchJournal, JournalError
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = BatchJournal(tmp_path / "run.db")
+    yield journal
+    journal.close()
+
+def test_records_outcomes(journal, tmp_path):
+    journal.begin("image resize", "*.png")
+    journal.add(["a.png", "b.png", "c.png"])
+    journal.record("a.png", ok=True, duration=0.5)
+    journal.record("b.png", ok=False, duration=0.1, error="boom")
+    journal.finish()
+
+    assert journal.completed() == {os.path.abspath("a.png")}
+    report = journal.report()
+    assert report["states"] == {"pending": 1, "done": 1, "failed": 1}
+    assert report["errors"] == [("boom", 1)]
+    assert report["slowest"] == [(os.path.abspath("a.png"), 0.5)]
+
+def test_retry_updates_state(journal):
+    journal.begin("image resize")
+    journal.record("b.png", ok=False, error="boom")
+    journal.begin("image resize")
+    journal.record("b.png", ok=True)
+    journal.flush()
+    state, attempts = journal.conn.execute("SELECT state, attempts FROM items").fetchone()
+    assert (state, attempts) == ("done", 2)
+    assert journal.report()["errors"] == []
+
+def test_rejects_other_command(journal):
+    journal.begin("image resize")
+    with pytest.raises(JournalError):
+        journal.begin("pdf ocr")
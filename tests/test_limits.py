@@ -0,0 +1,64 @@
+import threading
+import time
+import pytest
+from toolbox.core.config import config_manager
+from toolbox.core.limits import EngineLimiter
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = config_manager.settings.model_copy(deep=True)
+    settings.admission_min_free_mb = 0
+    settings.admission_max_load = 0
+    monkeypatch.setattr(config_manager, "settings", settings)
+    return settings
+
+def _peak_concurrency(limiters, runs=8):
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(limiter):
+        with limiter.slot("ffmpeg"):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=work, args=(limiters[i % len(limiters)],)) for i in range(runs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return peak[0]
+
+def test_process_limit(settings, tmp_path):
+    settings.engine_limits = {"ffmpeg": 2}
+    assert _peak_concurrency([EngineLimiter(tmp_path)]) == 2
+    settings.engine_limits = {"ffmpeg": 0}
+    assert _peak_concurrency([EngineLimiter(tmp_path)]) > 2
+
+def test_machine_limit_spans_limiters(settings, tmp_path):
+    # Two limiters stand in for two processes sharing the lock directory
+    settings.engine_limits = {"ffmpeg": 1}
+    settings.engine_limits_scope = "machine"
+    limiters = [EngineLimiter(tmp_path, poll_interval=0.005) for _ in range(2)]
+    assert _peak_concurrency(limiters, runs=4) == 1
+
+def test_admission_waits_under_pressure(settings, tmp_path, monkeypatch):
+    limiter = EngineLimiter(tmp_path, poll_interval=0.005)
+    monkeypatch.setattr(limiter, "pressure", lambda: "low memory")
+    order = []
+
+    def second_run():
+        with limiter.slot("tesseract"):
+            order.append("second")
+
+    with limiter.slot("tesseract"):
+        # Nothing else is running, so the first run is admitted despite pressure
+        second = threading.Thread(target=second_run)
+        second.start()
+        time.sleep(0.05)
+        order.append("first done")
+    second.join(1)
+    assert order == ["first done", "second"]
@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from toolbox.core import loudness, media
+from toolbox.core.engine import EngineError
+
+LOUDNORM_STDERR = """[Parsed_loudnorm_0 @ 0x55d] 
+{
+	"input_i" : "-27.61",
+	"input_tp" : "-4.47",
+	"input_lra" : "18.06",
+	"input_thresh" : "-39.20",
+	"output_i" : "-24.08",
+	"target_offset" : "0.08"
+}
+"""
+
+def test_parse_and_second_pass_filter():
+    measured = loudness.parse_loudnorm_json(LOUDNORM_STDERR)
+    assert measured == {"input_i": -27.61, "input_tp": -4.47, "input_lra": 18.06, "input_thresh": -39.2}
+    graph = loudness.loudnorm_filter(measured, i=-16, tp=-1.5, lra=11)
+    assert graph.startswith("loudnorm=I=-16:TP=-1.5:LRA=11:measured_I=-27.61")
+    assert graph.endswith(":linear=true")
+    with pytest.raises(EngineError):
+        loudness.parse_loudnorm_json("no json here")
+
+def test_first_pass_is_cached_by_content(tmp_path, monkeypatch):
+    from toolbox.core.cache import ResultCache
+
+    monkeypatch.setattr(media, "media_cache", media.MediaCache(tmp_path / "media.db"))
+    monkeypatch.setattr("toolbox.core.cache.result_cache", ResultCache(tmp_path / "cache"))
+    ffmpeg = MagicMock()
+    ffmpeg.run.return_value = MagicMock(stderr=LOUDNORM_STDERR)
+    original = tmp_path / "a.wav"
+    original.write_bytes(b"pcm")
+    copy = tmp_path / "b.wav"
+    copy.write_bytes(b"pcm")
+
+    first = loudness.measured_loudness(ffmpeg, str(original))
+    # Same content under another name: no second analysis
+    assert loudness.measured_loudness(ffmpeg, str(copy)) == first
+    assert ffmpeg.run.call_count == 1
+    copy.write_bytes(b"other pcm")
+    loudness.measured_loudness(ffmpeg, str(copy))
+    assert ffmpeg.run.call_count == 2
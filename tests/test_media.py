@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from toolbox.core.engine import engine_registry
+from toolbox.core.media import MediaCache
+
+FAKE_FFPROBE = """#!/bin/sh
+echo "$@" >> "${0%/*}/calls.log"
+case "$*" in
+  *packet=*) cat <<'JSON'
+{"packets": [{"pts_time": "1.400000", "flags": "K__"}, {"pts_time": "1.440000", "flags": "___"},
+             {"pts_time": "3.400000", "flags": "K__"}]}
+JSON
+  ;;
+  *) cat <<'JSON'
+{"streams": [{"index": 0, "codec_type": "video", "codec_name": "h264", "width": 1280, "height": 720,
+              "avg_frame_rate": "30000/1001", "r_frame_rate": "30000/1001", "duration": "10.010000",
+              "side_data_list": [{"side_data_type": "Display Matrix", "rotation": -90}]},
+             {"index": 1, "codec_type": "audio", "codec_name": "aac", "profile": "LC", "sample_rate": "48000",
+              "channels": 2, "sample_fmt": "fltp"}],
+ "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "10.010000", "start_time": "1.400000"}}
+JSON
+  ;;
+esac
+"""
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="uses a shell script as a fake binary")
+
+@pytest.fixture
+def fake_ffprobe(tmp_path, monkeypatch):
+    binary = tmp_path / "ffprobe"
+    binary.write_text(FAKE_FFPROBE)
+    binary.chmod(0o755)
+    monkeypatch.setattr(engine_registry.get("ffprobe"), "_path", str(binary))
+    return tmp_path / "calls.log"
+
+def test_probe_parses_streams_and_keyframes(tmp_path, fake_ffprobe):
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"x")
+    info = MediaCache(tmp_path / "media.db").probe(str(video), keyframes=True)
+    assert info.duration == pytest.approx(10.01)
+    assert (info.video.codec, info.video.width, info.video.height) == ("h264", 1280, 720)
+    assert info.video.fps == pytest.approx(29.97, abs=0.01)
+    assert info.video.frame_count == 300
+    # A phone clip shot upright: stored landscape, decoded (autorotated) portrait
+    assert info.video.rotation == -90 and info.video.display_size == (720, 1280)
+    assert (info.audio.profile, info.audio.sample_fmt, info.audio.channels) == ("LC", "fltp", 2)
+    # Keyframe times are relative to the container start
+    assert info.keyframes == pytest.approx([0.0, 2.0])
+
+def test_probe_cache_persists_and_invalidates(tmp_path, fake_ffprobe):
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"x")
+    MediaCache(tmp_path / "media.db").probe(str(video))
+    calls = len(fake_ffprobe.read_text().splitlines())
+
+    # A new process (fresh instance) reads the stored probe; a keyframe request extends it once
+    warm = MediaCache(tmp_path / "media.db")
+    assert warm.probe(str(video)).video.codec == "h264"
+    warm.probe(str(video), keyframes=True)
+    warm.probe(str(video), keyframes=True)
+    assert len(fake_ffprobe.read_text().splitlines()) == calls + 1
+    assert MediaCache(tmp_path / "media.db").probe(str(video)).keyframes == pytest.approx([0.0, 2.0])
+
+    video.write_bytes(b"changed")
+    warm.probe(str(video))
+    assert len(fake_ffprobe.read_text().splitlines()) == calls + 2
+    video.unlink()
+    assert warm.prune() == 1 and warm.counts()["probes"] == 0
+
+def test_probe_cache_drops_probes_from_older_versions(tmp_path, fake_ffprobe):
+    import sqlite3
+
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"x")
+    MediaCache(tmp_path / "media.db").probe(str(video))
+    calls = len(fake_ffprobe.read_text().splitlines())
+    conn = sqlite3.connect(tmp_path / "media.db")
+    conn.execute("PRAGMA user_version = 0")
+    conn.close()
+
+    assert MediaCache(tmp_path / "media.db").probe(str(video)).video.rotation == -90
+    assert len(fake_ffprobe.read_text().splitlines()) == calls + 1
+
+def _audio(path, codec="mp3", rate=44100, channels=2, **fields):
+    from toolbox.core.media import MediaInfo, StreamInfo
+
+    fields.setdefault("sample_fmt", "fltp")
+    stream = StreamInfo(index=0, type="audio", codec=codec, sample_rate=rate, channels=channels, channel_layout="stereo", **fields)
+    return MediaInfo(path=path, size=1, streams=[stream])
+
+def test_audio_copy_mismatch():
+    from toolbox.core.media import audio_copy_mismatch
+
+    parts = [_audio("a.mp3"), _audio("b.mp3")]
+    assert audio_copy_mismatch(parts, "out.mp3") is None
+    assert "44100" in audio_copy_mismatch([*parts, _audio("c.mp3", rate=48000)], "out.mp3")
+    assert "cannot hold mp3" in audio_copy_mismatch(parts, "out.m4a")
+
+    aac = [_audio("a.m4a", "aac", profile="LC"), _audio("b.m4a", "aac", profile="HE-AAC")]
+    assert "aac (HE-AAC)" in audio_copy_mismatch(aac, "out.m4a")
+    flac = [_audio("a.flac", "flac", sample_fmt="s16", bits_per_raw_sample=16),
+            _audio("b.flac", "flac", sample_fmt="s32", bits_per_raw_sample=24)]
+    assert "s32/24 bit" in audio_copy_mismatch(flac, "out.flac")
+    assert audio_copy_mismatch(parts, "out.mka") is None
+
+def test_merge_takes_stream_copy_path_for_compatible_inputs(tmp_path, monkeypatch):
+    from unittest.mock import MagicMock
+    from click.testing import CliRunner
+    from toolbox.cli import cli
+    from toolbox.core import media
+
+    ffmpeg, ffprobe = MagicMock(), MagicMock(is_available=True)
+    monkeypatch.setattr(engine_registry, "get", lambda name: ffprobe if name == "ffprobe" else ffmpeg)
+    rates = {"a.mp3": 44100, "b.mp3": 44100, "c.mp3": 48000}
+    monkeypatch.setattr(media, "probe", lambda path, keyframes=False: _audio(path, rate=rates[os.path.basename(path)]))
+    for name in rates:
+        (tmp_path / name).write_bytes(b"x")
+    out = str(tmp_path / "out.mp3")
+
+    result = CliRunner().invoke(cli, ["audio", "merge", str(tmp_path / "a.mp3"), str(tmp_path / "b.mp3"), "-o", out])
+    assert result.exit_code == 0, result.output
+    assert "stream copy" in result.output
+    args = ffmpeg.run_with_progress.call_args[0][0]
+    assert args[:2] == ["-f", "concat"] and "copy" in args
+
+    result = CliRunner().invoke(cli, ["audio", "merge", str(tmp_path / "a.mp3"), str(tmp_path / "c.mp3"), "-o", out])
+    assert "concat filter" in result.output and "48000" in result.output
+    assert "-filter_complex" in ffmpeg.run_with_progress.call_args[0][0]
@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+from click.testing import CliRunner
+from toolbox.cli import cli
+from toolbox.core.metrics import MetricsStore, percentile, size_bucket, summarize
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+
+def test_size_bucket():
+    assert size_bucket(None) == "no input file"
+    assert size_bucket(10) == "< 1 MB"
+    assert size_bucket(5 << 20) == "1-10 MB"
+    assert size_bucket(2 << 30) == ">= 1 GB"
+
+def test_concurrent_records_are_not_lost(tmp_path):
+    store = MetricsStore(directory=tmp_path)
+
+    def worker():
+        for _ in range(50):
+            store.record("ffmpeg", 0.1, ["-i", "in.mp4"], command="video compress")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(store.load()) == 400
+
+def test_compaction_merges_finished_logs(tmp_path):
+    # Logs left behind by processes that have exited are unlocked
+    for i in range(3):
+        with open(tmp_path / f"proc-{i}-0.jsonl", "w") as f:
+            for j in range(5):
+                f.write(json.dumps({"ts": i * 10 + j, "engine": "tesseract", "command": "pdf ocr", "duration": j, "ok": True}) + "\n")
+
+    store = MetricsStore(directory=tmp_path, max_samples=10)
+    assert store.compact() == 3
+    assert not list(tmp_path.glob("proc-*.jsonl"))
+    entries = store.load()
+    assert len(entries) == 10
+    assert min(e["ts"] for e in entries) == 10
+
+def test_compaction_leaves_unlocked_new_logs_alone(tmp_path):
+    store = MetricsStore(directory=tmp_path)
+    store.record("ffmpeg", 0.1, command="video compress")
+    # The log only appears under its final name once it is locked
+    [log] = tmp_path.glob("proc-*.jsonl")
+    assert not list(tmp_path.glob(".proc-*"))
+
+    # A log another process has created but not locked yet, and one staged long ago
+    entry = json.dumps({"ts": 1, "engine": "tesseract", "command": "pdf ocr", "duration": 1, "ok": True}) + "\n"
+    fresh, stale = tmp_path / ".proc-1-1.jsonl.new", tmp_path / ".proc-2-1.jsonl.new"
+    fresh.write_text(entry)
+    stale.write_text(entry)
+    os.utime(stale, (1, 1))
+    assert store.compact() == 1
+    assert fresh.exists() and not stale.exists() and log.exists()
+    assert len(store.load()) == 3
+
+def test_summarize_skips_failures():
+    entries = [
+        {"engine": "ffmpeg", "duration": 1.0, "ok": True},
+        {"engine": "ffmpeg", "duration": 3.0, "ok": True},
+        {"engine": "ffmpeg", "duration": 99.0, "ok": False},
+    ]
+    [row] = summarize(entries, lambda e: e["engine"])
+    assert row["count"] == 3
+    assert row["errors"] == 1
+    assert row["p99"] == 3.0
+
+def test_perf_report(tmp_path, monkeypatch):
+    store = MetricsStore(directory=tmp_path)
+    store.record("ffmpeg", 0.25, [], command="video compress")
+    monkeypatch.setattr("toolbox.core.metrics.metrics_store", store)
+
+    result = CliRunner().invoke(cli, ["perf", "report"])
+    assert result.exit_code == 0
+    assert "video compress" in result.output
+    assert "250 ms" in result.output
@@ -0,0 +1,133 @@
+import os
+import stat
+import time
+
+import pytest
+from PIL import Image
+
+from toolbox.core import ocr
+from toolbox.core.ocr import OcrCache, get_ocr_pool, image_digest, page_windows, preprocess_image, text_key
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    yield
+    ocr._close_pools()
+
+def test_page_windows():
+    assert page_windows(5, 2) == [(1, 2), (3, 4), (5, 5)]
+    assert page_windows(3, 10) == [(1, 3)]
+    assert page_windows(0, 4) == []
+
+def test_preprocess_image():
+    img = Image.new("RGB", (10, 20), (200, 200, 200))
+    assert preprocess_image(img).size == (10, 20)
+    assert preprocess_image(img, "grayscale", 2.0).size == (20, 40)
+    assert preprocess_image(img, "grayscale").mode == "L"
+    assert preprocess_image(img, "threshold").mode == "1"
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a shell script as tesseract")
+def test_recognize_runs_tesseract_once_per_batch(tmp_path, monkeypatch):
+    calls = tmp_path / "calls"
+    fake = tmp_path / "tesseract"
+    # Prints one page per line of the list file, each ended by a form feed
+    fake.write_text(f'#!/bin/sh\necho "$@" >> {calls}\n'
+                    'if [ "${1##*.}" = txt ]; then n=$(wc -l < "$1"); else n=1; fi\n'
+                    'i=1; while [ $i -le $n ]; do printf "text %s\\n\\f" $i; i=$((i+1)); done\n')
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    ocr._init_worker(str(fake), use_api=False)
+
+    images = [Image.new("L", (8, 8)) for _ in range(3)]
+    assert ocr._recognize(images, "deu") == ["text 1\n", "text 2\n", "text 3\n"]
+    assert ocr._recognize(images[:1], "deu") == ["text 1\n"]
+    runs = calls.read_text().splitlines()
+    assert len(runs) == 2
+    assert runs[0].endswith("pages.txt stdout -l deu")
+
+@pytest.mark.parametrize("enabled, api_version, expected", [
+    (True, "5.3.0", (True, "tesserocr 5.3.0")),
+    (True, "4.1.1", (False, "tesseract 5.3.0")),
+    (True, None, (False, "tesseract 5.3.0")),
+    (False, "5.3.0", (False, "tesseract 5.3.0")),
+])
+def test_ocr_backend_uses_tesserocr_only_for_the_same_tesseract(monkeypatch, enabled, api_version, expected):
+    settings = ocr.config_manager.settings.model_copy(deep=True)
+    settings.ocr_use_tesserocr = enabled
+    monkeypatch.setattr(ocr.config_manager, "settings", settings)
+    monkeypatch.setattr(ocr, "_tesserocr_version", lambda: api_version)
+    assert ocr.ocr_backend("5.3.0") == expected
+
+def test_version_number_matches_the_engine_probe():
+    assert ocr._version_number("tesseract 5.3.0\n leptonica-1.82.0\n") == "5.3.0"
+    assert ocr._version_number("") is None
+
+def test_get_ocr_pool_is_shared(monkeypatch):
+    monkeypatch.setattr(ocr.engine_registry.limiter, "limit", lambda engine: 0)
+    pool = get_ocr_pool("tesseract", 2)
+    assert get_ocr_pool("tesseract", 2) is pool
+    assert get_ocr_pool("tesseract", 1) is not pool
+
+def fake_window(path, first, last, lang, dpi, grayscale, poppler_path, version, cache):
+    # Later windows finish first, so ordering has to come from the caller
+    time.sleep(0.05 * (10 - first) / 10)
+    return [f"page {page} {lang} {dpi} {version}" for page in range(first, last + 1)]
+
+@pytest.mark.skipif(os.name == "nt", reason="relies on fork to share the patched worker")
+def test_pdf_pages_yields_in_page_order(monkeypatch):
+    monkeypatch.setattr(ocr, "page_count", lambda path: 7)
+    monkeypatch.setattr(ocr, "_ocr_window", fake_window)
+    monkeypatch.setattr(ocr, "_tesserocr_version", lambda: None)
+    pool = get_ocr_pool("tesseract", 3, "5.3.0")
+    pages = list(pool.pdf_pages("doc.pdf", "deu", dpi=300, window=2))
+    # The engine and version that recognize reach the windows, where they key the text cache
+    assert pages == [f"page {n} deu 300 tesseract 5.3.0" for n in range(1, 8)]
+
+    # The workers stay up for the next document and count every page
+    assert get_ocr_pool("tesseract", 3, "5.3.0") is pool
+    assert list(pool.pdf_pages("other.pdf", "eng", dpi=100, window=4)) == [f"page {n} eng 100 tesseract 5.3.0" for n in range(1, 8)]
+    time.sleep(0.1)
+    assert pool.pages == 14
+
+def test_ocr_cache_stats_and_eviction(tmp_path):
+    cache = OcrCache(tmp_path / "ocr.db", max_bytes=10)
+    cache.put_many({"a": "12345", "b": "678"})
+    assert cache.get_many(["a", "b", "c"]) == {"a": "12345", "b": "678"}
+    stats = cache.stats()
+    assert (stats["entries"], stats["size"], stats["hits"], stats["misses"]) == (2, 8, 2, 1)
+
+    # Over the limit: the least recently used text goes first
+    cache.get("b")
+    cache.put("c", "xyz")
+    assert cache.get("a") is None
+    assert cache.get("b") == "678"
+    assert cache.prune(older_than=-1) == (2, 6)
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+def test_text_key_covers_content_and_settings():
+    gray = Image.new("L", (4, 4), 0)
+    assert image_digest(gray) == image_digest(Image.new("L", (4, 4), 0))
+    assert image_digest(gray) != image_digest(Image.new("L", (4, 4), 1))
+    key = text_key("digest", "eng", "5.3.0", preprocess="none", scale=1.0)
+    assert key != text_key("digest", "deu", "5.3.0", preprocess="none", scale=1.0)
+    assert key != text_key("digest", "eng", "5.4.0", preprocess="none", scale=1.0)
+    assert key != text_key("digest", "eng", "5.3.0", preprocess="threshold", scale=1.0)
+
+def test_window_only_recognizes_new_pages(tmp_path, monkeypatch):
+    import pdf2image
+
+    pages = [Image.new("L", (8, 8), shade) for shade in (10, 20, 30)]
+    recognized = []
+
+    def fake_recognize(images, lang):
+        recognized.extend(images)
+        return [f"text {image.getpixel((0, 0))}" for image in images]
+
+    monkeypatch.setattr(ocr, "ocr_cache", OcrCache(tmp_path / "ocr.db"))
+    monkeypatch.setattr(ocr, "_recognize", fake_recognize)
+    monkeypatch.setattr(pdf2image, "convert_from_path", lambda path, first_page, last_page, **kw: [
+        page.copy() for page in pages[first_page - 1:last_page]])
+
+    assert ocr._ocr_window("doc.pdf", 1, 2, "eng", 200, True, None, "5.3.0", True) == ["text 10", "text 20"]
+    # The document gained a page: only that one goes to tesseract
+    assert ocr._ocr_window("doc.pdf", 1, 3, "eng", 200, True, None, "5.3.0", True) == ["text 10", "text 20", "text 30"]
+    assert len(recognized) == 3
@@ -0,0 +1,53 @@
+import io
+import threading
+import time
+import pytest
+from toolbox.core.pipeline import read_exact, run_stages
+
+def test_stages_keep_order_and_overlap():
+    seen = set()
+
+    def stage(name):
+        def run(x):
+            seen.add((name, threading.get_ident()))
+            return x + 1
+        return run
+
+    results = list(run_stages(range(50), [stage("a"), stage("b")], maxsize=2))
+    assert results == list(range(2, 52))
+    # Each stage runs on its own thread, apart from the consumer
+    assert len({ident for _, ident in seen}) == 2
+
+def test_queues_bound_read_ahead():
+    pulled = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    results = run_stages(source(), [lambda x: x], maxsize=2)
+    assert next(results) == 0
+    time.sleep(0.2)
+    # source + stage + two queues of 2 items each, plus the one handed out
+    assert len(pulled) <= 8
+    assert list(results) == list(range(1, 100))
+
+def test_stage_error_propagates():
+    def fail(x):
+        if x == 3:
+            raise ValueError("bad frame")
+        return x
+
+    with pytest.raises(ValueError, match="bad frame"):
+        list(run_stages(iter(range(1000)), [fail]))
+
+def test_read_exact_joins_partial_reads():
+    class Trickle(io.BytesIO):
+        def read(self, size=-1):
+            return super().read(min(size, 3))
+
+    stream = Trickle(b"abcdefghij")
+    assert read_exact(stream.read, 8) == b"abcdefgh"
+    assert read_exact(stream.read, 8) == b"ij"
+    assert read_exact(stream.read, 8) == b""
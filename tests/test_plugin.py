@@ -0,0 +1,83 @@
+import os
+import sys
+import click
+import pytest
+from click.testing import CliRunner
+from toolbox.core.plugin import PluginManager
+from toolbox.cli import LazyPluginGroup
+
+@pytest.fixture
+def manager(tmp_path):
+    return PluginManager(manifest_path=tmp_path / "plugin_manifest.json")
+
+@pytest.fixture
+def plugin_package(tmp_path, monkeypatch):
+    # A throwaway plugin package so tests can touch source files freely
+    pkg = tmp_path / "tb_test_plugins"
+    (pkg / "hello").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / "hello" / "__init__.py").write_text(
+        "from toolbox.core.plugin import BasePlugin, PluginMetadata\n"
+        "import click\n"
+        "class HelloPlugin(BasePlugin):\n"
+        "    def get_metadata(self):\n"
+        "        return PluginMetadata(name='hello', commands=['say'], engine='python')\n"
+        "    def register_commands(self, group):\n"
+        "        @group.group(name='hello')\n"
+        "        def hello_group():\n"
+        "            \"\"\"Say hello.\"\"\"\n"
+        "        @hello_group.command(name='say')\n"
+        "        def say():\n"
+        "            click.echo('hi there')\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "tb_test_plugins"
+    for name in [m for m in sys.modules if m.startswith("tb_test_plugins")]:
+        del sys.modules[name]
+
+def test_manifest_roundtrip(manager, plugin_package):
+    modules = {f"{plugin_package}.hello": {"hello": "Say hello."}}
+    manager.save_manifest(modules, plugin_package)
+    manifest = manager.load_manifest(plugin_package)
+    assert manifest["modules"] == modules
+    assert manifest["failed"] == []
+
+def test_manifest_invalidated_by_mtime(manager, plugin_package, tmp_path):
+    manager.save_manifest({f"{plugin_package}.hello": {"hello": "Say hello."}}, plugin_package)
+    source = tmp_path / plugin_package / "hello" / "__init__.py"
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert manager.load_manifest(plugin_package) is None
+
+def test_lazy_group_imports_on_demand(manager, plugin_package, monkeypatch):
+    monkeypatch.setattr("toolbox.cli.plugin_manager", manager)
+
+    @click.group(cls=LazyPluginGroup)
+    def cold():
+        pass
+
+    # First start builds the manifest by importing everything
+    cold.load_plugin_commands(plugin_package)
+    assert "hello" in cold.commands
+    assert manager.load_manifest(plugin_package) is not None
+
+    del sys.modules[f"{plugin_package}.hello"]
+    manager._module_plugins.clear()
+
+    @click.group(cls=LazyPluginGroup)
+    def warm():
+        pass
+
+    warm.load_plugin_commands(plugin_package)
+    assert "hello" in warm.lazy_commands
+    assert f"{plugin_package}.hello" not in sys.modules
+
+    runner = CliRunner()
+    result = runner.invoke(warm, ["--help"])
+    assert "Say hello." in result.output
+    assert f"{plugin_package}.hello" not in sys.modules
+
+    result = runner.invoke(warm, ["hello", "say"])
+    assert result.exit_code == 0
+    assert "hi there" in result.output
+    assert not warm.lazy_commands
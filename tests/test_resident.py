@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+from unittest.mock import MagicMock, call
+
+import numpy as np
+import pytest
+
+from toolbox.core import inference, resident, transcribe
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="the test host is forked to share the fakes")
+
+class FakeArg:
+    name = "input"
+    shape = [1, 3, "height", "width"]
+
+class FakeSession:
+    loads = 0
+
+    def __init__(self, model_path, gpu=False):
+        FakeSession.loads += 1
+
+    def get_inputs(self):
+        return [FakeArg()]
+
+    def run(self, output_names, feeds):
+        # Reports where it ran and how often a model was loaded there
+        return [feeds["input"] * 2, np.array([os.getpid(), FakeSession.loads])]
+
+class FakeTranscriber:
+    def transcribe(self, samples, chunk_length, language=None, progress=None):
+        progress.update(total=2)
+        yield {"start": 0.0, "end": 1.0, "text": language}
+        progress.advance()
+        yield {"start": 1.0, "end": 2.0, "text": str(len(samples))}
+        progress.advance()
+
+@pytest.fixture
+def host(monkeypatch):
+    monkeypatch.setattr(inference, "load_session", FakeSession)
+    monkeypatch.setattr(transcribe, "load_transcriber", lambda model, device, jobs: FakeTranscriber())
+    manager = resident.start(ctx=multiprocessing.get_context("fork"))
+    yield manager
+    resident.stop(manager)
+
+def test_sessions_are_loaded_once_in_the_host(host):
+    session = inference.get_session("model.onnx")
+    assert session.get_inputs()[0].name == "input"
+    doubled, (pid, loads) = inference.get_session("model.onnx").run(None, {"input": np.ones(3)})
+    assert doubled.tolist() == [2.0, 2.0, 2.0]
+    assert pid != os.getpid() and loads == 1
+
+    # A forked request child reaches the same host over its own connection
+    read, write = os.pipe()
+    if os.fork() == 0:
+        try:
+            _, (child_pid, child_loads) = inference.get_session("model.onnx").run(None, {"input": np.ones(1)})
+            os.write(write, f"{child_pid} {child_loads}".encode())
+        finally:
+            os._exit(0)
+    os.close(write)
+    assert os.read(read, 64).decode() == f"{pid} 1"
+    os.wait()
+
+def test_streams_keep_order_and_progress(host):
+    progress = MagicMock()
+    transcriber = transcribe.get_transcriber("tiny", "cpu", 1)
+    segments = list(transcriber.transcribe(np.zeros(5, dtype=np.int16), chunk_length=30.0, language="en", progress=progress))
+    assert [s["text"] for s in segments] == ["en", "5"]
+    assert progress.mock_calls == [call.update(total=2), call.advance(), call.advance()]
+
+def test_without_a_host_models_load_locally(monkeypatch):
+    monkeypatch.setattr(inference, "load_session", FakeSession)
+    assert resident.host() is None
+    assert isinstance(inference.get_session("model.onnx"), FakeSession)
@@ -0,0 +1,137 @@
+import re
+from unittest.mock import MagicMock
+
+import pytest
+
+from toolbox.core import segments
+from toolbox.core.config import config_manager
+from toolbox.core.engine import EngineError, engine_registry
+from toolbox.core.media import MediaInfo, StreamInfo, parse_timestamp
+from toolbox.core.segments import plan_segments, plan_trim, smart_trim, transcode_segmented
+
+def test_plan_segments_snaps_to_keyframes():
+    keyframes = [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert plan_segments(keyframes, 10.0, 2) == [(0.0, 4.0), (4.0, None)]
+    # Boundaries never repeat when keyframes are sparser than the requested split
+    assert plan_segments([0.0, 5.0], 10.0, 4) == [(0.0, 5.0), (5.0, None)]
+    assert plan_segments([0.0], 10.0, 4) == [(0.0, None)]
+    assert plan_segments(keyframes, 10.0, 1) == [(0.0, None)]
+
+@pytest.fixture
+def probed(monkeypatch):
+    ffprobe = MagicMock(is_available=True)
+    monkeypatch.setattr(segments.engine_registry, "get", lambda name: ffprobe)
+    info = MediaInfo(path="in.mp4", size=1, duration=12.0, keyframes=[0.0, 4.0, 8.0])
+    monkeypatch.setattr(segments.media, "probe", lambda path, keyframes=False: info)
+    return info
+
+def test_transcode_segmented_encodes_parts_and_joins(probed, tmp_path):
+    ffmpeg = MagicMock(limiter=None)
+    lists = []
+    ffmpeg.run.side_effect = lambda args: lists.append(open(args[args.index("-safe") + 3]).read()) if "concat" in args else None
+
+    assert transcode_segmented(ffmpeg, "in.mp4", "out.mp4", ["-vf", "delogo"], ["-codec:a", "copy"], segments=3)
+    calls = [c.args[0] for c in ffmpeg.run.call_args_list]
+    parts, join = calls[:-1], calls[-1]
+    assert len(parts) == 3
+    assert all("-an" in args and "delogo" in args for args in parts)
+    seeks = sorted(args[args.index("-ss") + 1] if "-ss" in args else "0" for args in parts)
+    assert seeks == ["0", "3.999500", "7.999500"]
+    assert join[-1] == "out.mp4" and "copy" in join
+    assert lists[0].count("file '") == 3
+
+def test_transcode_segmented_declines_unsplittable_input(probed, monkeypatch):
+    probed.keyframes = [0.0]
+    ffmpeg = MagicMock(limiter=None)
+    assert transcode_segmented(ffmpeg, "in.mp4", "out.mp4", ["-crf", "23"], segments=4) is False
+    ffmpeg.run.assert_not_called()
+
+@pytest.mark.parametrize("run", [
+    lambda ffmpeg, output: transcode_segmented(ffmpeg, "in.mp4", output, ["-crf", "23"], segments=3),
+    lambda ffmpeg, output: smart_trim(ffmpeg, "in.mp4", output, 1.0, 9.0),
+])
+def test_existing_output_fails_before_any_part_is_encoded(probed, tmp_path, monkeypatch, run):
+    output = tmp_path / "out.mp4"
+    output.write_bytes(b"keep")
+    monkeypatch.setattr(config_manager.settings, "auto_overwrite", False)
+    ffmpeg = MagicMock(limiter=None)
+    with pytest.raises(EngineError, match="already exists"):
+        run(ffmpeg, str(output))
+    ffmpeg.run.assert_not_called()
+    assert output.read_bytes() == b"keep"
+
+def test_plan_trim_copies_whole_gops_only():
+    keyframes = [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert plan_trim(keyframes, 1.0, 7.0) == [(1.0, 2.0, False), (2.0, 6.0, True), (6.0, 7.0, False)]
+    assert plan_trim(keyframes, 2.0, 6.0) == [(2.0, 6.0, True)]
+    assert plan_trim(keyframes, 3.0, None) == [(3.0, 4.0, False), (4.0, None, True)]
+    # No whole GOP inside the range: re-encode all of it
+    assert plan_trim(keyframes, 4.5, 5.5) == [(4.5, 5.5, False)]
+    assert plan_trim(keyframes, 3.0, 5.0) == [(3.0, 5.0, False)]
+
+def test_smart_trim_reencodes_boundaries_with_source_codec(probed):
+    probed.streams = [StreamInfo(index=0, type="video", codec="h264", profile="High", pix_fmt="yuv420p")]
+    ffmpeg = MagicMock(limiter=None)
+    ffmpeg.has_capability.return_value = True
+
+    assert smart_trim(ffmpeg, "in.mp4", "out.mp4", 1.0, 9.0)
+    calls = [c.args[0] for c in ffmpeg.run.call_args_list]
+    parts, join = calls[:-1], calls[-1]
+    assert [args[args.index("-c:v") + 1] for args in parts] == ["libx264", "copy", "libx264"]
+    # Every part seeks on the input, so nothing before the cut is decoded
+    assert all(args.index("-ss") < args.index("-i") for args in parts)
+    # The copied GOPs [4, 8) stop short of the keyframe at 8, which the tail re-encodes
+    assert [(args[args.index("-ss") + 1], args[args.index("-t") + 1]) for args in parts] == [
+        ("1.000000", "3.000000"), ("4.000500", "3.999000"), ("8.000000", "1.000000")]
+    assert join[join.index("-t") + 1] == "8.000000"
+    # Boundary parts match the source profile; every part carries its headers in-band
+    head, copied, tail = parts
+    assert head[head.index("-profile:v") + 1] == "high" and head[head.index("-bsf:v") + 1] == "dump_extra"
+    # The copy drops what -t lets through past the span, by presentation time
+    assert copied[copied.index("-bsf:v") + 1] == \
+        "h264_mp4toannexb,noise=drop=lt(pts*tb\\,-0.002000)+gte(pts*tb\\,3.999000)"
+
+def test_smart_trim_declines_codecs_without_boundary_support(probed):
+    probed.streams = [StreamInfo(index=0, type="video", codec="mpeg4")]
+    ffmpeg = MagicMock(limiter=None)
+    ffmpeg.has_capability.return_value = True
+    assert smart_trim(ffmpeg, "in.mp4", "out.mp4", 1.0, 9.0) is False
+    ffmpeg.run.assert_not_called()
+
+def _ffmpeg_stats(ffmpeg, args):
+    return ffmpeg.run(["-hide_banner", *args, "-f", "null", "-"]).stderr
+
+def test_smart_trim_output_matches_the_source_frame_for_frame(tmp_path, monkeypatch):
+    ffmpeg = engine_registry.get("ffmpeg")
+    if not ffmpeg.is_available or not all(ffmpeg.has_capability(kind, name) for kind, name in [
+            ("encoders", "libx264"), ("bsfs", "noise"), ("bsfs", "h264_mp4toannexb"), ("bsfs", "dump_extra")]):
+        pytest.skip("needs FFmpeg with libx264")
+    source = tmp_path / "in.mp4"
+    # One-second GOPs with B-frames, so copied spans end on reordered packets, and
+    # a profile libx264 would not pick on its own for the boundaries
+    ffmpeg.run(["-y", "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=25", "-t", "6", "-c:v", "libx264",
+                "-profile:v", "main", "-bf", "3", "-g", "25", "-keyint_min", "25", "-sc_threshold", "0",
+                "-pix_fmt", "yuv420p", str(source)])
+    # The keyframes are known from the encode, so FFprobe is not needed
+    info = MediaInfo(path=str(source), size=1, duration=6.0, keyframes=[float(t) for t in range(6)],
+                     streams=[StreamInfo(index=0, type="video", codec="h264", profile="Main", pix_fmt="yuv420p")])
+    monkeypatch.setattr(segments.media, "probe", lambda path, keyframes=False: info)
+    monkeypatch.setattr(segments.engine_registry, "get", lambda name: MagicMock(is_available=True))
+    output = tmp_path / "out.mp4"
+
+    assert smart_trim(ffmpeg, str(source), str(output), 1.52, 4.48)
+    # 2.96 s at 25 fps, decoded without complaint
+    assert ffmpeg.run(["-v", "error", "-i", str(output), "-f", "null", "-"]).stderr.strip() == ""
+    stats = _ffmpeg_stats(ffmpeg, ["-i", str(output), "-ss", "1.52", "-t", "2.96", "-i", str(source),
+                                   "-lavfi", "[0:v][1:v]psnr"])
+    assert re.findall(r"frame=\s*(\d+)", stats)[-1] == "74"
+    # A dropped, repeated or misdecoded frame shows up as a frame far off the source;
+    # copied GOPs are identical and re-encoded boundaries stay close
+    assert float(re.search(r"PSNR .* min:([\d.]+)", stats).group(1)) > 35
+
+def test_parse_timestamp():
+    assert parse_timestamp("90") == 90.0
+    assert parse_timestamp("01:30.5") == 90.5
+    assert parse_timestamp("1:00:00") == 3600.0
+    with pytest.raises(ValueError):
+        parse_timestamp("1:2:3:4")
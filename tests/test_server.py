@@ -0,0 +1,62 @@
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from toolbox.client import forward, encode_request, decode_request
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "send_fds"), reason="requires Unix fd passing")
+
+@pytest.fixture
+def server(tmp_path):
+    sock_path = tmp_path / "server.sock"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "toolbox", "serve-local", "--socket", str(sock_path)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while not sock_path.exists() and time.time() < deadline:
+        time.sleep(0.05)
+    yield str(sock_path)
+    proc.terminate()
+    proc.wait(timeout=10)
+    assert not sock_path.exists()
+
+def test_request_roundtrip():
+    argv, cwd, env = decode_request(encode_request(["file", "hash", "a b.txt"], "/tmp", {"A": "1=2", "B": ""}))
+    assert argv == ["file", "hash", "a b.txt"]
+    assert cwd == "/tmp"
+    assert env == {"A": "1=2", "B": ""}
+
+def test_forward_runs_command(server, capfd):
+    assert forward(["util", "base64", "encode", "hi"], server) == 0
+    assert "aGk=" in capfd.readouterr().out
+
+def test_forward_uses_client_cwd(server, capfd, tmp_path, monkeypatch):
+    (tmp_path / "hello.txt").write_text("Hello World")
+    monkeypatch.chdir(tmp_path)
+    assert forward(["file", "hash", "hello.txt"], server) == 0
+    assert "a591a" in capfd.readouterr().out.lower()
+
+def test_forward_returns_exit_code(server, capfd):
+    assert forward(["stat"], server) == 2
+    assert "Did you mean 'status'?" in capfd.readouterr().err
+
+def test_socket_is_private_from_the_start(tmp_path):
+    from toolbox.cli import cli
+    from toolbox.core.server import LocalServer, ServerError
+
+    server = LocalServer(cli, tmp_path / "private" / "server.sock")
+    server._bind()
+    try:
+        assert (tmp_path / "private").stat().st_mode & 0o777 == 0o700
+        assert (tmp_path / "private" / "server.sock").stat().st_mode & 0o777 == 0o600
+    finally:
+        server.close()
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(ServerError):
+        LocalServer(cli, shared / "server.sock")._bind()
@@ -0,0 +1,58 @@
+import json
+from unittest.mock import MagicMock
+
+from PIL import Image
+
+from toolbox.core.thumbnails import build_sprites, extract_at, frame_times, snap_to_keyframes
+
+def test_frame_times_and_keyframe_snapping():
+    assert frame_times(10.0, 2.5) == [0.0, 2.5, 5.0, 7.5]
+    assert frame_times(10.5, 5) == [0.0, 5.0, 10.0]
+    # Nearby times collapse onto one keyframe instead of repeating it
+    assert snap_to_keyframes([0.0, 1.0, 2.0, 3.0, 4.0], [0.0, 2.2, 4.4]) == [0.0, 2.2, 4.4]
+    assert snap_to_keyframes([1.0], []) == [1.0]
+
+def test_extract_at_shards_seeks_across_runs(monkeypatch):
+    monkeypatch.setattr("toolbox.core.thumbnails.SEEKS_PER_RUN", 2)
+    ffmpeg = MagicMock()
+    times = [0.0, 1.0, 2.0, 3.0, 4.0]
+    outputs = [f"f{i}.jpg" for i in range(5)]
+    extract_at(ffmpeg, "in.mp4", times, outputs, jobs=2)
+
+    runs = sorted((c.args[0] for c in ffmpeg.run.call_args_list), key=lambda args: args[2])
+    assert len(runs) == 3
+    first = runs[0]
+    # Each frame has its own seeked input, and each output takes one frame from it
+    assert first[:7] == ["-y", "-ss", "0.000000", "-i", "in.mp4", "-ss", "1.000000"]
+    assert first[first.index("f1.jpg") - 4:first.index("f1.jpg")] == ["-map", "1:v:0", "-frames:v", "1"]
+    assert runs[-1].count("-i") == 1 and runs[-1][-1] == "f4.jpg"
+
+def test_build_sprites_writes_sheets_and_index(tmp_path):
+    frames = []
+    for i in range(5):
+        frame = tmp_path / f"frame_{i:04d}.jpg"
+        Image.new("RGB", (16, 9), (i * 40, 0, 0)).save(frame)
+        frames.append(str(frame))
+
+    entries = build_sprites(frames, [0, 2, 4, 6, 8], tmp_path / "out", duration=9.5, columns=2, rows=2)
+    assert [e["sheet"] for e in entries] == ["sprite_000.jpg"] * 4 + ["sprite_001.jpg"]
+    assert (entries[3]["x"], entries[3]["y"]) == (16, 9)
+    with Image.open(tmp_path / "out" / "sprite_000.jpg") as sheet:
+        assert sheet.size == (32, 18)
+    index = json.loads((tmp_path / "out" / "sprite.json").read_text())
+    assert index["thumbnails"][-1]["end"] == 9.5
+    vtt = (tmp_path / "out" / "sprite.vtt").read_text()
+    assert vtt.startswith("WEBVTT")
+    assert "00:00:02.000 --> 00:00:04.000\nsprite_000.jpg#xywh=16,0,16,9" in vtt
+
+def test_build_sprites_scales_copies_and_checks_grid(tmp_path):
+    import pytest
+
+    frame = tmp_path / "frame_0001.jpg"
+    Image.new("RGB", (100, 50)).save(frame)
+    entries = build_sprites([str(frame)], [0], tmp_path / "out", columns=1, rows=1, thumb_width=40)
+    assert (entries[0]["w"], entries[0]["h"]) == (40, 20)
+    with Image.open(frame) as original:
+        assert original.size == (100, 50)
+    with pytest.raises(ValueError):
+        build_sprites([str(frame)], [0], tmp_path / "out", columns=0, rows=5)
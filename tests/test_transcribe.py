@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from toolbox.core import transcribe
+from toolbox.core.transcribe import SAMPLE_RATE, Transcriber, speech_chunks
+
+def _speech(seconds: float):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+
+def _silence(seconds: float):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+def test_speech_chunks_cut_in_pauses_and_skip_silence():
+    audio = np.concatenate([_speech(4), _silence(1), _speech(4), _silence(1), _speech(4), _silence(6)])
+    chunks = speech_chunks(audio, chunk_length=10)
+    # The first chunk ends in the pause after the second burst, not mid-speech at 10 s
+    assert chunks[0][0] == 0 and 9 * SAMPLE_RATE < chunks[0][1] < 10 * SAMPLE_RATE
+    assert all(end - start <= 10 * SAMPLE_RATE for start, end in chunks)
+    # Trailing silence is not sent to the model
+    assert len(chunks) == 2 and chunks[-1][1] < 18 * SAMPLE_RATE
+    # Without pauses, long speech is hard-cut at the limit
+    assert speech_chunks(_speech(25), chunk_length=10) == [
+        (0, 10 * SAMPLE_RATE), (10 * SAMPLE_RATE, 20 * SAMPLE_RATE), (20 * SAMPLE_RATE, 25 * SAMPLE_RATE)
+    ]
+
+class FakeModel:
+    def __init__(self):
+        self.languages = []
+
+    def transcribe(self, audio, **options):
+        self.languages.append(options.get("language"))
+        seconds = len(audio) / SAMPLE_RATE
+        return {"language": "en", "segments": [{"start": 0.5, "end": seconds - 0.5, "text": f" {seconds:.0f}s "}]}
+
+def test_transcriber_stitches_chunk_timestamps(monkeypatch):
+    monkeypatch.setattr(transcribe, "_worker_model", FakeModel())
+    monkeypatch.setattr(transcribe, "_detect_language", lambda samples: "en")
+    transcriber = Transcriber("tiny", jobs=2)
+    transcriber.executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        segments = list(transcriber.transcribe(_speech(25), chunk_length=10))
+    finally:
+        transcriber.close()
+    assert segments == [
+        {"start": 0.5, "end": 9.5, "text": "10s"},
+        {"start": 10.5, "end": 19.5, "text": "10s"},
+        {"start": 20.5, "end": 24.5, "text": "5s"},
+    ]
+
+def test_transcript_writer_flushes_every_segment(tmp_path):
+    from toolbox.core.transcribe import TranscriptWriter, transcript_format
+
+    assert transcript_format("talk.srt") == "srt" and transcript_format("talk.md") == "txt"
+    assert transcript_format("talk.srt", "jsonl") == "jsonl"
+    segments = [{"start": 0.5, "end": 2.0, "text": " Hello "}, {"start": 3661.25, "end": 3662.0, "text": "world"}]
+    expected = {
+        "srt": "1\n00:00:00,500 --> 00:00:02,000\nHello\n\n2\n01:01:01,250 --> 01:01:02,000\nworld\n\n",
+        "vtt": "WEBVTT\n\n00:00:00.500 --> 00:00:02.000\nHello\n\n01:01:01.250 --> 01:01:02.000\nworld\n",
+        "jsonl": '{"start": 0.5, "end": 2.0, "text": "Hello"}\n{"start": 3661.25, "end": 3662.0, "text": "world"}\n',
+        "txt": "Hello world",
+    }
+    for fmt, content in expected.items():
+        path = tmp_path / f"out.{fmt}"
+        with TranscriptWriter(str(path), fmt) as writer:
+            writer.write(segments[0])
+            # Readable before the writer is closed
+            assert content.startswith(path.read_text()) and path.read_text()
+            writer.write(segments[1])
+        assert path.read_text() == content
+
+@pytest.mark.parametrize("language, detections", [(None, [10 * SAMPLE_RATE]), ("fr", [])])
+def test_language_is_detected_once_for_all_chunks(monkeypatch, language, detections):
+    model, detected = FakeModel(), []
+    monkeypatch.setattr(transcribe, "_worker_model", model)
+    monkeypatch.setattr(transcribe, "_detect_language", lambda samples: detected.append(len(samples)) or "de")
+    transcriber = Transcriber("tiny", jobs=2)
+    transcriber.executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        list(transcriber.transcribe(_speech(25), chunk_length=10, language=language))
+    finally:
+        transcriber.close()
+    # Only the first chunk is listened to, and every chunk is decoded in one language
+    assert detected == detections
+    assert model.languages == [language or "de"] * 3
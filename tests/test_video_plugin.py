@@ -1,3 +1,4 @@
+import os
 import pytest
 from click.testing import CliRunner
 from toolbox.cli import cli
@@ -67,3 +68,83 @@ def test_video_remove_watermark(mock_get_engine, runner):
         mock_ffmpeg.run_with_progress.assert_called()
         args = mock_ffmpeg.run_with_progress.call_args[0][0]
         assert "delogo" in str(args)
+
+@patch("toolbox.plugins.video.media.probe")
+@patch("toolbox.core.engine.engine_registry.get")
+def test_video_multi_decodes_once(mock_get_engine, mock_probe, runner):
+    mock_ffmpeg = MagicMock()
+    mock_get_engine.return_value = mock_ffmpeg
+
+    with runner.isolated_filesystem():
+        with open("test.mp4", "w") as f:
+            f.write("fake video data")
+
+        result = runner.invoke(cli, ["video", "multi", "test.mp4", "--gif", "a.gif", "--sticker", "a.webp",
+                                     "--audio", "a.mp3", "--frames", "thumbs", "--compressed", "small.mp4"])
+
+        assert result.exit_code == 0, result.output
+        # Every output comes out of a single FFmpeg run over a single input
+        mock_ffmpeg.run_with_progress.assert_called_once()
+        args = mock_ffmpeg.run_with_progress.call_args[0][0]
+        assert args.count("-i") == 1
+        graph = args[args.index("-filter_complex") + 1]
+        assert graph.startswith("[0:v]split=4[v0][v1][v2][v3]")
+        assert "paletteuse[gif]" in graph and "pad=512:512" in graph and "fps=1/1.0[frames]" in graph
+        for output in ("a.gif", "a.webp", "a.mp3", "small.mp4"):
+            assert output in args
+        assert os.path.isdir("thumbs")
+
+@patch("toolbox.plugins.video.media.probe")
+@patch("toolbox.core.engine.engine_registry.get")
+def test_video_multi_rejects_audio_output_without_audio(mock_get_engine, mock_probe, runner):
+    mock_ffmpeg = MagicMock()
+    mock_get_engine.return_value = mock_ffmpeg
+    mock_probe.return_value.audio = None
+
+    with runner.isolated_filesystem():
+        with open("test.mp4", "w") as f:
+            f.write("fake video data")
+
+        result = runner.invoke(cli, ["video", "multi", "test.mp4", "--gif", "a.gif", "--audio", "a.mp3"])
+        assert "no audio stream" in result.output
+        mock_ffmpeg.run_with_progress.assert_not_called()
+
+        result = runner.invoke(cli, ["video", "multi", "test.mp4"])
+        assert "Request at least one of" in result.output
+        mock_ffmpeg.run_with_progress.assert_not_called()
+
+@patch("toolbox.core.media.probe")
+@patch("toolbox.core.engine.engine_registry.get")
+def test_extract_frames_sprites_only_this_runs_frames(mock_get_engine, mock_probe, runner):
+    from PIL import Image
+
+    def decode(args, label):
+        pattern = args[-1]
+        for i in (1, 2):
+            Image.new("RGB", (64, 36)).save(pattern.replace("%04d", f"{i:04d}"))
+
+    mock_ffmpeg = MagicMock()
+    mock_ffmpeg.run_with_progress.side_effect = decode
+    mock_get_engine.return_value = mock_ffmpeg
+    mock_probe.return_value = MagicMock(duration=2.0)
+
+    with runner.isolated_filesystem():
+        with open("test.mp4", "w") as f:
+            f.write("fake video data")
+        os.mkdir("frames")
+        for i in range(1, 6):
+            Image.new("RGB", (64, 36)).save(f"frames/frame_{i:04d}.jpg")
+
+        result = runner.invoke(cli, ["video", "extract-frames", "test.mp4", "--sprite", "--thumb-width", "32"])
+        assert result.exit_code == 0, result.output
+        assert "Packed 2 thumbnails" in result.output
+        # The frames keep their size; only the sheet holds thumbnails
+        with Image.open("frames/frame_0001.jpg") as frame:
+            assert frame.size == (64, 36)
+        with Image.open("frames/sprite_000.jpg") as sheet:
+            assert sheet.size == (64, 18)
+        assert sorted(os.listdir("frames")) == [f"frame_{i:04d}.jpg" for i in range(1, 6)] + [
+            "sprite.json", "sprite.vtt", "sprite_000.jpg"]
+
+        result = runner.invoke(cli, ["video", "extract-frames", "test.mp4", "--sprite", "--sprite-grid", "0x5"])
+        assert "--sprite-grid" in result.output
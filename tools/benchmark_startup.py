@@ -0,0 +1,83 @@
+"""Measure ToolBox CLI startup latency.
+
+Runs ``toolbox --help`` and a single cheap command in fresh interpreters and
+reports min/median/max wall time. ``--eager`` sets ``TOOLBOX_EAGER_PLUGINS=1``
+so every plugin is imported up front, which reproduces the pre-manifest
+startup path for before/after comparisons. ``--client`` dispatches through
+``toolbox.client`` instead and expects ``toolbox serve-local`` to be running.
+"""
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+
+SCENARIOS = {
+    "help": ["--help"],
+    "single-command": ["util", "base64", "encode", "x"],
+}
+
+
+def _time_run(argv: list[str], env: dict[str, str], module: str = "toolbox") -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", module, *argv],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def measure(runs: int, eager: bool, client: bool = False) -> dict[str, dict[str, float]]:
+    env = os.environ.copy()
+    if eager:
+        env["TOOLBOX_EAGER_PLUGINS"] = "1"
+    else:
+        env.pop("TOOLBOX_EAGER_PLUGINS", None)
+    module = "toolbox.client" if client else "toolbox"
+
+    # Warm-up run: populates the OS page cache and the plugin manifest.
+    _time_run(["--help"], env, module)
+
+    results: dict[str, dict[str, float]] = {}
+    for name, argv in SCENARIOS.items():
+        samples = [_time_run(argv, env, module) for _ in range(runs)]
+        results[name] = {
+            "min_ms": round(min(samples) * 1000, 1),
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+        }
+    return results
+
+
+@click.command()
+@click.option("-n", "--runs", type=int, default=10, show_default=True, help="Runs per scenario")
+@click.option("--eager", is_flag=True, help="Import all plugins at startup (pre-manifest behaviour)")
+@click.option("--client", is_flag=True, help="Dispatch through a running `toolbox serve-local`")
+@click.option("--output", type=click.Path(path_type=Path), help="Append results as a JSON line to this file")
+def main(runs: int, eager: bool, client: bool, output: Path | None) -> None:
+    mode = "client" if client else "eager" if eager else "lazy"
+    results = measure(runs, eager, client)
+
+    for name, stats in results.items():
+        click.echo(
+            f"{mode:>6} {name:<15} min {stats['min_ms']:>7.1f} ms  "
+            f"median {stats['median_ms']:>7.1f} ms  max {stats['max_ms']:>7.1f} ms"
+        )
+
+    if output:
+        record = {"mode": mode, "runs": runs, "python": sys.version.split()[0], "results": results}
+        with open(output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Measure ESRGAN upscaling throughput and memory.
+
+Upscales synthetic RGB frames at each resolution with
+``toolbox.core.inference.TiledUpscaler`` and reports frames/s and the peak
+resident set size. Every resolution runs in a fresh interpreter so peak RSS
+is not inherited from a larger, earlier run. ``--tile 0`` feeds whole frames
+to the model, which reproduces the untiled behaviour for comparisons.
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import click
+
+DEFAULT_RESOLUTIONS = "320x180,640x360,1280x720"
+
+
+def _peak_rss_sampler(stop: threading.Event, peak: list[int]) -> None:
+    import psutil
+
+    process = psutil.Process()
+    while not stop.is_set():
+        peak[0] = max(peak[0], process.memory_info().rss)
+        stop.wait(0.02)
+
+
+def run_one(model: str, scale: int, width: int, height: int, frames: int, tile: int, batch: int) -> dict:
+    import numpy as np
+
+    from toolbox.core.ai import is_gpu_available
+    from toolbox.core.inference import TiledUpscaler, get_session
+
+    stop, peak = threading.Event(), [0]
+    sampler = threading.Thread(target=_peak_rss_sampler, args=(stop, peak), daemon=True)
+    sampler.start()
+
+    session = get_session(model, gpu=is_gpu_available())
+    upscaler = TiledUpscaler(session, scale, tile=tile, batch_size=batch)
+    per_run = upscaler.images_per_run(height, width)
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(per_run)]
+
+    # Warm-up: first run allocates the arena and picks kernels
+    upscaler.upscale(images[:1])
+    start = time.perf_counter()
+    done = 0
+    while done < frames:
+        done += len(upscaler.upscale(images[: min(per_run, frames - done)]))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    sampler.join()
+    return {
+        "resolution": f"{width}x{height}",
+        "frames": done,
+        "fps": round(done / elapsed, 3),
+        "peak_rss_mb": round(peak[0] / (1024 * 1024), 1),
+    }
+
+
+@click.command()
+@click.option("--model", type=click.Path(exists=True, dir_okay=False), help="ONNX model (default: the registry ESRGAN model for --scale)")
+@click.option("-s", "--scale", type=int, default=2, show_default=True, help="Upscale factor of the model")
+@click.option("--resolutions", default=DEFAULT_RESOLUTIONS, show_default=True, help="Comma-separated WxH list")
+@click.option("-n", "--frames", type=int, default=10, show_default=True, help="Frames per resolution")
+@click.option("--tile", type=int, default=256, show_default=True, help="Tile size (0 = whole frame)")
+@click.option("--batch", type=int, default=4, show_default=True, help="Tiles per inference run")
+@click.option("--output", type=click.Path(path_type=Path), help="Append results as a JSON line to this file")
+@click.option("--worker", hidden=True, help="Internal: benchmark one WxH in this process")
+def main(model: str | None, scale: int, resolutions: str, frames: int, tile: int, batch: int,
+         output: Path | None, worker: str | None) -> None:
+    if model is None:
+        from toolbox.core.ai import AVAILABLE_MODELS, get_model_path
+
+        info = AVAILABLE_MODELS[f"upscale-x{scale}"]
+        model = str(get_model_path(info["name"], info["url"]))
+
+    if worker:
+        width, height = (int(v) for v in worker.split("x"))
+        click.echo(json.dumps(run_one(model, scale, width, height, frames, tile, batch)))
+        return
+
+    results = []
+    for resolution in resolutions.split(","):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--model", model, "--scale", str(scale), "--frames", str(frames),
+             "--tile", str(tile), "--batch", str(batch), "--worker", resolution.strip()],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(result)
+        click.echo(
+            f"{result['resolution']:>10}  {result['fps']:>8.3f} frames/s  "
+            f"peak RSS {result['peak_rss_mb']:>8.1f} MB"
+        )
+
+    if output:
+        record = {"scale": scale, "tile": tile, "batch": batch, "python": sys.version.split()[0], "results": results}
+        with open(output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -477,6 +477,7 @@ def _render_publishing_page() -> str:
 
 
 def generate(out_dir: Path) -> int:
+    root_cli.load_all_commands()
     nodes = _walk_commands(root_cli)
     by_path = {n.path: n for n in nodes}
 